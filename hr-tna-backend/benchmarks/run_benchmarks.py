@@ -0,0 +1,345 @@
+"""Reproducible benchmark and load-test suite for the TNA API.
+
+    python run_benchmarks.py                      # all scenarios -> results/latest.json
+    python run_benchmarks.py --only topk store    # a subset
+    python run_benchmarks.py --save-baseline      # store the run as results/baseline.json
+    python run_benchmarks.py --tolerance 0.25     # fail (exit 1) on >25% regressions vs. baseline
+
+Scenarios:
+  cold_start - wall time and slowest imports of `import training_analytics_api`
+  encode     - model encode latency per batch size (skipped if the model cannot load)
+  topk       - exact/ANN top-k and pooled scoring over 10 .. 100k skills
+  store      - JSON file vs SQLite organization store throughput under concurrent threads
+  http       - uvicorn + synthetic organizations, concurrent GET/POST load
+"""
+import os
+import sys
+import json
+import time
+import socket
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICES_DIR = os.path.join(BENCH_DIR, "..", "src", "services")
+RESULTS_DIR = os.environ.get("TNA_BENCH_RESULTS", os.path.join(BENCH_DIR, "results"))
+sys.path.insert(0, SERVICES_DIR)
+
+SEED = 1234
+SCENARIOS = ("cold_start", "encode", "topk", "store", "http")
+
+
+def metric(value, unit, better="lower"):
+    return {"value": round(float(value), 4), "unit": unit, "better": better}
+
+
+def percentiles(timings_ms):
+    timings_ms = sorted(timings_ms)
+    return timings_ms[len(timings_ms) // 2], timings_ms[min(len(timings_ms) - 1, int(len(timings_ms) * 0.95))]
+
+
+def isolated_env(tmp_dir, **extra):
+    """Environment that keeps every store/index of a run inside tmp_dir."""
+    env = dict(os.environ)
+    env.update({
+        "TNA_INDEX_DIR": os.path.join(tmp_dir, "index"),
+        "TNA_DATA_DIR": os.path.join(tmp_dir, "data"),
+        "TNA_ORG_FILE": os.path.join(tmp_dir, "legacy-organizations.json"),
+        "PYTHONPATH": os.pathsep.join(filter(None, [SERVICES_DIR, os.environ.get("PYTHONPATH")])),
+    })
+    env.update(extra)
+    return env
+
+
+# ✅ Scenarios ----------------------------------------------------------------------------
+
+def bench_cold_start(tmp_dir, repeats=3):
+    """Import the API module in fresh interpreters (model loading off) and rank import costs."""
+    env = isolated_env(tmp_dir, TNA_MODEL_LOAD="lazy")
+    wall = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import training_analytics_api"], cwd=SERVICES_DIR, env=env,
+                       check=True, capture_output=True)
+        wall.append((time.perf_counter() - started) * 1000)
+
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import training_analytics_api"],
+                            cwd=SERVICES_DIR, env=env, check=True, capture_output=True, text=True).stderr
+    imports = []
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+            imports.append((int(cumulative), name))
+    imports.sort(reverse=True)
+
+    metrics = {"import_ms_p50": metric(sorted(wall)[len(wall) // 2], "ms")}
+    return metrics, {"slowest_imports_us": [{"module": name, "cumulative_us": us} for us, name in imports[:10]]}
+
+
+def bench_encode(tmp_dir, batch_sizes=(1, 8, 32, 64), repeats=10):
+    try:
+        from model_loader import get_model
+
+        model = get_model()
+    except Exception as e:
+        return {}, {"skipped": f"model unavailable: {e}"}
+
+    texts = [f"Improve capability number {i} in data-driven operations" for i in range(max(batch_sizes))]
+    model.encode(texts[:8], convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
+    metrics = {}
+    for batch_size in batch_sizes:
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            model.encode(texts[:batch_size], batch_size=batch_size, convert_to_numpy=True,
+                         normalize_embeddings=True, show_progress_bar=False)
+            timings.append((time.perf_counter() - started) * 1000)
+        p50, p95 = percentiles(timings)
+        metrics[f"batch{batch_size}_p50_ms"] = metric(p50, "ms")
+        metrics[f"batch{batch_size}_p95_ms"] = metric(p95, "ms")
+        metrics[f"batch{batch_size}_per_text_ms"] = metric(p50 / batch_size, "ms")
+    return metrics, {}
+
+
+def bench_topk(tmp_dir, sizes=(10, 100, 1000, 10000, 100000), dim=384, queries=8, repeats=20):
+    from vector_search import create_index
+    from skill_scoring import score_skills
+
+    rng = np.random.default_rng(SEED)
+    metrics = {}
+    for size in sizes:
+        vectors = rng.standard_normal((size, dim), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        query_vectors = vectors[rng.integers(0, size, queries)] + 0.05 * rng.standard_normal((queries, dim), dtype=np.float32)
+        weights = np.linspace(1.0, 0.25, queries)
+        for kind in ("exact", "ivf"):
+            if kind == "ivf" and size < 1000:
+                continue
+            started = time.perf_counter()
+            index = create_index(vectors, kind=kind)
+            build_ms = (time.perf_counter() - started) * 1000
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                index.search(query_vectors, k=5)
+                timings.append((time.perf_counter() - started) * 1000)
+            metrics[f"{kind}_{size}_search_p50_ms"] = metric(percentiles(timings)[0], "ms")
+            if kind != "exact":
+                metrics[f"{kind}_{size}_build_ms"] = metric(build_ms, "ms")
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            score_skills(query_vectors, weights, vectors, k=10)
+            timings.append((time.perf_counter() - started) * 1000)
+        metrics[f"pooled_{size}_p50_ms"] = metric(percentiles(timings)[0], "ms")
+    return metrics, {"dim": dim, "queries": queries}
+
+
+def _synthetic_org(i):
+    return {
+        "organizationID": f"BENCH{i:06d}",
+        "name": f"Bench Org {i}",
+        "companyRegistrationNumber": f"REG-{i:06d}",
+        "industry": ("Manufacturing", "Finance", "Retail", "Technology")[i % 4],
+        "vision": "Be the regional leader in digital services",
+        "mission": "Deliver reliable services through skilled people",
+        "objectives": [f"Improve capability {i % 50}", "Adopt cloud platforms", "Strengthen cybersecurity"],
+        "client_charter": "Respond to every customer within one working day",
+    }
+
+
+def bench_store(tmp_dir, records=500, threads=8, operations=2000):
+    from org_repository import JsonOrganizationRepository, SqliteOrganizationRepository
+
+    orgs = [_synthetic_org(i) for i in range(records)]
+    rng = np.random.default_rng(SEED)
+    metrics = {}
+    stores = {
+        "json": JsonOrganizationRepository(os.path.join(tmp_dir, "store", "organizations.json")),
+        "sqlite": SqliteOrganizationRepository(os.path.join(tmp_dir, "store", "organizations.sqlite3")),
+    }
+    for name, store in stores.items():
+        started = time.perf_counter()
+        store.upsert_many(orgs)
+        metrics[f"{name}_bulk_insert_ms"] = metric((time.perf_counter() - started) * 1000, "ms")
+
+        for mode, write_every in (("read", 0), ("mixed", 10)):
+            ids = rng.integers(0, records, operations).tolist()
+
+            def _op(n):
+                org = orgs[ids[n]]
+                if write_every and n % write_every == 0:
+                    store.upsert(dict(org, mission=f"Updated {n}"))
+                else:
+                    store.get(org["organizationID"])
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                list(pool.map(_op, range(operations)))
+            elapsed = time.perf_counter() - started
+            metrics[f"{name}_{mode}_ops_per_s"] = metric(operations / elapsed, "ops/s", "higher")
+    return metrics, {"records": records, "threads": threads, "operations": operations}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def bench_http(tmp_dir, organizations=200, concurrency=16, requests_per_scenario=400, ready_timeout=180):
+    import requests
+    from org_repository import SqliteOrganizationRepository
+
+    env = isolated_env(tmp_dir)
+    orgs = [_synthetic_org(i) for i in range(organizations)]
+    SqliteOrganizationRepository(os.path.join(env["TNA_DATA_DIR"], "organizations.sqlite3")).upsert_many(orgs)
+
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "training_analytics_api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=SERVICES_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        started = time.perf_counter()
+        model_ready = False
+        while time.perf_counter() - started < ready_timeout:
+            try:
+                if requests.get(f"{base}/ready", timeout=2).status_code == 200:
+                    model_ready = True
+                    break
+            except requests.ConnectionError:
+                pass
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            time.sleep(0.25)
+        startup_ms = (time.perf_counter() - started) * 1000
+
+        batch_body = {"organizations": [
+            {key: org[key] for key in ("name", "companyRegistrationNumber", "industry", "vision", "mission", "objectives")}
+            for org in orgs[:20]
+        ]}
+        scenarios = {
+            "get_organization": lambda session, n: session.get(f"{base}/organization/{orgs[n % organizations]['organizationID']}"),
+            "industries_search": lambda session, n: session.get(f"{base}/industries/search", params={"q": "manufacture"}),
+        }
+        if model_ready:
+            scenarios["recommendations"] = lambda session, n: session.get(f"{base}/generate_training_recommendations/")
+            scenarios["batch_recommendations"] = lambda session, n: session.post(
+                f"{base}/generate_training_recommendations/batch", json=batch_body)
+
+        metrics = {"startup_to_ready_ms": metric(startup_ms, "ms")}
+        for name, call in scenarios.items():
+            sessions = [requests.Session() for _ in range(concurrency)]
+            call(sessions[0], 0)  # warm caches/indexes
+
+            def _timed(n):
+                t0 = time.perf_counter()
+                response = call(sessions[n % concurrency], n)
+                return (time.perf_counter() - t0) * 1000, response.status_code
+
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = list(pool.map(_timed, range(requests_per_scenario)))
+            elapsed = time.perf_counter() - t0
+            p50, p95 = percentiles([ms for ms, _ in results])
+            errors = sum(1 for _, status in results if status >= 400)
+            metrics[f"{name}_rps"] = metric(requests_per_scenario / elapsed, "req/s", "higher")
+            metrics[f"{name}_p50_ms"] = metric(p50, "ms")
+            metrics[f"{name}_p95_ms"] = metric(p95, "ms")
+            metrics[f"{name}_error_rate"] = metric(errors / requests_per_scenario, "ratio")
+        return metrics, {"model_ready": model_ready, "concurrency": concurrency, "organizations": organizations}
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+BENCHMARKS = {
+    "cold_start": bench_cold_start,
+    "encode": bench_encode,
+    "topk": bench_topk,
+    "store": bench_store,
+    "http": bench_http,
+}
+
+
+# ✅ Results and regression check ---------------------------------------------------------
+
+def compare(results, baseline, tolerance):
+    """Metrics that got worse than the baseline by more than `tolerance` (relative)."""
+    regressions = []
+    for scenario, payload in results["scenarios"].items():
+        for name, current in payload.get("metrics", {}).items():
+            reference = baseline.get("scenarios", {}).get(scenario, {}).get("metrics", {}).get(name)
+            if not reference or not reference["value"]:
+                continue
+            change = (current["value"] - reference["value"]) / abs(reference["value"])
+            worse = change > tolerance if current["better"] == "lower" else change < -tolerance
+            if worse:
+                regressions.append({
+                    "metric": f"{scenario}.{name}",
+                    "baseline": reference["value"],
+                    "current": current["value"],
+                    "change": round(change, 4),
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TNA benchmark and load-test suite.")
+    parser.add_argument("--only", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "latest.json"))
+    parser.add_argument("--baseline", default=os.path.join(RESULTS_DIR, "baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = {
+        "created_at": time.time(),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "scenarios": {},
+    }
+    for scenario in args.only:
+        tmp_dir = tempfile.mkdtemp(prefix=f"tna-bench-{scenario}-")
+        print(f"⏱️ {scenario} ...", flush=True)
+        try:
+            metrics, details = BENCHMARKS[scenario](tmp_dir)
+            results["scenarios"][scenario] = {"metrics": metrics, "details": details}
+        except Exception as e:
+            results["scenarios"][scenario] = {"metrics": {}, "details": {"error": repr(e)}}
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        for name, value in results["scenarios"][scenario]["metrics"].items():
+            print(f"   {name:<40} {value['value']:>12} {value['unit']}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(f"✅ Results written to {args.output}")
+
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"❌ Regression {regression['metric']}: {regression['baseline']} -> {regression['current']} "
+                  f"({regression['change']:+.0%})")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
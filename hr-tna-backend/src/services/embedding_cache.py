@@ -0,0 +1,174 @@
+import os
+import re
+import sqlite3
+import asyncio
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+import numpy as np
+from skill_index import INDEX_DIR
+
+# ✅ On-disk tier lives next to the skill index so it survives restarts
+CACHE_PATH = os.environ.get("TNA_EMBEDDING_CACHE", os.path.join(INDEX_DIR, "embedding_cache.sqlite3"))
+CACHE_MAX_ITEMS = int(os.environ.get("TNA_EMBEDDING_CACHE_ITEMS", "4096"))
+
+
+def normalize_text(text):
+    """Normalize text so trivially different inputs share one cache entry."""
+    text = unicodedata.normalize("NFC", text or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def cache_key(model_id, text):
+    """Content address for an embedding: model ID + normalized text."""
+    return hashlib.sha256(f"{model_id}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Two-tier (in-process LRU + SQLite) cache of sentence embeddings."""
+
+    def __init__(self, model_id, path=CACHE_PATH, max_items=CACHE_MAX_ITEMS):
+        self.model_id = model_id
+        self.path = path
+        self.max_items = max_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()  # memory tier + counters (never held during disk I/O)
+        self._db_lock = threading.Lock()  # the shared SQLite connection
+        self._conn = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _connection(self):
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, model_id TEXT NOT NULL, dim INTEGER NOT NULL, vector BLOB NOT NULL)"
+            )
+        return self._conn
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def _memory_get(self, keys):
+        """{key: vector} for the keys held in the in-process tier (no I/O)."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+            self.memory_hits += sum(1 for key in keys if key in found)
+        return found
+
+    def _disk_get(self, keys, found):
+        """Add the SQLite hits for keys not in `found`; counts disk hits and misses."""
+        pending = sorted({key for key in keys if key not in found})
+        loaded = {}
+        if pending:
+            with self._db_lock:
+                conn = self._connection()
+                for start in range(0, len(pending), 500):
+                    chunk = pending[start:start + 500]
+                    rows = conn.execute(
+                        f"SELECT key, dim, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                    for key, dim, blob in rows:
+                        loaded[key] = np.frombuffer(blob, dtype=np.float32, count=dim)
+        with self._lock:
+            for key, vector in loaded.items():
+                self._remember(key, vector)
+            found.update(loaded)
+            self.disk_hits += sum(1 for key in keys if key in loaded)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def get_many(self, texts):
+        """Return cached vectors (or None) for each text, checking memory then disk."""
+        keys = [cache_key(self.model_id, text) for text in texts]
+        found = self._disk_get(keys, self._memory_get(keys))
+        return [found.get(key) for key in keys]
+
+    def put_many(self, texts, vectors):
+        """Store freshly computed vectors in both tiers."""
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = cache_key(self.model_id, text)
+                vector = np.ascontiguousarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((key, self.model_id, int(vector.shape[0]), vector.tobytes()))
+        with self._db_lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+
+    @staticmethod
+    def _missing(texts, vectors):
+        missing = []
+        for text, vector in zip(texts, vectors):
+            if vector is None and text not in missing:
+                missing.append(text)
+        return missing
+
+    @staticmethod
+    def _merge(texts, vectors, missing, encoded):
+        if missing:
+            fresh = dict(zip(missing, encoded))
+            vectors = [fresh[text] if vector is None else vector for text, vector in zip(texts, vectors)]
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(vectors).astype(np.float32, copy=False)
+
+    def encode(self, texts, encode_fn):
+        """Return an (n, dim) matrix, calling encode_fn only for texts not already cached."""
+        texts = list(texts)
+        vectors = self.get_many(texts)
+        missing = self._missing(texts, vectors)
+        encoded = encode_fn(missing) if missing else None
+        if missing:
+            self.put_many(missing, encoded)
+        return self._merge(texts, vectors, missing, encoded)
+
+    async def aencode(self, texts, encode_fn):
+        """Async variant of encode() for coroutine encoders (e.g. the embedding service).
+
+        Memory hits are answered inline; the SQLite lookup and write-back run on a thread,
+        so the event loop never waits on disk.
+        """
+        texts = list(texts)
+        keys = [cache_key(self.model_id, text) for text in texts]
+        found = self._memory_get(keys)
+        if any(key not in found for key in keys):
+            found = await asyncio.to_thread(self._disk_get, keys, found)
+        vectors = [found.get(key) for key in keys]
+        missing = self._missing(texts, vectors)
+        encoded = await encode_fn(missing) if missing else None
+        if missing:
+            await asyncio.to_thread(self.put_many, missing, encoded)
+        return self._merge(texts, vectors, missing, encoded)
+
+    def stats(self):
+        """Hit/miss counters for both tiers."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        with self._db_lock:
+            disk_items = self._connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {
+            "model_id": self.model_id,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "memory_items": len(self._memory),
+            "disk_items": disk_items,
+        }
@@ -0,0 +1,184 @@
+import os
+import time
+import asyncio
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+from metrics import observe
+
+# ✅ Pool sizing and micro-batching knobs. The default (0) keeps inference in-process on a thread and
+# shares the one model copy (including a --preload'ed one). N > 0 is opt-in: every uvicorn/gunicorn
+# worker then spawns N processes, each loading its own model, so size it for one API worker per host.
+EMBED_WORKERS = int(os.environ.get("TNA_EMBED_WORKERS", "0"))
+EMBED_MAX_BATCH = int(os.environ.get("TNA_EMBED_MAX_BATCH", "64"))
+EMBED_MAX_WAIT_MS = float(os.environ.get("TNA_EMBED_MAX_WAIT_MS", "5"))
+EMBED_QUEUE_SIZE = int(os.environ.get("TNA_EMBED_QUEUE_SIZE", "256"))
+EMBED_TIMEOUT = float(os.environ.get("TNA_EMBED_TIMEOUT", "30"))
+
+
+class EmbeddingServiceSaturated(Exception):
+    """Raised when the request queue is full; callers should answer 429."""
+
+
+def _worker_init():
+    """Load and warm the model once per worker process."""
+    from model_loader import warmup
+
+    warmup()
+
+
+def _worker_ping():
+    return os.getpid()
+
+
+def _worker_encode(texts):
+    """Encode one micro-batch inside a worker (normalized float32 rows)."""
+    from model_loader import get_model
+
+    return np.asarray(
+        get_model().encode(texts, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False),
+        dtype=np.float32,
+    )
+
+
+class EmbeddingService:
+    """Bounded queue + micro-batcher in front of an inference worker pool."""
+
+    def __init__(
+        self,
+        workers=EMBED_WORKERS,
+        max_batch=EMBED_MAX_BATCH,
+        max_wait_ms=EMBED_MAX_WAIT_MS,
+        queue_size=EMBED_QUEUE_SIZE,
+        timeout=EMBED_TIMEOUT,
+    ):
+        self.workers = workers
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.queue = None
+        self.executor = None
+        self._batchers = []
+        self.batches = deque(maxlen=256)
+        self.total_batches = 0
+        self.total_texts = 0
+        self.rejected = 0
+        self.warmed = False
+
+    async def start(self):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        if self.workers > 0:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_worker_init,
+            )
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+        self._batchers = [asyncio.create_task(self._batch_loop()) for _ in range(max(1, self.workers))]
+
+    async def warmup(self):
+        """Spawn every worker up front so its model is loaded before traffic arrives."""
+        if self.queue is None:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *[loop.run_in_executor(self.executor, _worker_ping) for _ in range(max(1, self.workers))]
+        )
+        self.warmed = True
+
+    async def stop(self):
+        for task in self._batchers:
+            task.cancel()
+        await asyncio.gather(*self._batchers, return_exceptions=True)
+        self._batchers = []
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def encode(self, texts):
+        """Queue texts for the next micro-batch and wait for their embeddings."""
+        if self.queue is None:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((list(texts), future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise EmbeddingServiceSaturated("Embedding queue is full")
+        return await asyncio.wait_for(future, timeout=self.timeout)
+
+    async def _collect(self):
+        """Take one request, then coalesce whatever else arrives within max_wait."""
+        items = [await self.queue.get()]
+        size = len(items[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            items.append(item)
+            size += len(item[0])
+        return items
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = await self._collect()
+            unique = list(dict.fromkeys(text for texts, _, _ in items for text in texts))
+            started = time.perf_counter()
+            try:
+                vectors = await loop.run_in_executor(self.executor, _worker_encode, unique) if unique else None
+            except Exception as e:
+                for _, future, _ in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+            observe("encode", finished - started)
+            observe("encode_queue_wait", max(started - enqueued for _, _, enqueued in items))
+
+            rows = {text: i for i, text in enumerate(unique)}
+            for texts, future, _ in items:
+                if not future.done():
+                    future.set_result(
+                        vectors[[rows[text] for text in texts]] if texts else np.zeros((0, 0), dtype=np.float32)
+                    )
+
+            self.total_batches += 1
+            self.total_texts += len(unique)
+            self.batches.append({
+                "requests": len(items),
+                "texts": len(unique),
+                "queue_wait_ms": round(max(started - enqueued for _, _, enqueued in items) * 1000, 3),
+                "encode_ms": round((finished - started) * 1000, 3),
+            })
+
+    def worker_pids(self):
+        """PIDs of the inference worker processes (empty in thread mode)."""
+        processes = getattr(self.executor, "_processes", None) or {}
+        return list(processes)
+
+    def stats(self):
+        """Queue depth plus per-batch timing summaries."""
+        encode_ms = sorted(batch["encode_ms"] for batch in self.batches)
+        return {
+            "workers": self.workers,
+            "mode": "process" if self.workers > 0 else "thread",
+            "warmed": self.warmed,
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "queue_size": self.queue_size,
+            "total_batches": self.total_batches,
+            "total_texts": self.total_texts,
+            "rejected": self.rejected,
+            "avg_batch_texts": round(self.total_texts / self.total_batches, 2) if self.total_batches else 0.0,
+            "encode_ms_p50": encode_ms[len(encode_ms) // 2] if encode_ms else None,
+            "encode_ms_p95": encode_ms[int(len(encode_ms) * 0.95)] if encode_ms else None,
+            "recent_batches": list(self.batches)[-10:],
+        }
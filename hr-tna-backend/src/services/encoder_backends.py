@@ -0,0 +1,269 @@
+"""Selectable CPU encoder backends for the MiniLM sentence encoder.
+
+Backends (TNA_ENCODER_BACKEND):
+  torch     - SentenceTransformer, PyTorch fp32 (reference)
+  onnx      - ONNX Runtime, fp32 graph exported from the same weights
+  onnx-int8 - ONNX Runtime, dynamically quantized int8 weights
+
+One-time conversion, parity check and benchmark:
+  python encoder_backends.py export
+  python encoder_backends.py parity
+  python encoder_backends.py benchmark
+"""
+import os
+import sys
+import json
+import time
+import inspect
+import argparse
+import subprocess
+import numpy as np
+from metrics import peak_rss_bytes
+
+ENCODER_BACKEND = os.environ.get("TNA_ENCODER_BACKEND", "torch")
+BACKENDS = ("torch", "onnx", "onnx-int8")
+ONNX_DIR = os.environ.get(
+    "TNA_ONNX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+)
+ONNX_THREADS = int(os.environ.get("TNA_ONNX_THREADS", "0"))  # 0 = let ONNX Runtime decide
+
+# ✅ Minimum cosine similarity to the PyTorch embeddings for each converted backend
+PARITY_THRESHOLDS = {"onnx": 0.999, "onnx-int8": 0.98}
+
+PARITY_TEXTS = [
+    "AI & Big Data",
+    "Cybersecurity",
+    "Cloud Computing",
+    "Analytical Thinking",
+    "Expand our digital services to regional customers",
+    "Reduce workplace accidents through better safety training",
+    "Improve leadership and decision-making among middle managers",
+    "Adopt data-driven budgeting across all departments",
+    "Growing of paddy",
+    "Manufacture of semi-conductor devices",
+]
+
+
+def model_id(model_name, backend=ENCODER_BACKEND):
+    """Identifier used for cache/index keys; converted backends get their own embeddings."""
+    return model_name if backend == "torch" else f"{model_name}+{backend}"
+
+
+def onnx_model_dir(model_name):
+    return os.path.join(ONNX_DIR, model_name.replace("/", "__"))
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class OnnxEncoder:
+    """Mean-pooled sentence encoder on ONNX Runtime with a SentenceTransformer-like encode()."""
+
+    def __init__(self, model_name, quantized=False):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = onnx_model_dir(model_name)
+        with open(os.path.join(model_dir, "encoder_config.json"), "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+        # ✅ Plain `tokenizers` keeps torch/transformers out of this process entirely
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ONNX_THREADS:
+            options.intra_op_num_threads = ONNX_THREADS
+        path = os.path.join(model_dir, "model.int8.onnx" if quantized else "model.onnx")
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self):
+        return self.config["dim"]
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=False,
+               show_progress_bar=False, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        chunks = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            tokens = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            feed = {name: tokens[name] for name in self.input_names if name in tokens}
+            hidden = self.session.run(None, feed)[0]
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            if self.config.get("normalize") or normalize_embeddings:
+                pooled = _normalize(pooled)
+            chunks.append(pooled.astype(np.float32))
+        vectors = np.vstack(chunks) if chunks else np.zeros((0, self.config["dim"]), dtype=np.float32)
+        return vectors[0] if single else vectors
+
+
+def load_encoder(model_name, backend=ENCODER_BACKEND):
+    """Instantiate the requested encoder backend."""
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(model_name, device="cpu")
+    if backend == "onnx":
+        return OnnxEncoder(model_name)
+    if backend == "onnx-int8":
+        return OnnxEncoder(model_name, quantized=True)
+    raise ValueError(f"Unknown encoder backend: {backend} (expected one of {', '.join(BACKENDS)})")
+
+
+def export_onnx(model_name):
+    """Export the PyTorch transformer to ONNX (fp32) and write a dynamically quantized int8 copy."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    model_dir = onnx_model_dir(model_name)
+    os.makedirs(model_dir, exist_ok=True)
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+
+    class _HiddenStates(torch.nn.Module):
+        """Keyword-only call into the transformer, returning just last_hidden_state."""
+
+        def __init__(self, inner, names):
+            super().__init__()
+            self.inner = inner
+            self.names = names
+
+        def forward(self, *inputs):
+            return self.inner(**dict(zip(self.names, inputs))).last_hidden_state
+
+    tokenizer = st_model.tokenizer
+    tokenizer.save_pretrained(model_dir)
+
+    sample = tokenizer(["export sample"], padding=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = os.path.join(model_dir, "model.onnx")
+    # ✅ Newer torch defaults to the dynamo exporter (needs onnxscript); the TorchScript one is enough here
+    export_kwargs = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.no_grad():
+        torch.onnx.export(
+            _HiddenStates(transformer, input_names),
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            **export_kwargs,
+        )
+    quantize_dynamic(fp32_path, os.path.join(model_dir, "model.int8.onnx"), weight_type=QuantType.QInt8)
+
+    config = {
+        "model_name": model_name,
+        "dim": int(transformer.config.hidden_size),
+        "max_seq_length": st_model.max_seq_length,
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+        "normalize": any(type(module).__name__ == "Normalize" for module in st_model),
+    }
+    with open(os.path.join(model_dir, "encoder_config.json"), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=4)
+    return model_dir
+
+
+def parity_check(model_name, texts=PARITY_TEXTS):
+    """Cosine similarity of each converted backend against the PyTorch reference."""
+    reference = load_encoder(model_name, "torch").encode(
+        texts, convert_to_numpy=True, normalize_embeddings=True
+    )
+    report = {}
+    for backend, threshold in PARITY_THRESHOLDS.items():
+        vectors = load_encoder(model_name, backend).encode(texts, normalize_embeddings=True)
+        cosines = np.sum(reference * vectors, axis=1)
+        report[backend] = {
+            "min_cosine": round(float(cosines.min()), 6),
+            "mean_cosine": round(float(cosines.mean()), 6),
+            "threshold": threshold,
+            "passed": bool(cosines.min() >= threshold),
+        }
+    return report
+
+
+def _rss_mb():
+    """Peak resident set size of this process in MB (None where the platform does not report it)."""
+    peak = peak_rss_bytes()
+    return round(peak / (1024 * 1024), 1) if peak is not None else None
+
+
+def benchmark_backend(model_name, backend, batch_sizes=(1, 8, 32), repeats=20):
+    """Load one backend and time encode() per batch size (run in a fresh process for clean RSS)."""
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    encoder = load_encoder(model_name, backend)
+    load_seconds = time.perf_counter() - started
+    encoder.encode(PARITY_TEXTS, normalize_embeddings=True)  # warmup
+
+    latencies = {}
+    for batch_size in batch_sizes:
+        batch = (PARITY_TEXTS * (batch_size // len(PARITY_TEXTS) + 1))[:batch_size]
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            encoder.encode(batch, batch_size=batch_size, normalize_embeddings=True)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        latencies[str(batch_size)] = {
+            "p50_ms": round(timings[len(timings) // 2], 3),
+            "p95_ms": round(timings[int(len(timings) * 0.95)], 3),
+        }
+    return {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 3),
+        "rss_before_mb": rss_before,
+        "rss_peak_mb": _rss_mb(),
+        "latency": latencies,
+    }
+
+
+def benchmark(model_name, backends=BACKENDS):
+    """Benchmark each backend in its own subprocess so RSS numbers do not mix."""
+    results = []
+    for backend in backends:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "benchmark-one", "--backend", backend,
+             "--model", model_name],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+if __name__ == "__main__":
+    from model_loader import MODEL_NAME
+
+    parser = argparse.ArgumentParser(description="Encoder backend conversion and checks.")
+    parser.add_argument("command", choices=["export", "parity", "benchmark", "benchmark-one"])
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--backend", choices=BACKENDS, default="torch")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        print(f"✅ Exported ONNX fp32 + int8 models to {export_onnx(args.model)}")
+    elif args.command == "parity":
+        report = parity_check(args.model)
+        print(json.dumps(report, indent=4))
+        if not all(entry["passed"] for entry in report.values()):
+            sys.exit(1)
+    elif args.command == "benchmark":
+        print(json.dumps(benchmark(args.model), indent=4))
+    else:
+        print(json.dumps(benchmark_backend(args.model, args.backend)))
@@ -0,0 +1,77 @@
+import os
+import numpy as np
+from vector_search import BLOCK_SIZE
+from metrics import timed_function
+
+# ✅ Cosine similarity at which a past program counts as training for a skill
+GAP_THRESHOLD = float(os.environ.get("TNA_GAP_THRESHOLD", "0.5"))
+
+
+def program_texts(titles, fields):
+    """Text embedded per program: its title plus the field it was filed under."""
+    return [f"{title} ({field})" if field else title for title, field in zip(titles, fields)]
+
+
+@timed_function("similarity")
+def best_matches(program_vectors, skill_vectors, membership, block_size=BLOCK_SIZE):
+    """Best program score/index per skill, overall and per attendee level.
+
+    The programs x skills matrix is produced block by block, so memory stays at
+    block_size x skills however many programs there are.
+    """
+    n_skills = skill_vectors.shape[0]
+    n_levels = membership.shape[1]
+    best = np.full(n_skills, -np.inf, dtype=np.float32)
+    best_program = np.full(n_skills, -1, dtype=np.int64)
+    level_best = np.full((n_levels, n_skills), -np.inf, dtype=np.float32)
+
+    for start in range(0, program_vectors.shape[0], block_size):
+        scores = program_vectors[start:start + block_size] @ skill_vectors.T  # (block, skills)
+        block_best = scores.argmax(axis=0)
+        block_scores = scores[block_best, np.arange(n_skills)]
+        improved = block_scores > best
+        best[improved] = block_scores[improved]
+        best_program[improved] = block_best[improved] + start
+
+        block_membership = membership[start:start + block_size]
+        for level in range(n_levels):
+            rows = block_membership[:, level]
+            if rows.any():
+                np.maximum(level_best[level], scores[rows].max(axis=0), out=level_best[level])
+    return best, best_program, level_best
+
+
+def analyze_gaps(skills, skill_vectors, titles, fields, program_vectors, membership, levels,
+                 threshold=GAP_THRESHOLD, block_size=BLOCK_SIZE):
+    """Which recommended skills no past program covers, overall and per attendee level."""
+    skill_vectors = np.asarray(skill_vectors, dtype=np.float32)
+    program_vectors = np.asarray(program_vectors, dtype=np.float32).reshape(-1, skill_vectors.shape[1])
+    best, best_program, level_best = best_matches(program_vectors, skill_vectors, membership, block_size)
+
+    results = []
+    for s, skill in enumerate(skills):
+        entry = {"skill": skill, "covered": bool(best[s] >= threshold), "best_match": None, "by_attendee": {}}
+        if best_program[s] >= 0:
+            p = int(best_program[s])
+            entry["best_match"] = {"title": titles[p], "field": fields[p], "score": round(float(best[s]), 4)}
+        for level, name in enumerate(levels):
+            if np.isfinite(level_best[level, s]):
+                entry["by_attendee"][name] = {
+                    "score": round(float(level_best[level, s]), 4),
+                    "covered": bool(level_best[level, s] >= threshold),
+                }
+        results.append(entry)
+
+    return {
+        "threshold": threshold,
+        "programs": len(titles),
+        "skills": results,
+        "gaps": [entry["skill"] for entry in results if not entry["covered"]],
+        "gaps_by_attendee": {
+            name: [
+                entry["skill"] for entry in results
+                if not entry["by_attendee"].get(name, {}).get("covered", False)
+            ]
+            for level, name in enumerate(levels) if membership[:, level].any()
+        },
+    }
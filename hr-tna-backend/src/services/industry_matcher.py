@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+import threading
+import numpy as np
+from msic_index import get_msic_index
+from skill_index import INDEX_DIR, catalogue_hash, index_key, open_embeddings, read_entry, read_manifest, write_embeddings
+from vector_search import top_k
+
+
+def msic_texts(index):
+    """Text embedded for each MSIC row: description plus its 'includes' note."""
+    return [
+        f"{desc}. Includes {include}" if include else desc
+        for desc, include in zip(index.desc_en, index.include_en)
+    ]
+
+
+def _row_hash(code, text):
+    return hashlib.sha1(f"{code}\0{text}".encode("utf-8")).hexdigest()
+
+
+class IndustryMatcher:
+    """Memory-mapped MSIC embedding matrix for free-text -> MSIC code suggestions."""
+
+    def __init__(self, msic, embeddings):
+        self.msic = msic
+        self.embeddings = embeddings
+
+    def suggest_from_vector(self, vector, k=5):
+        """Top-k MSIC codes for one normalized query vector (single matrix-vector pass)."""
+        scores, ids = top_k(self.embeddings @ np.asarray(vector, dtype=np.float32), k)
+        return [self.msic.record(int(i), float(score)) for score, i in zip(scores[0], ids[0])]
+
+
+def _latest_entry(manifest, model_id):
+    entries = [
+        (key, entry) for key, entry in manifest.items()
+        if entry.get("kind") == "msic" and entry.get("model_name") == model_id
+    ]
+    return max(entries, key=lambda item: item[1].get("built_at", 0)) if entries else (None, None)
+
+
+def build_industry_matrix(encode, model_id, index_dir=INDEX_DIR):
+    """Load the MSIC matrix for the current CSV, re-encoding only rows whose text changed.
+
+    `encode` takes a list of texts and returns L2-normalized float32 rows.
+    """
+    msic = get_msic_index()
+    texts = msic_texts(msic)
+    row_hashes = [_row_hash(code, text) for code, text in zip(msic.codes, texts)]
+    texts_hash = catalogue_hash(row_hashes)
+    key = "msic-" + index_key(model_id, texts_hash)
+
+    entry = read_entry(index_dir, key)
+    if entry and entry.get("count") == len(texts):
+        return IndustryMatcher(msic, open_embeddings(index_dir, entry))
+
+    # ✅ Incremental rebuild: reuse vectors of unchanged rows from the previous matrix
+    previous_key, previous = _latest_entry(read_manifest(index_dir), model_id)
+    reused = {}
+    if previous is not None:
+        try:
+            old_matrix = open_embeddings(index_dir, previous)
+            with open(os.path.join(index_dir, previous["rows_file"]), "r", encoding="utf-8") as f:
+                reused = {h: old_matrix[i] for i, h in enumerate(json.load(f))}
+        except (OSError, ValueError, KeyError):
+            reused = {}
+
+    changed = [i for i, h in enumerate(row_hashes) if h not in reused]
+    dim = next(iter(reused.values())).shape[0] if reused else None
+    fresh = encode([texts[i] for i in changed]) if changed else np.zeros((0, dim or 0), dtype=np.float32)
+    dim = dim or fresh.shape[1]
+
+    matrix = np.empty((len(texts), dim), dtype=np.float32)
+    fresh_rows = dict(zip(changed, fresh))
+    for i, h in enumerate(row_hashes):
+        matrix[i] = fresh_rows[i] if i in fresh_rows else reused[h]
+
+    # ✅ Per-row hashes live in a sidecar file so the registered entry stays small
+    rows_file = f"{key}.rows.json"
+    os.makedirs(index_dir, exist_ok=True)
+    with open(os.path.join(index_dir, rows_file), "w", encoding="utf-8") as f:
+        json.dump(row_hashes, f)
+
+    entry = write_embeddings(
+        index_dir, key, matrix, model_id, texts_hash,
+        extra={
+            "kind": "msic",
+            "csv_version": msic.version,
+            "rows_file": rows_file,
+            "reencoded_rows": len(changed),
+            "built_at": time.time(),
+        },
+    )
+    return IndustryMatcher(msic, open_embeddings(index_dir, entry))
+
+
+industry_matcher = None
+_lock = threading.Lock()
+
+
+def loaded_industry_matcher():
+    """The process-wide matcher if it has already been built, else None (never builds)."""
+    return industry_matcher
+
+
+def get_industry_matcher(encode, model_id):
+    """Process-wide matcher, built (or incrementally refreshed) on first use."""
+    global industry_matcher
+    with _lock:
+        if industry_matcher is None:
+            industry_matcher = build_industry_matrix(encode, model_id)
+    return industry_matcher
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the MSIC description embedding matrix.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    args = parser.parse_args()
+
+    from model_loader import MODEL_ID, get_model
+
+    def _encode(texts):
+        return get_model().encode(texts, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
+
+    matcher = build_industry_matrix(_encode, MODEL_ID, args.index_dir)
+    print(f"✅ MSIC matrix ready: {matcher.embeddings.shape[0]} codes x {matcher.embeddings.shape[1]} dims")
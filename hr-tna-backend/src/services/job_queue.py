@@ -0,0 +1,426 @@
+"""Persistent background jobs: SQLite queue + in-process worker pool.
+
+    python job_queue.py enqueue KIND [--params JSON]
+    python job_queue.py list [--status queued|running|succeeded|failed|cancelled]
+    python job_queue.py show JOB_ID
+
+Jobs survive restarts. Any process sharing TNA_JOB_DB can enqueue, and every API
+worker claims jobs atomically, so each job runs once. Failed attempts are retried
+with exponential backoff; jobs whose worker stopped heartbeating are re-queued.
+"""
+import os
+import json
+import time
+import uuid
+import random
+import socket
+import sqlite3
+import asyncio
+import argparse
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from wef_ingest import DATA_DIR
+from metrics import observe
+from log_config import get_logger
+
+JOB_DB = os.environ.get("TNA_JOB_DB", os.path.join(DATA_DIR, "jobs.sqlite3"))
+JOB_WORKERS = int(os.environ.get("TNA_JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = int(os.environ.get("TNA_JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_S = float(os.environ.get("TNA_JOB_RETRY_BASE_S", "5"))
+JOB_RETRY_MAX_S = float(os.environ.get("TNA_JOB_RETRY_MAX_S", "600"))
+JOB_POLL_S = float(os.environ.get("TNA_JOB_POLL_S", "1"))
+JOB_HEARTBEAT_S = float(os.environ.get("TNA_JOB_HEARTBEAT_S", "10"))
+JOB_STALE_S = float(os.environ.get("TNA_JOB_STALE_S", "60"))
+JOB_RETENTION_S = float(os.environ.get("TNA_JOB_RETENTION_S", str(7 * 24 * 3600)))
+PROGRESS_INTERVAL_S = 0.25  # ✅ Progress writes are throttled per job
+
+ACTIVE = ("queued", "running")
+FINISHED = ("succeeded", "failed", "cancelled")
+
+log = get_logger(__name__)
+
+# ✅ kind -> singleton (enqueueing while one is queued/running returns the existing job). Declared
+# here rather than next to the handlers so the CLI can validate and enqueue without loading the API
+JOB_KINDS = {
+    "wef_ingest": True,
+    "catalogue_reload": True,
+    "catalogue_build": True,
+    "recommendations_refresh": True,
+    "recommendations_batch": False,
+}
+
+# ✅ kind -> (handler, singleton); filled in by job_handler() where the handlers live
+JOB_HANDLERS = {}
+
+
+class JobFailed(Exception):
+    """Permanent failure: the job is marked failed without further retries."""
+
+
+def job_handler(kind):
+    """Register handler(params, report) -> JSON-serializable result for a kind in JOB_KINDS;
+    sync handlers run on a thread."""
+    if kind not in JOB_KINDS:
+        raise KeyError(f"job kind {kind!r} is not declared in JOB_KINDS")
+
+    def decorator(function):
+        JOB_HANDLERS[kind] = (function, JOB_KINDS[kind])
+        return function
+    return decorator
+
+
+def backoff(attempt, base=JOB_RETRY_BASE_S, cap=JOB_RETRY_MAX_S):
+    """Exponential backoff with full jitter for the given (1-based) failed attempt."""
+    return random.uniform(0.5, 1.0) * min(cap, base * 2 ** (attempt - 1))
+
+
+class JobQueue:
+    """Jobs table in SQLite (WAL); one connection per thread."""
+
+    def __init__(self, path=JOB_DB):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, "
+                "kind TEXT NOT NULL, "
+                "params TEXT NOT NULL, "
+                "status TEXT NOT NULL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, "
+                "max_attempts INTEGER NOT NULL, "
+                "progress REAL NOT NULL DEFAULT 0, "
+                "message TEXT, "
+                "result TEXT, "
+                "error TEXT, "
+                "worker TEXT, "
+                "created_at REAL NOT NULL, "
+                "updated_at REAL NOT NULL, "
+                "run_after REAL NOT NULL, "
+                "started_at REAL, "
+                "finished_at REAL, "
+                "heartbeat REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, run_after)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_kind ON jobs (kind, status)")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT: reads inside see no concurrent writer until the commit."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _record(row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def enqueue(self, kind, params=None, max_attempts=JOB_MAX_ATTEMPTS, singleton=False):
+        """Insert a queued job (or return the active one for singleton kinds)."""
+        now = time.time()
+        with self._transaction() as conn:
+            if singleton:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE kind = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+                    (kind, *ACTIVE),
+                ).fetchone()
+                if row is not None:
+                    return self._record(row)
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, kind, params, status, max_attempts, created_at, updated_at, run_after) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(params or {}), max(1, max_attempts), now, now, now),
+            )
+        return self.get(job_id)
+
+    def claim(self, worker, kinds=None):
+        """Atomically move the oldest runnable job to running; None if there is none."""
+        now = time.time()
+        kind_filter, params = "", [now]
+        if kinds is not None:
+            kind_filter = " AND kind IN (%s)" % ",".join("?" * len(kinds))
+            params += list(kinds)
+        row = self._connection().execute(
+            "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?, "
+            "started_at = ?, heartbeat = ?, updated_at = ?, error = NULL "
+            "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' AND run_after <= ?%s "
+            "ORDER BY run_after, created_at LIMIT 1) AND status = 'queued' RETURNING *" % kind_filter,
+            [worker, now, now, now] + params,
+        ).fetchone()
+        return self._record(row)
+
+    def progress(self, job_id, progress, message=None):
+        now = time.time()
+        self._connection().execute(
+            "UPDATE jobs SET progress = ?, message = COALESCE(?, message), heartbeat = ?, updated_at = ? "
+            "WHERE id = ? AND status = 'running'",
+            (min(1.0, max(0.0, float(progress))), message, now, now, job_id),
+        )
+
+    def heartbeat(self, job_ids):
+        if job_ids:
+            now = time.time()
+            self._connection().execute(
+                "UPDATE jobs SET heartbeat = ? WHERE status = 'running' AND id IN (%s)" % ",".join("?" * len(job_ids)),
+                [now] + list(job_ids),
+            )
+
+    def complete(self, job_id, result, worker):
+        """Mark the job succeeded; False if `worker` no longer runs it (re-queued, cancelled or purged)."""
+        now = time.time()
+        cursor = self._connection().execute(
+            "UPDATE jobs SET status = 'succeeded', progress = 1, result = ?, finished_at = ?, updated_at = ? "
+            "WHERE id = ? AND status = 'running' AND worker = ?",
+            (json.dumps(result), now, now, job_id, worker),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id, error, retry=True, worker=None):
+        """Re-queue with backoff while attempts remain, otherwise mark failed.
+
+        Returns the new status, or None if the job no longer exists (purged meanwhile) or,
+        when `worker` is given, is no longer running on that worker.
+        """
+        now = time.time()
+        owner, params = "", [job_id]
+        if worker is not None:
+            owner, params = " AND status = 'running' AND worker = ?", [job_id, worker]
+        with self._transaction() as conn:
+            job = conn.execute(f"SELECT attempts, max_attempts FROM jobs WHERE id = ?{owner}", params).fetchone()
+            if job is None:
+                return None
+            if retry and job["attempts"] < job["max_attempts"]:
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, run_after = ?, worker = NULL, updated_at = ? "
+                    "WHERE id = ?",
+                    (error, now + backoff(job["attempts"]), now, job_id),
+                )
+                return "queued"
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, updated_at = ? WHERE id = ?",
+                (error, now, now, job_id),
+            )
+            return "failed"
+
+    def cancel(self, job_id):
+        """Cancel a job that has not started yet; True if it was cancelled."""
+        now = time.time()
+        cursor = self._connection().execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ?, updated_at = ? WHERE id = ? AND status = 'queued'",
+            (now, now, job_id),
+        )
+        return cursor.rowcount == 1
+
+    def requeue_stale(self, stale_after=JOB_STALE_S):
+        """Running jobs whose worker stopped heartbeating go back to the queue while attempts remain;
+        the rest are marked failed. Returns the number re-queued."""
+        now = time.time()
+        with self._transaction() as conn:
+            requeued = conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL, run_after = ?, updated_at = ?, "
+                "error = 'worker lost' WHERE status = 'running' AND heartbeat < ? AND attempts < max_attempts",
+                (now, now, now - stale_after),
+            ).rowcount
+            # ✅ A job that keeps killing its worker must not be retried forever
+            failed = conn.execute(
+                "UPDATE jobs SET status = 'failed', worker = NULL, finished_at = ?, updated_at = ?, "
+                "error = 'worker lost' WHERE status = 'running' AND heartbeat < ?",
+                (now, now, now - stale_after),
+            ).rowcount
+        if failed:
+            log.warning("Jobs failed after losing their worker", extra={"count": failed})
+        return requeued
+
+    def purge(self, older_than=JOB_RETENTION_S):
+        cursor = self._connection().execute(
+            "DELETE FROM jobs WHERE status IN (?, ?, ?) AND finished_at < ?",
+            (*FINISHED, time.time() - older_than),
+        )
+        return cursor.rowcount
+
+    def get(self, job_id):
+        return self._record(self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def list(self, status=None, kind=None, limit=50):
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if kind:
+            clauses.append("kind = ?")
+            params.append(kind)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connection().execute(
+            f"SELECT * FROM jobs {where} ORDER BY created_at DESC LIMIT ?", params + [limit]
+        ).fetchall()
+        return [self._record(row) for row in rows]
+
+    def counts(self):
+        return dict(self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+class JobWorkerPool:
+    """Async workers claiming jobs from the queue; sync handlers run on a dedicated thread pool."""
+
+    def __init__(self, queue, workers=JOB_WORKERS, poll_s=JOB_POLL_S, handlers=None):
+        self.queue = queue
+        self.workers = workers
+        self.poll_s = poll_s
+        self.handlers = JOB_HANDLERS if handlers is None else handlers
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.executor = None
+        self.running = {}  # job id -> kind
+        self._tasks = []
+        self._wakeup = None
+
+    async def start(self):
+        if self.workers <= 0 or self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        requeued = await asyncio.to_thread(self.queue.requeue_stale)
+        await asyncio.to_thread(self.queue.purge)
+        if requeued:
+            log.warning("Re-queued jobs from a lost worker", extra={"count": requeued})
+        self._tasks = [asyncio.create_task(self._work_loop(n)) for n in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat_loop()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def notify(self):
+        """Wake idle workers right away (jobs enqueued by this process)."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def enqueue(self, kind, params=None, max_attempts=JOB_MAX_ATTEMPTS):
+        if kind not in self.handlers:
+            raise KeyError(kind)
+        job = self.queue.enqueue(kind, params, max_attempts, singleton=self.handlers[kind][1])
+        self.notify()
+        return job
+
+    async def _work_loop(self, n):
+        while True:
+            try:
+                job = await asyncio.to_thread(self.queue.claim, f"{self.worker_id}/{n}", list(self.handlers))
+            except sqlite3.Error as e:
+                log.warning("Job claim failed", extra={"error": str(e)})
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_s)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job):
+        handler, _ = self.handlers[job["kind"]]
+        last_report = [0.0]
+
+        def report(progress, message=None):
+            now = time.monotonic()
+            if now - last_report[0] >= PROGRESS_INTERVAL_S or progress >= 1:
+                last_report[0] = now
+                self.queue.progress(job["id"], progress, message)
+
+        self.running[job["id"]] = job["kind"]
+        started = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(handler):
+                result = await handler(job["params"], report)
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, handler, job["params"], report
+                )
+            if await asyncio.to_thread(self.queue.complete, job["id"], result, job["worker"]):
+                log.info("Job succeeded", extra={"job_id": job["id"], "kind": job["kind"]})
+            else:
+                # ✅ Re-queued as stale (or cancelled/purged) meanwhile; the current owner's outcome stands
+                log.warning("Job finished after losing ownership", extra={"job_id": job["id"], "kind": job["kind"]})
+        except asyncio.CancelledError:
+            raise  # ✅ Shutdown: the heartbeat stops and another worker picks the job up again
+        except Exception as e:
+            status = await asyncio.to_thread(
+                self.queue.fail, job["id"], f"{type(e).__name__}: {e}", not isinstance(e, JobFailed), job["worker"]
+            )
+            log.warning("Job attempt failed", extra={
+                "job_id": job["id"], "kind": job["kind"], "attempt": job["attempts"], "status": status, "error": str(e),
+            })
+        finally:
+            self.running.pop(job["id"], None)
+            observe(f"job_{job['kind']}", time.perf_counter() - started)
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_S)
+            try:
+                await asyncio.to_thread(self.queue.heartbeat, list(self.running))
+                await asyncio.to_thread(self.queue.requeue_stale)
+            except sqlite3.Error as e:
+                log.warning("Job heartbeat failed", extra={"error": str(e)})
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "worker_id": self.worker_id,
+            "running": dict(self.running),
+            "kinds": sorted(self.handlers),
+            "jobs": self.queue.counts(),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Background job queue.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    enqueue_parser = subparsers.add_parser("enqueue")
+    enqueue_parser.add_argument("kind")
+    enqueue_parser.add_argument("--params", default="{}")
+    list_parser = subparsers.add_parser("list")
+    list_parser.add_argument("--status")
+    show_parser = subparsers.add_parser("show")
+    show_parser.add_argument("job_id")
+    args = parser.parse_args()
+
+    queue = JobQueue()
+    if args.command == "enqueue":
+        if args.kind not in JOB_KINDS:
+            parser.error(f"unknown job kind {args.kind!r} (choose from {', '.join(sorted(JOB_KINDS))})")
+        # ✅ Picked up by the running API's workers (same TNA_JOB_DB); enqueueing needs no handlers
+        job = queue.enqueue(args.kind, json.loads(args.params), singleton=JOB_KINDS[args.kind])
+        print(f"✅ Queued {job['kind']} job {job['id']}")
+    elif args.command == "list":
+        for job in queue.list(args.status):
+            print(f"{job['id']}  {job['kind']:<24} {job['status']:<10} {job['progress']:>4.0%}  {job['message'] or ''}")
+    else:
+        print(json.dumps(queue.get(args.job_id), indent=4))
@@ -0,0 +1,60 @@
+import os
+import json
+import time
+import logging
+
+# ✅ TNA_LOG_LEVEL: DEBUG | INFO | WARNING | ERROR; TNA_LOG_FORMAT: text | json (one object per line)
+LOG_LEVEL = os.environ.get("TNA_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("TNA_LOG_FORMAT", "text")
+
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Log record plus any `extra={...}` fields as a single JSON line."""
+
+    def format(self, record):
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        payload.update({key: value for key, value in vars(record).items() if key not in _RESERVED})
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable line with extra fields appended as key=value."""
+
+    def format(self, record):
+        line = "%s %-7s %s: %s" % (
+            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.created)),
+            record.levelname, record.name, record.getMessage(),
+        )
+        extra = " ".join(f"{key}={value}" for key, value in vars(record).items() if key not in _RESERVED)
+        if extra:
+            line = f"{line} {extra}"
+        if record.exc_info:
+            line = f"{line}\n{self.formatException(record.exc_info)}"
+        return line
+
+
+def configure_logging(level=LOG_LEVEL, fmt=LOG_FORMAT):
+    """Attach one handler to the "tna" logger tree (idempotent; uvicorn's own loggers are untouched)."""
+    root = logging.getLogger("tna")
+    root.setLevel(level)
+    root.propagate = False
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+        root.addHandler(handler)
+    return root
+
+
+def get_logger(name):
+    """Module logger under the "tna" tree, e.g. get_logger(__name__)."""
+    configure_logging()
+    return logging.getLogger(f"tna.{name}")
@@ -0,0 +1,205 @@
+"""In-process metrics in the Prometheus text exposition format (no client library needed).
+
+    stage_seconds{stage="encode"}                 - where time goes: model load, encode, similarity, top-k, storage
+    http_request_duration_seconds{route=...}      - request latency per route template
+    collectors                                    - gauges read at scrape time (cache hit ratios, queue depths, memory)
+
+Each worker process keeps its own registry; scrape every worker (or run a single one).
+"""
+import os
+import sys
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+try:
+    import resource
+except ImportError:  # ✅ Optional: not available on Windows, peak memory is then not reported
+    resource = None
+
+METRICS_PREFIX = os.environ.get("TNA_METRICS_PREFIX", "tna")
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join('%s="%s"' % (name, str(value).replace("\\", "\\\\").replace('"', '\\"')) for name, value in zip(names, values))
+    return "{%s}" % pairs
+
+
+def _value(value):
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, key)} {_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram; observe() is a bisect plus two adds under a lock."""
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [0] * (len(self.buckets) + 3)
+            series[slot] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def summary(self, **labels):
+        """{"count", "sum"} for one label set (handy for JSON stats endpoints)."""
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        series = self.series.get(key)
+        return {"count": series[-1], "sum": round(series[-2], 6)} if series else {"count": 0, "sum": 0.0}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.label_names + ("le",)
+        with self._lock:
+            for key, series in sorted(self.series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_labels(names, key + (_value(bound),))} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_value(series[-2])}")
+                lines.append(f"{self.name}_count{_labels(self.label_names, key)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self, prefix=METRICS_PREFIX):
+        self.prefix = prefix
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name, help, labels=()):
+        self.metrics.append(Counter(f"{self.prefix}_{name}", help, labels))
+        return self.metrics[-1]
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.metrics.append(Histogram(f"{self.prefix}_{name}", help, labels, buckets))
+        return self.metrics[-1]
+
+    def collector(self, name, help, function, labels=()):
+        """Gauge computed at scrape time: function() -> number, or {label value(s): number}."""
+        self.collectors.append((f"{self.prefix}_{name}", help, function, tuple(labels)))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for name, help, function, label_names in self.collectors:
+            try:
+                values = function()
+            except Exception:
+                continue  # ✅ A failing collector must not break the whole scrape
+            if values is None:
+                continue
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+            if not isinstance(values, dict):
+                values = {(): values}
+            for key, value in values.items():
+                if value is not None:
+                    key = key if isinstance(key, tuple) else (key,)
+                    lines.append(f"{name}{_labels(label_names, key)} {_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+stage_seconds = registry.histogram("stage_seconds", "Time spent per processing stage.", ["stage"])
+stage_errors = registry.counter("stage_errors_total", "Stage calls that raised.", ["stage"])
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency per route template.", ["method", "route", "status"]
+)
+
+
+def observe(stage, seconds):
+    stage_seconds.observe(seconds, stage=stage)
+
+
+@contextmanager
+def timed(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        stage_errors.inc(stage=stage)
+        raise
+    finally:
+        stage_seconds.observe(time.perf_counter() - started, stage=stage)
+
+
+def timed_function(stage):
+    """Decorator form of timed() for sync functions."""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TimedProxy:
+    """Wrap an object so the listed methods are recorded under a stage ({"get": "storage_read", ...})."""
+
+    def __init__(self, target, stages):
+        self._target = target
+        self._stages = stages
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        stage = self._stages.get(name)
+        return timed_function(stage)(attribute) if stage and callable(attribute) else attribute
+
+
+# ✅ Process memory (current RSS from /proc, peak RSS from getrusage where available)
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes(pid=None):
+    """Resident set size of a process, or None where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm", "r") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+registry.collector("process_resident_memory_bytes", "Resident memory of this worker process.", rss_bytes)
+registry.collector("process_peak_resident_memory_bytes", "Peak resident memory of this worker process.", peak_rss_bytes)
@@ -0,0 +1,125 @@
+"""Lazy SBERT model loading, kept off the import path.
+
+TNA_MODEL_LOAD selects when the model is loaded:
+  background - a startup thread loads and warms it; /ready reports when done (default)
+  lazy       - loaded by the first request that needs it
+  preload    - loaded when this module is imported, i.e. once in the parent process
+               when run as `gunicorn -k uvicorn.workers.UvicornWorker --preload ...`;
+               forked workers share the weights copy-on-write and only run the warmup
+"""
+import os
+import time
+import threading
+from encoder_backends import ENCODER_BACKEND, load_encoder, model_id
+from metrics import observe
+from log_config import get_logger
+
+log = get_logger(__name__)
+
+MODEL_NAME = os.environ.get("TNA_MODEL_NAME", "all-MiniLM-L6-v2")
+MODEL_ID = model_id(MODEL_NAME, ENCODER_BACKEND)  # ✅ Cache/index key (differs per encoder backend)
+MODEL_LOAD = os.environ.get("TNA_MODEL_LOAD", "background")
+WARMUP_BATCH = int(os.environ.get("TNA_WARMUP_BATCH", "8"))
+WARMUP_TEXT = "Improve digital skills and data-driven decision making across the organization"
+
+model = None
+model_error = None
+load_seconds = None
+warmup_seconds = None
+_load_lock = threading.Lock()
+_warmup_lock = threading.Lock()
+_warmed_pid = None
+_ready = threading.Event()
+_loader_thread = None
+
+
+def _load_weights():
+    """Load the configured encoder backend's weights (no inference)."""
+    global model, model_error, load_seconds
+    with _load_lock:
+        if model is None:
+            started = time.perf_counter()
+            try:
+                model = load_encoder(MODEL_NAME, ENCODER_BACKEND)
+            except Exception as e:
+                model_error = str(e)
+                raise
+            load_seconds = round(time.perf_counter() - started, 3)
+            observe("model_load", load_seconds)
+            log.info("Model loaded", extra={"model": MODEL_NAME, "backend": ENCODER_BACKEND, "seconds": load_seconds})
+    return model
+
+
+def warmup():
+    """Run one encode batch so the first real request does not pay for lazy kernel init."""
+    global warmup_seconds, _warmed_pid
+    with _warmup_lock:
+        if _warmed_pid == os.getpid():
+            return
+        loaded = _load_weights()
+        started = time.perf_counter()
+        if WARMUP_BATCH > 0:
+            loaded.encode([WARMUP_TEXT] * WARMUP_BATCH, show_progress_bar=False)
+        warmup_seconds = round(time.perf_counter() - started, 3)
+        observe("model_warmup", warmup_seconds)
+        _warmed_pid = os.getpid()
+
+
+def get_model():
+    """Return the loaded model, loading (and warming) it on first use."""
+    if _warmed_pid != os.getpid():
+        warmup()
+    return model
+
+
+def start_background_load(after=(), load_model=True):
+    """Load + warm the model in a daemon thread, then run the `after` callables.
+
+    Pass load_model=False when inference happens out of process; the `after` steps
+    still run and may load the model themselves if they need it.
+    """
+    global _loader_thread
+
+    def _run():
+        global model_error
+        try:
+            if load_model:
+                get_model()
+            for step in after:
+                step()
+            _ready.set()
+        except Exception as e:
+            model_error = str(e)
+            log.exception("Model warmup failed")
+
+    if _loader_thread is None or not _loader_thread.is_alive():
+        _loader_thread = threading.Thread(target=_run, name="model-loader", daemon=True)
+        _loader_thread.start()
+    return _loader_thread
+
+
+def mark_ready():
+    _ready.set()
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def status():
+    """Readiness details for the /ready probe."""
+    return {
+        "ready": is_ready(),
+        "model_name": MODEL_NAME,
+        "encoder_backend": ENCODER_BACKEND,
+        "load_mode": MODEL_LOAD,
+        "loaded": model is not None,
+        "load_seconds": load_seconds,
+        "warmup_seconds": warmup_seconds,
+        "error": model_error,
+    }
+
+
+# ✅ Preforked parent: load weights before the workers fork (warmup runs per worker)
+if MODEL_LOAD == "preload":
+    _load_weights()
@@ -0,0 +1,176 @@
+import os
+import re
+import csv
+import hashlib
+import threading
+import unicodedata
+from collections import defaultdict
+import numpy as np
+
+# ✅ MSIC 2008 code list shipped at the repository root
+MSIC_CSV = os.environ.get(
+    "TNA_MSIC_CSV",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "msic (1).csv"),
+)
+LEVELS = ("section", "division", "group", "class", "item")
+
+
+def _clean(text):
+    """Strip Excel carriage-return artefacts and surrounding whitespace."""
+    return (text or "").replace("_x000D_", " ").strip()
+
+
+def _fold(text):
+    """Lowercase and drop accents/punctuation for matching."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r"[^a-z0-9]+", " ", text).strip()
+
+
+def trigrams(text):
+    """Padded word trigrams, e.g. 'rice' -> {'  r', ' ri', 'ric', 'ice', 'ce '}."""
+    grams = set()
+    for word in _fold(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class MsicIndex:
+    """Columnar MSIC hierarchy with a code prefix trie and a trigram index over EN/BM text."""
+
+    def __init__(self, path=MSIC_CSV):
+        with open(path, "rb") as f:
+            raw = f.read()
+        self.version = hashlib.sha256(raw).hexdigest()[:16]
+
+        # ✅ One list per column; row i describes code self.codes[i]
+        self.codes, self.levels, self.sections, self.parents = [], [], [], []
+        self.desc_en, self.desc_bm, self.include_en, self.exclude_en = [], [], [], []
+        for row in csv.DictReader(raw.decode("utf-8-sig").splitlines()):
+            path_codes = [row[level] for level in LEVELS if row[level] not in ("", "-")]
+            if not path_codes:
+                continue
+            self.codes.append(path_codes[-1])
+            self.levels.append(LEVELS[len(path_codes) - 1])
+            self.sections.append(path_codes[0])
+            self.parents.append(path_codes[-2] if len(path_codes) > 1 else None)
+            self.desc_en.append(_clean(row["desc_en"]))
+            self.desc_bm.append(_clean(row["desc_bm"]))
+            self.include_en.append(_clean(row["include_en"]))
+            self.exclude_en.append(_clean(row["exclude_en"]))
+
+        self.position = {code: i for i, code in enumerate(self.codes)}
+        self.children = defaultdict(list)
+        for i, parent in enumerate(self.parents):
+            self.children[parent].append(i)
+
+        self._build_trie()
+        self._build_trigram_index()
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _build_trie(self):
+        """Character trie over codes; every node keeps the sorted row ids beneath it."""
+        self.trie = {"rows": []}
+        for i in sorted(range(len(self.codes)), key=lambda i: (len(self.codes[i]), self.codes[i])):
+            node = self.trie
+            node["rows"].append(i)
+            for ch in self.codes[i].upper():
+                node = node.setdefault(ch, {"rows": []})
+                node["rows"].append(i)
+
+    def _build_trigram_index(self):
+        """Inverted index trigram -> int32 row ids, with IDF weights for ranking."""
+        postings = defaultdict(list)
+        for i in range(len(self.codes)):
+            for gram in trigrams(f"{self.desc_en[i]} {self.desc_bm[i]}"):
+                postings[gram].append(i)
+
+        n = len(self.codes)
+        self.postings = {gram: np.asarray(rows, dtype=np.int32) for gram, rows in postings.items()}
+        self.gram_weights = {gram: float(np.log(1 + n / len(rows))) for gram, rows in postings.items()}
+        self.row_weights = np.zeros(n, dtype=np.float32)
+        for gram, rows in self.postings.items():
+            self.row_weights[rows] += self.gram_weights[gram]
+
+    def record(self, i, score=None):
+        entry = {
+            "code": self.codes[i],
+            "level": self.levels[i],
+            "section": self.sections[i],
+            "parent": self.parents[i],
+            "desc_en": self.desc_en[i],
+            "desc_bm": self.desc_bm[i],
+        }
+        if score is not None:
+            entry["score"] = round(score, 4)
+        return entry
+
+    def get(self, code):
+        i = self.position.get(code.upper() if len(code) == 1 else code)
+        return None if i is None else self.record(i)
+
+    def prefix(self, prefix, limit=20):
+        """Codes starting with `prefix`, shortest (highest level) first."""
+        node = self.trie
+        for ch in prefix.upper():
+            node = node.get(ch)
+            if node is None:
+                return []
+        return [self.record(i) for i in node["rows"][:limit]]
+
+    def fuzzy(self, query, limit=20):
+        """Rank descriptions by IDF-weighted trigram overlap with the query (typo tolerant, EN + BM)."""
+        grams = [gram for gram in trigrams(query) if gram in self.postings]
+        if not grams:
+            return []
+        rows = np.concatenate([self.postings[gram] for gram in grams])
+        weights = np.concatenate([
+            np.full(self.postings[gram].shape[0], self.gram_weights[gram], dtype=np.float32) for gram in grams
+        ])
+        shared = np.bincount(rows, weights=weights, minlength=len(self.codes))
+        query_weight = sum(self.gram_weights[gram] for gram in grams)
+
+        # ✅ Weighted Dice coefficient, partial top-k; ties go to broader (shorter) codes
+        scores = 2.0 * shared / (query_weight + self.row_weights)
+        candidates = np.flatnonzero(shared)
+        if candidates.size > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        ranked = sorted(candidates.tolist(), key=lambda i: (-scores[i], len(self.codes[i]), self.codes[i]))
+        return [self.record(i, float(scores[i])) for i in ranked]
+
+    def search(self, query, limit=20):
+        """Code prefix search for code-like queries, trigram search otherwise."""
+        query = query.strip()
+        if re.fullmatch(r"[A-Za-z]", query):
+            section = self.get(query)
+            return [] if section is None else ([section] + self.children_of(query))[:limit]
+        match = re.fullmatch(r"[A-Za-z]?(\d+)", query)
+        if match:
+            return self.prefix(match.group(1), limit)
+        return self.fuzzy(query, limit)
+
+    def children_of(self, code=None):
+        """Direct children of a code (sections when code is None)."""
+        if code is None:
+            return [self.record(i) for i in self.children[None]]
+        i = self.position.get(code.upper() if len(code) == 1 else code)
+        if i is None:
+            return None
+        return [self.record(child) for child in self.children[self.codes[i]]]
+
+
+msic_index = None
+_lock = threading.Lock()
+
+
+def get_msic_index():
+    """Parse the CSV once per process."""
+    global msic_index
+    if msic_index is None:
+        with _lock:
+            if msic_index is None:
+                msic_index = MsicIndex()
+    return msic_index
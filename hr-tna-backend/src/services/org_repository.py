@@ -0,0 +1,489 @@
+import os
+import json
+import time
+import random
+import string
+import sqlite3
+import hashlib
+import argparse
+import threading
+from abc import ABC, abstractmethod
+from metrics import TimedProxy
+from log_config import get_logger
+
+# ✅ Storage location and backend ("sqlite" or the legacy single-file "json")
+DATA_DIR = os.environ.get(
+    "TNA_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+)
+ORG_DB = os.environ.get("TNA_ORG_DB", os.path.join(DATA_DIR, "organizations.sqlite3"))
+ORG_STORE = os.environ.get("TNA_ORG_STORE", "sqlite")
+
+log = get_logger(__name__)
+
+# ✅ Repository calls recorded as storage_read / storage_write stages (see metrics.py)
+STORAGE_STAGES = {
+    **dict.fromkeys(
+        ["get", "first", "find_by_registration", "find_by_industry", "registration_ids", "count", "version",
+         "get_recommendations", "stale_recommendations"],
+        "storage_read",
+    ),
+    **dict.fromkeys(["upsert", "upsert_many", "put_recommendations"], "storage_write"),
+}
+
+# ✅ Field names sent by the React form -> API field names
+FIELD_ALIASES = {
+    "companyName": "name",
+    "registrationNo": "companyRegistrationNumber",
+    "clientCharter": "client_charter",
+}
+
+
+class DuplicateRegistration(ValueError):
+    """Another organization already holds this companyRegistrationNumber."""
+
+    def __init__(self, registration_number=None):
+        super().__init__(
+            f"Registration number {registration_number!r} already belongs to another organization"
+            if registration_number is not None else
+            "A registration number in this batch already belongs to another organization"
+        )
+        self.registration_number = registration_number
+
+
+def generate_short_id():
+    """Generate a random 11-character alphanumeric ID."""
+    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=11))
+
+
+def normalize_record(data):
+    """Map form field aliases onto the API field names (unknown fields are kept)."""
+    record = dict(data)
+    for alias, field in FIELD_ALIASES.items():
+        if alias in record:
+            value = record.pop(alias)
+            record.setdefault(field, value)
+
+    # ✅ The form sends objectives as [{"value": "..."}]
+    objectives = record.get("objectives")
+    if isinstance(objectives, list):
+        record["objectives"] = [
+            objective.get("value", "") if isinstance(objective, dict) else objective
+            for objective in objectives
+        ]
+        record["objectives"] = [objective for objective in record["objectives"] if objective]
+    return record
+
+
+class OrganizationRepository(ABC):
+    """Storage interface for organization records (plain dicts keyed by organizationID)."""
+
+    @abstractmethod
+    def get(self, org_id):
+        ...
+
+    @abstractmethod
+    def first(self):
+        """The earliest stored organization, or None."""
+
+    @abstractmethod
+    def find_by_registration(self, registration_number):
+        ...
+
+    @abstractmethod
+    def find_by_industry(self, industry):
+        ...
+
+    @abstractmethod
+    def registration_ids(self, registration_numbers):
+        """{companyRegistrationNumber: organizationID} for the numbers already stored."""
+
+    @abstractmethod
+    def upsert_many(self, records):
+        """Insert or replace records in one transaction; assigns IDs where missing.
+
+        Raises DuplicateRegistration (and stores nothing) if a record would share its
+        companyRegistrationNumber with another organization.
+        """
+
+    @abstractmethod
+    def count(self):
+        ...
+
+    @abstractmethod
+    def iter_all(self):
+        ...
+
+    def upsert(self, record):
+        return self.upsert_many([record])[0]
+
+    @abstractmethod
+    def get_recommendations(self, org_id):
+        """Materialized recommendations stored for one organization, or None."""
+
+    @abstractmethod
+    def put_recommendations(self, org_id, entry):
+        ...
+
+    @abstractmethod
+    def stale_recommendations(self, model_id, catalogue_version):
+        """IDs of organizations with no recommendations for this model + catalogue version."""
+
+    @abstractmethod
+    def version(self):
+        """Cheap token that changes whenever organization records change (from any process)."""
+
+
+class JsonOrganizationRepository(OrganizationRepository):
+    """Legacy store: one JSON list in a single file (full rewrite on every write)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.recommendations_path = f"{os.path.splitext(path)[0]}.recommendations.json"
+        self._lock = threading.Lock()
+
+    def _read(self, path=None):
+        path = path or self.path
+        if not os.path.exists(path):
+            return []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except json.JSONDecodeError:
+            return []
+        if isinstance(data, dict):
+            return [data]
+        return data if isinstance(data, list) else []
+
+    def _write(self, records, path=None):
+        """Atomic replace: write a temp file, fsync it, rename over the target, fsync the directory."""
+        path = path or self.path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        if hasattr(os, "O_DIRECTORY"):  # ✅ POSIX: make the rename itself durable
+            fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _read_recommendations(self):
+        """Sidecar file: {organizationID: entry}."""
+        entries = self._read(self.recommendations_path)
+        return entries[0] if entries else {}
+
+    def get(self, org_id):
+        return next((r for r in self._read() if r.get("organizationID") == org_id), None)
+
+    def first(self):
+        records = self._read()
+        return records[0] if records else None
+
+    def find_by_registration(self, registration_number):
+        return [r for r in self._read() if r.get("companyRegistrationNumber") == registration_number]
+
+    def find_by_industry(self, industry):
+        return [r for r in self._read() if r.get("industry") == industry]
+
+    def registration_ids(self, registration_numbers):
+        wanted = set(registration_numbers)
+        return {
+            r["companyRegistrationNumber"]: r.get("organizationID")
+            for r in self._read() if r.get("companyRegistrationNumber") in wanted
+        }
+
+    def upsert_many(self, records):
+        with self._lock:
+            existing = self._read()
+            positions = {r.get("organizationID"): i for i, r in enumerate(existing)}
+            owners = {r.get("companyRegistrationNumber"): r.get("organizationID") for r in reversed(existing)}
+            stored = []
+            for record in records:
+                record = dict(record)
+                record.setdefault("organizationID", generate_short_id())
+                number = record.get("companyRegistrationNumber")
+                if number is not None:
+                    if owners.setdefault(number, record["organizationID"]) != record["organizationID"]:
+                        raise DuplicateRegistration(number)
+                if record["organizationID"] in positions:
+                    existing[positions[record["organizationID"]]] = record
+                else:
+                    positions[record["organizationID"]] = len(existing)
+                    existing.append(record)
+                stored.append(record)
+            self._write(existing)
+        return stored
+
+    def count(self):
+        return len(self._read())
+
+    def iter_all(self):
+        return iter(self._read())
+
+    def get_recommendations(self, org_id):
+        return self._read_recommendations().get(org_id)
+
+    def put_recommendations(self, org_id, entry):
+        with self._lock:
+            entries = self._read_recommendations()
+            entries[org_id] = entry
+            self._write(entries, self.recommendations_path)
+
+    def version(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return "missing"
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def stale_recommendations(self, model_id, catalogue_version):
+        entries = self._read_recommendations()
+        stale = []
+        for record in self._read():
+            entry = entries.get(record.get("organizationID")) or {}
+            if entry.get("model_id") != model_id or entry.get("catalogue_version") != catalogue_version:
+                stale.append(record.get("organizationID"))
+        return stale
+
+
+class SqliteOrganizationRepository(OrganizationRepository):
+    """SQLite (WAL) store with indexed lookup columns; safe for multiple uvicorn workers."""
+
+    def __init__(self, path=ORG_DB):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS organizations ("
+                    "organizationID TEXT PRIMARY KEY, "
+                    "companyRegistrationNumber TEXT, "
+                    "industry TEXT, "
+                    "name TEXT, "
+                    "data TEXT NOT NULL, "
+                    "created_at REAL NOT NULL, "
+                    "updated_at REAL NOT NULL)"
+                )
+                self._unique_registrations(conn)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_org_industry ON organizations (industry)")
+                # ✅ Single-row revision counter, bumped in the same transaction as every write
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS store_meta ("
+                    "id INTEGER PRIMARY KEY CHECK (id = 0), "
+                    "revision INTEGER NOT NULL)"
+                )
+                conn.execute("INSERT OR IGNORE INTO store_meta VALUES (0, 0)")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS recommendations ("
+                    "organizationID TEXT PRIMARY KEY, "
+                    "fingerprint TEXT NOT NULL, "
+                    "model_id TEXT NOT NULL, "
+                    "catalogue_version TEXT NOT NULL, "
+                    "data TEXT NOT NULL, "
+                    "updated_at REAL NOT NULL)"
+                )
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _unique_registrations(conn):
+        """Make idx_org_registration UNIQUE. Stores created before it was may hold duplicates;
+        the earliest row per registration number (the one registration_ids reports) is kept."""
+        indexes = {row[1]: row[2] for row in conn.execute("PRAGMA index_list(organizations)")}
+        if indexes.get("idx_org_registration") == 1:
+            return
+        duplicates = [row[0] for row in conn.execute(
+            "SELECT organizationID FROM organizations WHERE companyRegistrationNumber IS NOT NULL "
+            "AND rowid NOT IN (SELECT MIN(rowid) FROM organizations GROUP BY companyRegistrationNumber)"
+        )]
+        if duplicates:
+            conn.executemany("DELETE FROM organizations WHERE organizationID = ?", [(org_id,) for org_id in duplicates])
+            conn.execute("UPDATE store_meta SET revision = revision + 1 WHERE id = 0")
+            log.warning("Removed organizations with a duplicate registration number",
+                        extra={"count": len(duplicates), "organization_ids": duplicates})
+        conn.execute("DROP INDEX IF EXISTS idx_org_registration")
+        conn.execute("CREATE UNIQUE INDEX idx_org_registration ON organizations (companyRegistrationNumber)")
+
+    def _rows(self, sql, params=()):
+        return [json.loads(row[0]) for row in self._connection().execute(sql, params)]
+
+    def get(self, org_id):
+        rows = self._rows("SELECT data FROM organizations WHERE organizationID = ?", (org_id,))
+        return rows[0] if rows else None
+
+    def first(self):
+        rows = self._rows("SELECT data FROM organizations ORDER BY rowid LIMIT 1")
+        return rows[0] if rows else None
+
+    def find_by_registration(self, registration_number):
+        return self._rows(
+            "SELECT data FROM organizations WHERE companyRegistrationNumber = ? ORDER BY rowid",
+            (registration_number,),
+        )
+
+    def find_by_industry(self, industry):
+        return self._rows("SELECT data FROM organizations WHERE industry = ? ORDER BY rowid", (industry,))
+
+    def registration_ids(self, registration_numbers):
+        numbers = list(set(registration_numbers))
+        found = {}
+        # ✅ Chunked to stay under SQLite's bound-parameter limit
+        for start in range(0, len(numbers), 500):
+            chunk = numbers[start:start + 500]
+            found.update(self._connection().execute(
+                "SELECT companyRegistrationNumber, organizationID FROM organizations "
+                f"WHERE companyRegistrationNumber IN ({', '.join('?' * len(chunk))}) ORDER BY rowid DESC",
+                chunk,
+            ).fetchall())
+        return found
+
+    def upsert_many(self, records):
+        now = time.time()
+        stored = []
+        rows = []
+        for record in records:
+            record = dict(record)
+            record.setdefault("organizationID", generate_short_id())
+            stored.append(record)
+            rows.append((
+                record["organizationID"],
+                record.get("companyRegistrationNumber"),
+                record.get("industry"),
+                record.get("name"),
+                json.dumps(record),
+                now,
+                now,
+            ))
+        conn = self._connection()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO organizations "
+                    "(organizationID, companyRegistrationNumber, industry, name, data, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(organizationID) DO UPDATE SET "
+                    "companyRegistrationNumber = excluded.companyRegistrationNumber, "
+                    "industry = excluded.industry, "
+                    "name = excluded.name, "
+                    "data = excluded.data, "
+                    "updated_at = excluded.updated_at",
+                    rows,
+                )
+                conn.execute("UPDATE store_meta SET revision = revision + 1 WHERE id = 0")
+        except sqlite3.IntegrityError as e:
+            if "companyRegistrationNumber" not in str(e):
+                raise
+            # ✅ The batch is rolled back; name the number only when the batch holds a single record
+            raise DuplicateRegistration(stored[0].get("companyRegistrationNumber") if len(stored) == 1 else None) from e
+        return stored
+
+    def count(self):
+        return self._connection().execute("SELECT COUNT(*) FROM organizations").fetchone()[0]
+
+    def version(self):
+        return self._connection().execute("SELECT revision FROM store_meta WHERE id = 0").fetchone()[0]
+
+    def iter_all(self, batch_size=500):
+        """Yield records in insertion order without loading the whole table."""
+        last_rowid = 0
+        while True:
+            rows = self._connection().execute(
+                "SELECT rowid, data FROM organizations WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (last_rowid, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            for rowid, data in rows:
+                yield json.loads(data)
+            last_rowid = rows[-1][0]
+
+    def get_recommendations(self, org_id):
+        rows = self._rows("SELECT data FROM recommendations WHERE organizationID = ?", (org_id,))
+        return rows[0] if rows else None
+
+    def put_recommendations(self, org_id, entry):
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO recommendations VALUES (?, ?, ?, ?, ?, ?)",
+                (org_id, entry["fingerprint"], entry["model_id"], entry["catalogue_version"],
+                 json.dumps(entry), time.time()),
+            )
+
+    def stale_recommendations(self, model_id, catalogue_version):
+        return [row[0] for row in self._connection().execute(
+            "SELECT o.organizationID FROM organizations o "
+            "LEFT JOIN recommendations r ON r.organizationID = o.organizationID "
+            "WHERE r.organizationID IS NULL OR r.model_id != ? OR r.catalogue_version != ? "
+            "ORDER BY o.rowid",
+            (model_id, catalogue_version),
+        )]
+
+
+def create_repository(kind=ORG_STORE, json_path=None):
+    """Build the configured organization repository (timed per call)."""
+    if kind == "sqlite":
+        repository = SqliteOrganizationRepository(ORG_DB)
+    elif kind == "json":
+        repository = JsonOrganizationRepository(json_path or os.path.join(DATA_DIR, "organizations.json"))
+    else:
+        raise ValueError(f"Unknown organization store: {kind}")
+    return TimedProxy(repository, STORAGE_STAGES)
+
+
+def migrate_json(json_path, repository):
+    """Import a legacy organizations.json (dict or list) into the repository.
+
+    Records without an organizationID get one derived from their position and content,
+    so running the migration twice does not duplicate data.
+    """
+    source = JsonOrganizationRepository(json_path)
+    records = []
+    for position, data in enumerate(source.iter_all()):
+        if not isinstance(data, dict):
+            continue
+        record = normalize_record(data)
+        if not record.get("organizationID"):
+            fingerprint = json.dumps([position, record], sort_keys=True).encode("utf-8")
+            record["organizationID"] = "M" + hashlib.sha256(fingerprint).hexdigest()[:10].upper()
+        records.append(record)
+
+    # ✅ One organization per registration number: the first record (or the stored owner) wins
+    owners = repository.registration_ids(
+        [record["companyRegistrationNumber"] for record in records if record.get("companyRegistrationNumber")]
+    )
+    unique = []
+    for record in records:
+        number = record.get("companyRegistrationNumber")
+        if number is None or owners.setdefault(number, record["organizationID"]) == record["organizationID"]:
+            unique.append(record)
+    if len(unique) < len(records):
+        log.warning("Skipped legacy organizations with a duplicate registration number",
+                    extra={"count": len(records) - len(unique)})
+    records = unique
+    if records:
+        repository.upsert_many(records)
+    return len(records)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Organization storage utilities.")
+    parser.add_argument("command", choices=["migrate"])
+    parser.add_argument("json_path", help="Path to the legacy organizations.json")
+    args = parser.parse_args()
+
+    imported = migrate_json(args.json_path, create_repository())
+    print(f"✅ Imported {imported} organizations from {args.json_path}")
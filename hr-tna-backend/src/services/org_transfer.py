@@ -0,0 +1,189 @@
+"""Streaming bulk import/export of organizations as NDJSON or CSV.
+
+Uploads are parsed line by line as the request body arrives, so memory stays
+bounded by one batch (TNA_IMPORT_BATCH_SIZE rows) however large the file is.
+Exports walk the repository with iter_all() and emit one batch of lines at a time.
+
+CSV layout: one header row naming the columns (API names or the form aliases such
+as companyName / registrationNo). Objectives go in a single cell, one per line;
+a cell holding a JSON array is accepted too. Empty cells are treated as missing.
+"""
+import io
+import os
+import csv
+import json
+import codecs
+
+IMPORT_BATCH_SIZE = int(os.environ.get("TNA_IMPORT_BATCH_SIZE", "500"))
+IMPORT_MAX_ERRORS = int(os.environ.get("TNA_IMPORT_MAX_ERRORS", "1000"))
+EXPORT_BATCH_SIZE = int(os.environ.get("TNA_EXPORT_BATCH_SIZE", "500"))
+
+# ✅ Columns of the CSV export (NDJSON exports carry the full stored record)
+EXPORT_FIELDS = [
+    "organizationID", "name", "companyRegistrationNumber", "industry", "customIndustry",
+    "vision", "mission", "objectives", "client_charter",
+]
+
+FORMATS = ("ndjson", "csv")
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json-lines": "ndjson",
+}
+
+
+def detect_format(content_type, default="ndjson"):
+    """Import format from the request Content-Type (parameters such as charset are ignored)."""
+    return CONTENT_TYPES.get((content_type or "").split(";")[0].strip().lower(), default)
+
+
+async def iter_lines(chunks):
+    """Decode an async stream of byte chunks into text lines (line endings stripped)."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_ndjson_rows(lines):
+    """(line number, record or error message) for every non-blank NDJSON line."""
+    number = 0
+    async for line in lines:
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield number, f"Invalid JSON: {e.msg} (column {e.colno})"
+            continue
+        if not isinstance(record, dict):
+            yield number, "Each line must be a JSON object"
+            continue
+        yield number, record
+
+
+def csv_record(header, values):
+    """Map one CSV row onto a record; empty cells are dropped, objectives split per line."""
+    record = {}
+    for column, value in zip(header, values):
+        value = value.strip()
+        if not column or not value:
+            continue
+        if column == "objectives":
+            if value.startswith("["):
+                try:
+                    value = json.loads(value)
+                except json.JSONDecodeError:
+                    value = [value]
+            else:
+                value = [line.strip() for line in value.splitlines() if line.strip()]
+        record[column] = value
+    return record
+
+
+async def iter_csv_rows(lines):
+    """(line number, record or error message) per CSV row; quoted cells may span lines."""
+    header = None
+    number = 0
+    start = 0
+    pending = []
+    async for line in lines:
+        number += 1
+        if not pending:
+            start = number
+        pending.append(line)
+        text = "\n".join(pending)
+        # ✅ Escaped quotes come in pairs, so an odd count means a quoted cell is still open
+        if text.count('"') % 2:
+            continue
+        pending = []
+        if not text.strip():
+            continue
+        try:
+            values = next(csv.reader([text]))
+        except csv.Error as e:
+            yield start, f"Invalid CSV: {e}"
+            continue
+        if header is None:
+            header = [column.strip() for column in values]
+            continue
+        if len(values) > len(header):
+            yield start, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield start, csv_record(header, values)
+    if pending:
+        yield start, "Invalid CSV: unterminated quoted field"
+
+
+def iter_rows(lines, format):
+    return iter_csv_rows(lines) if format == "csv" else iter_ndjson_rows(lines)
+
+
+class ImportReport:
+    """Counts plus the per-row errors (the first IMPORT_MAX_ERRORS recorded, reported in row order)."""
+
+    def __init__(self, max_errors=IMPORT_MAX_ERRORS):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, row, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "imported": self.created + self.updated,
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def export_ndjson(records, batch_size=EXPORT_BATCH_SIZE):
+    """NDJSON lines, batch_size records per yielded chunk."""
+    batch = []
+    for record in records:
+        batch.append(json.dumps(record, ensure_ascii=False))
+        if len(batch) >= batch_size:
+            yield "\n".join(batch) + "\n"
+            batch = []
+    if batch:
+        yield "\n".join(batch) + "\n"
+
+
+def export_csv(records, batch_size=EXPORT_BATCH_SIZE):
+    """CSV with an EXPORT_FIELDS header, batch_size records per yielded chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    rows = 0
+    for record in records:
+        writer.writerow([
+            "\n".join(record.get(field) or []) if field == "objectives" else record.get(field) or ""
+            for field in EXPORT_FIELDS
+        ])
+        rows += 1
+        if rows % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.getvalue():
+        yield buffer.getvalue()
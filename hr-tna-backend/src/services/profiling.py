@@ -0,0 +1,157 @@
+"""Opt-in wall-clock stack sampling for slow requests.
+
+TNA_PROFILE=1 turns it on (off by default: the middleware is not even installed).
+A request is recorded when it is randomly sampled (TNA_PROFILE_SAMPLE_RATE). Slow-request
+capture is opt-in (TNA_PROFILE_SLOW_MS > 0): it keeps requests slower than the threshold, but
+has to sample every matching request while it runs, so leave it off outside investigations.
+
+A sampler thread snapshots every thread's stack (event loop, threadpool, the
+embedding worker thread) every TNA_PROFILE_INTERVAL_MS while any profiled request
+is in flight. Profiles are written as folded stacks ("frame;frame;frame count",
+readable by flamegraph.pl, inferno and speedscope) with a JSON metadata sidecar.
+Samples of concurrent requests overlap, so attribution is per time window.
+"""
+import os
+import sys
+import json
+import time
+import random
+import threading
+from collections import Counter
+from wef_ingest import DATA_DIR
+from log_config import get_logger
+
+log = get_logger(__name__)
+
+PROFILE_ENABLED = os.environ.get("TNA_PROFILE", "0").lower() in ("1", "true", "yes", "on")
+PROFILE_SAMPLE_RATE = float(os.environ.get("TNA_PROFILE_SAMPLE_RATE", "0.01"))
+PROFILE_SLOW_MS = float(os.environ.get("TNA_PROFILE_SLOW_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.environ.get("TNA_PROFILE_INTERVAL_MS", "5"))
+PROFILE_PATHS = [
+    path.strip() for path in os.environ.get("TNA_PROFILE_PATHS", "/generate_training_recommendations").split(",")
+    if path.strip()
+]
+PROFILE_DIR = os.environ.get("TNA_PROFILE_DIR", os.path.join(DATA_DIR, "profiles"))
+PROFILE_KEEP = int(os.environ.get("TNA_PROFILE_KEEP", "50"))
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def fold_stack(frame, thread_name):
+    """Root-first "thread;frame;frame" string for one thread's current stack."""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.append(f"thread:{thread_name}")
+    return ";".join(reversed(names)).replace(" ", "_")
+
+
+class StackSampler:
+    """One background thread feeding stack samples to every open session."""
+
+    def __init__(self, interval_ms=PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self.sessions = {}  # id -> Counter of folded stacks
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start_session(self):
+        session = Counter()
+        with self._lock:
+            self.sessions[id(session)] = session
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return session
+
+    def stop_session(self, session):
+        with self._lock:
+            self.sessions.pop(id(session), None)
+        return session
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            with self._lock:
+                active = list(self.sessions.values())
+            if not active:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = [
+                fold_stack(frame, names.get(ident, ident))
+                for ident, frame in sys._current_frames().items() if ident != own
+            ]
+            for session in active:
+                session.update(stacks)
+            time.sleep(self.interval)
+
+
+def should_profile(path):
+    return any(path.startswith(prefix) for prefix in PROFILE_PATHS)
+
+
+def sampled():
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def save_profile(samples, meta, root=PROFILE_DIR, keep=PROFILE_KEEP):
+    """Write <id>.folded + <id>.json and drop the oldest profiles beyond `keep`."""
+    os.makedirs(root, exist_ok=True)
+    profile_id = "%d-%04d" % (time.time() * 1000, random.randrange(10000))
+    meta = dict(meta, id=profile_id, samples=sum(samples.values()), interval_ms=PROFILE_INTERVAL_MS)
+    with open(os.path.join(root, f"{profile_id}.folded"), "w", encoding="utf-8") as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+    with open(os.path.join(root, f"{profile_id}.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=4)
+
+    for old in list_profiles(root)[keep:]:
+        for suffix in (".folded", ".json"):
+            try:
+                os.remove(os.path.join(root, old["id"] + suffix))
+            except OSError:
+                pass
+    return meta
+
+
+def log_save_failure(future):
+    """Done-callback for a save_profile() run in an executor, so write errors are not lost."""
+    if not future.cancelled() and future.exception() is not None:
+        error = future.exception()
+        log.error("Saving profile failed", exc_info=(type(error), error, error.__traceback__))
+
+
+def list_profiles(root=PROFILE_DIR, limit=None):
+    """Profile metadata, newest first."""
+    if not os.path.isdir(root):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(root), reverse=True):
+        if name.endswith(".json"):
+            try:
+                with open(os.path.join(root, name), "r", encoding="utf-8") as f:
+                    profiles.append(json.load(f))
+            except (OSError, json.JSONDecodeError):
+                continue
+            if limit is not None and len(profiles) >= limit:
+                break
+    return profiles
+
+
+def read_profile(profile_id, root=PROFILE_DIR):
+    """Folded stacks of one profile, or None if it does not exist."""
+    if not profile_id.replace("-", "").isdigit():
+        return None
+    path = os.path.join(root, f"{profile_id}.folded")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
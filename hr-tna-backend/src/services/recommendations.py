@@ -0,0 +1,223 @@
+import json
+import time
+import asyncio
+import hashlib
+import weakref
+import numpy as np
+from vector_search import top_k
+from skill_scoring import POOLING, SOURCE_WEIGHTS, TOP_N, query_texts, rank_skills
+from log_config import get_logger
+
+log = get_logger(__name__)
+
+TOP_K = 5  # ✅ Skills kept per objective
+
+
+def _sha256(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def fingerprint(org, model_id, catalogue_version, pooling=POOLING):
+    """Everything a stored recommendation depends on."""
+    return _sha256({
+        "objectives": org.get("objectives") or [],
+        "vision": org.get("vision"),
+        "mission": org.get("mission"),
+        "client_charter": org.get("client_charter"),
+        "model_id": model_id,
+        "catalogue_version": catalogue_version,
+        "pooling": pooling,
+        "weights": SOURCE_WEIGHTS,
+    })
+
+
+class CatalogueDelta:
+    """Skills removed from / added to the catalogue between two skill indexes."""
+
+    def __init__(self, old_index, new_index):
+        new_names = list(new_index.skills)
+        old_names = set(old_index.skills)
+        self.old_version = old_index.catalogue_hash
+        self.removed = old_names - set(new_names)
+        self.added_rows = np.asarray([i for i, name in enumerate(new_names) if name not in old_names], dtype=np.int64)
+
+
+class RecommendationEngine:
+    """Per-organization recommendations materialized in the repository and keyed by a fingerprint."""
+
+    def __init__(self, repository, encode, load_index, load_search_index, model_id, pooling=POOLING):
+        self.repository = repository
+        self.encode = encode  # async texts -> normalized float32 rows
+        self.load_index = load_index
+        self.load_search_index = load_search_index
+        self.model_id = model_id
+        self.pooling = pooling
+        self.hits = 0
+        self.misses = 0
+        self.recomputed_objectives = 0
+        self.reused_objectives = 0
+        self.jobs = set()
+        self._locks = weakref.WeakValueDictionary()  # organizationID -> asyncio.Lock while in use
+
+    def _lock(self, org_id):
+        """Per-organization lock: refreshes of one organization run one at a time, in call order."""
+        lock = self._locks.get(org_id)
+        if lock is None:
+            lock = self._locks[org_id] = asyncio.Lock()
+        return lock
+
+    async def _indexes(self):
+        index = await asyncio.to_thread(self.load_index)
+        return index, await asyncio.to_thread(self.load_search_index)
+
+    async def _score(self, index, search_index, objectives):
+        """Full top-k search for the given objectives (the search runs on a thread, off the event loop)."""
+        scores, ids = await asyncio.to_thread(search_index.search, await self.encode(objectives), TOP_K)
+        return {
+            objective: [[index.skills[int(i)], round(float(score), 6)] for score, i in zip(row_scores, row_ids) if i >= 0]
+            for objective, row_scores, row_ids in zip(objectives, scores, ids)
+        }
+
+    @staticmethod
+    def _score_added(vectors, index, added_rows):
+        return top_k(vectors @ np.asarray(index.embeddings[added_rows]).T, TOP_K)
+
+    async def rank(self, org, pooling=None, k=TOP_N):
+        """Skills ranked by weighted relevance to all organization fields, in one vectorized pass."""
+        texts, weights = query_texts(org)
+        if not texts:
+            return []
+        index, search_index = await self._indexes()
+        return await asyncio.to_thread(
+            rank_skills, await self.encode(texts), weights, index, search_index, k, pooling or self.pooling
+        )
+
+    async def refresh(self, org, delta=None):
+        """Rebuild one organization's entry, recomputing only objectives that are new or invalidated.
+
+        Serialized per organizationID, so the stored entry always comes from the latest call.
+        """
+        org_id = org.get("organizationID")
+        if not org_id:
+            return await self._refresh(org, None, delta)
+        async with self._lock(org_id):
+            previous = await asyncio.to_thread(self.repository.get_recommendations, org_id)
+            return await self._refresh(org, previous, delta)
+
+    async def _refresh(self, org, previous, delta):
+        index, search_index = await self._indexes()
+        version = index.catalogue_hash
+        objectives = list(dict.fromkeys(org.get("objectives") or []))
+        org_id = org.get("organizationID")
+
+        # ✅ Per-objective top-k only depends on the objective text, model and catalogue; vision,
+        # mission and charter edits just change the pooled ranking, which is recomputed below
+        results = {}
+        if previous and previous.get("model_id") == self.model_id:
+            stored = previous.get("objectives", {})
+            if previous.get("catalogue_version") == version:
+                results = {objective: stored[objective] for objective in objectives if objective in stored}
+            elif delta is not None and previous.get("catalogue_version") == delta.old_version:
+                # ✅ Catalogue refresh: lists without removed skills only need scoring against added skills
+                kept = [
+                    objective for objective in objectives
+                    if objective in stored and not any(skill in delta.removed for skill, _ in stored[objective])
+                ]
+                if kept and delta.added_rows.size:
+                    scores, ids = await asyncio.to_thread(
+                        self._score_added, await self.encode(kept), index, delta.added_rows
+                    )
+                    for objective, row_scores, row_ids in zip(kept, scores, ids):
+                        merged = stored[objective] + [
+                            [index.skills[int(delta.added_rows[i])], round(float(score), 6)]
+                            for score, i in zip(row_scores, row_ids)
+                        ]
+                        results[objective] = sorted(merged, key=lambda item: -item[1])[:TOP_K]
+                else:
+                    results = {objective: stored[objective] for objective in kept}
+
+        todo = [objective for objective in objectives if objective not in results]
+        if todo:
+            results.update(await self._score(index, search_index, todo))
+        self.recomputed_objectives += len(todo)
+        self.reused_objectives += len(objectives) - len(todo)
+
+        entry = {
+            "fingerprint": fingerprint(org, self.model_id, version, self.pooling),
+            "model_id": self.model_id,
+            "catalogue_version": version,
+            "objectives": results,
+            "pooling": self.pooling,
+            "training_recommendations": await self.rank(org),
+            "recomputed_objectives": len(todo),
+            "computed_at": time.time(),
+        }
+        if org_id:
+            await asyncio.to_thread(self.repository.put_recommendations, org_id, entry)
+        return entry
+
+    async def _matches(self, org, entry):
+        """True if a stored entry's fingerprint still matches this organization."""
+        if entry is None:
+            return False
+        index = await asyncio.to_thread(self.load_index)
+        return entry.get("fingerprint") == fingerprint(org, self.model_id, index.catalogue_hash, self.pooling)
+
+    async def get(self, org):
+        """Stored entry if its fingerprint still matches, otherwise an incremental refresh."""
+        org_id = org.get("organizationID")
+        if not org_id:
+            self.misses += 1
+            return await self._refresh(org, None, None)
+        entry = await asyncio.to_thread(self.repository.get_recommendations, org_id)
+        if await self._matches(org, entry):
+            self.hits += 1
+            return entry
+        self.misses += 1
+        async with self._lock(org_id):
+            # ✅ A refresh that held the lock may already have produced this exact entry
+            entry = await asyncio.to_thread(self.repository.get_recommendations, org_id)
+            if await self._matches(org, entry):
+                return entry
+            return await self._refresh(org, entry, None)
+
+    async def refresh_stale(self, old_index=None, report=None):
+        """Background job: recompute only organizations materialized against another catalogue/model."""
+        index, _ = await self._indexes()
+        delta = CatalogueDelta(old_index, index) if old_index is not None else None
+        stale = await asyncio.to_thread(self.repository.stale_recommendations, self.model_id, index.catalogue_hash)
+        return await self.refresh_many(stale, delta, report)
+
+    async def refresh_many(self, org_ids, delta=None, report=None):
+        """Refresh the given organizations in order; report(fraction, message) after each one."""
+        refreshed = 0
+        for done, org_id in enumerate(org_ids, 1):
+            org = await asyncio.to_thread(self.repository.get, org_id)
+            if org is not None and query_texts(org)[0]:
+                await self.refresh(org, delta=delta)
+                refreshed += 1
+            if report is not None:
+                report(done / len(org_ids), f"{done}/{len(org_ids)} organizations")
+        return refreshed
+
+    def schedule(self, coroutine):
+        """Run a refresh job in the background, keeping a reference until it finishes."""
+        async def _run():
+            try:
+                return await coroutine
+            except Exception:
+                log.exception("Recommendation refresh failed")
+
+        task = asyncio.create_task(_run())
+        self.jobs.add(task)
+        task.add_done_callback(self.jobs.discard)
+        return task
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "recomputed_objectives": self.recomputed_objectives,
+            "reused_objectives": self.reused_objectives,
+            "running_jobs": len(self.jobs),
+        }
@@ -0,0 +1,129 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # ✅ Optional: without it only gzip variants are precompressed
+    brotli = None
+
+# ✅ Cache size and precompression knobs
+RESPONSE_CACHE_SIZE = int(os.environ.get("TNA_RESPONSE_CACHE_SIZE", "512"))
+SEARCH_CACHE_SIZE = int(os.environ.get("TNA_SEARCH_CACHE_SIZE", "128"))  # ✅ Free-text queries get their own LRU
+COMPRESS_MIN_BYTES = int(os.environ.get("TNA_COMPRESS_MIN_BYTES", "512"))
+GZIP_LEVEL = int(os.environ.get("TNA_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.environ.get("TNA_BROTLI_QUALITY", "5"))
+
+
+def serialize(payload):
+    """JSON bytes exactly as JSONResponse would render them."""
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+class CachedBody:
+    """Pre-serialized payload with a strong content ETag and precompressed variants."""
+
+    __slots__ = ("body", "etag", "encoded")
+
+    def __init__(self, payload):
+        self.body = serialize(payload)
+        self.etag = '"%s"' % hashlib.sha256(self.body).hexdigest()[:32]
+        self.encoded = {}
+        if len(self.body) >= COMPRESS_MIN_BYTES:
+            if brotli is not None:
+                self.encoded["br"] = brotli.compress(self.body, quality=BROTLI_QUALITY)
+            self.encoded["gzip"] = gzip.compress(self.body, GZIP_LEVEL, mtime=0)
+
+
+def _base_tag(tag):
+    """Strip the weak prefix and the per-encoding suffix so any variant revalidates."""
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for encoding in ("-gzip", "-br"):
+        if tag.endswith(encoding + '"'):
+            return tag[:-len(encoding) - 1] + '"'
+    return tag
+
+
+def etag_matches(request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [_base_tag(tag) for tag in header.split(",")]
+
+
+def _accepted(request):
+    accepted = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            accepted.add(coding.lower())
+    return accepted
+
+
+def cached_response(request, cached, cache_control="no-cache"):
+    """304 when the client copy is current, else the best precompressed variant the client accepts."""
+    headers = {"ETag": cached.etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+    accepted = _accepted(request)
+    encoding = next((encoding for encoding in ("br", "gzip") if encoding in cached.encoded and encoding in accepted), None)
+    if encoding is not None:
+        # ✅ Each representation gets its own strong ETag; _base_tag maps it back on revalidation
+        headers["ETag"] = cached.etag[:-1] + f'-{encoding}"'
+    if etag_matches(request, cached.etag):
+        # ✅ The 304 names the representation a 200 would have sent, so caches keep the right variant
+        return Response(status_code=304, headers=headers)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+        return Response(content=cached.encoded[encoding], media_type="application/json", headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """LRU of CachedBody entries, each tagged with the data version it was built from."""
+
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (version, CachedBody)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version, build):
+        """Cached body for (key, version); build() -> payload is only called on a miss."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        cached = CachedBody(build())
+        with self._lock:
+            self.misses += 1
+            self.entries[key] = (version, cached)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return cached
+
+    def respond(self, request, key, version, build, cache_control="no-cache"):
+        return cached_response(request, self.get(key, version, build), cache_control)
+
+    def invalidate(self, prefix=""):
+        with self._lock:
+            for key in [key for key in self.entries if key.startswith(prefix)]:
+                del self.entries[key]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "brotli": brotli is not None,
+        }
@@ -0,0 +1,259 @@
+"""Versioned, columnar skill catalogue extracted from report PDFs.
+
+    python skill_catalogue.py build [--report PATH] [--pdf PATH ...]
+    python skill_catalogue.py list
+    python skill_catalogue.py activate VERSION
+
+Each version is a directory of flat arrays (UTF-8 name blob + offsets, dictionary-encoded
+category/source columns) that is memory-mapped on load, so startup cost does not grow
+with the catalogue size.
+"""
+import os
+import re
+import json
+import time
+import shutil
+import argparse
+import unicodedata
+import numpy as np
+from skill_index import catalogue_hash
+from wef_ingest import DATA_DIR, REPORT_PATH, WEF_KEYWORDS, extract_pages
+
+_REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..")
+
+CATALOGUE_DIR = os.environ.get("TNA_SKILL_CATALOGUE_DIR", os.path.join(DATA_DIR, "skill_catalogue"))
+CURRENT_FILE = "CURRENT"
+
+# ✅ Seed skills, used only until a catalogue is published (python skill_catalogue.py build)
+WEF_SKILLS = ["AI & Big Data", "Cybersecurity", "Cloud Computing", "Analytical Thinking"]
+
+# ✅ Extra local PDFs scanned in full (os.pathsep-separated)
+SKILL_SOURCES = os.environ.get(
+    "TNA_SKILL_SOURCES",
+    os.pathsep.join([
+        os.path.join(_REPO_ROOT, "Doc2.pdf"),
+        os.path.join(_REPO_ROOT, "hr-tna-frontend", "public", "training_fields.pdf"),
+    ]),
+).split(os.pathsep)
+
+BULLET = re.compile(r"^[•●▪◦■►\-–*]\s*(.*)$")
+HEADING = re.compile(r"^\d{1,2}\s*[.)]\s+(\S.*)$")
+SCORED_ROW = re.compile(r"^([A-Za-z][A-Za-z ,&/'()\-]{2,80}?)\s+\d{1,3}(?:\.\d+)?\s?%$")
+MAX_WORDS = 8
+
+
+def clean_text(text):
+    """NFKC, drop emoji/format marks (e.g. '1️.'), collapse whitespace."""
+    text = unicodedata.normalize("NFKC", text or "")
+    text = "".join(ch for ch in text if unicodedata.category(ch) not in ("Cf", "Mn", "So", "Co"))
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def skill_key(name):
+    """Deduplication key: case-, punctuation- and '&'/'and'-insensitive."""
+    name = name.casefold().replace("&", " and ")
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", name).split())
+
+
+def _candidate(text):
+    text = text.strip(" .;:,")
+    words = text.split()
+    if not words or len(words) > MAX_WORDS or len(text) > 80 or not re.search(r"[A-Za-z]", text):
+        return None
+    return text
+
+
+def parse_skills(text, category=None):
+    """Return ([(skill, category)], last category) from bullet lists, numbered sections and
+    'Skill 42%' table rows.
+
+    `category` is the section heading in force at the end of the previous page; the returned
+    category carries it on, including a heading with no skills under it yet.
+    """
+    skills = []
+    for line in (text or "").splitlines():
+        line = clean_text(line)
+        if not line:
+            continue
+        heading = HEADING.match(line)
+        if heading:
+            category = _candidate(heading.group(1)) or category
+            continue
+        bullet = BULLET.match(line)
+        scored = SCORED_ROW.match(line)
+        skill = _candidate(bullet.group(1)) if bullet else (_candidate(scored.group(1)) if scored else None)
+        if skill:
+            skills.append((skill, category))
+    return skills, category
+
+
+def extract_skills(sources):
+    """Normalized, deduplicated rows from [(pdf_path, keywords)]; first occurrence wins."""
+    rows, seen = [], set()
+    for path, keywords in sources:
+        if not os.path.exists(path):
+            continue
+        source, category = os.path.basename(path), None
+        for page in extract_pages(path, keywords):
+            skills, category = parse_skills(page["text"], category)
+            for skill, skill_category in skills:
+                key = skill_key(skill)
+                if key and key not in seen:
+                    seen.add(key)
+                    rows.append({
+                        "name": skill, "category": skill_category or "", "source": source, "page": page["page"],
+                    })
+    return rows
+
+
+# ✅ Columnar store ----------------------------------------------------------------------
+
+def _dictionary_encode(values):
+    labels = list(dict.fromkeys(values))
+    position = {label: i for i, label in enumerate(labels)}
+    return labels, np.asarray([position[value] for value in values], dtype=np.int32)
+
+
+def write_catalogue(rows, root=CATALOGUE_DIR, activate=True):
+    """Store rows as a new immutable version (content-addressed) and optionally make it current."""
+    if not rows:
+        raise ValueError("Refusing to publish an empty skill catalogue")
+    names = [row["name"] for row in rows]
+    content_hash = catalogue_hash(names)
+    categories, category_codes = _dictionary_encode([row["category"] for row in rows])
+    sources, source_codes = _dictionary_encode([row["source"] for row in rows])
+    version = catalogue_hash([content_hash] + categories + sources + [str(c) for c in category_codes])[:16]
+
+    path = os.path.join(root, version)
+    if not os.path.isdir(path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        os.makedirs(tmp_path, exist_ok=True)
+        encoded = [name.encode("utf-8") for name in names]
+        with open(os.path.join(tmp_path, "names.bin"), "wb") as f:
+            f.write(b"".join(encoded))
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(blob) for blob in encoded], out=offsets[1:])
+        np.save(os.path.join(tmp_path, "offsets.npy"), offsets)
+        np.save(os.path.join(tmp_path, "category.npy"), category_codes)
+        np.save(os.path.join(tmp_path, "source.npy"), source_codes)
+        np.save(os.path.join(tmp_path, "page.npy"), np.asarray([row["page"] for row in rows], dtype=np.int32))
+        meta = {
+            "version": version,
+            "content_hash": content_hash,
+            "count": len(rows),
+            "categories": categories,
+            "sources": sources,
+            "created_at": time.time(),
+        }
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=4)
+        try:
+            os.rename(tmp_path, path)
+        except OSError:  # ✅ Another process published the same version first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+    if activate:
+        activate_version(version, root)
+    return version
+
+
+def activate_version(version, root=CATALOGUE_DIR):
+    """Point CURRENT at an existing version (also used to roll back)."""
+    if not os.path.isdir(os.path.join(root, version)):
+        raise ValueError(f"Unknown skill catalogue version: {version}")
+    tmp_path = os.path.join(root, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+
+
+def list_versions(root=CATALOGUE_DIR):
+    """Metadata of every stored version, newest first."""
+    versions = []
+    if os.path.isdir(root):
+        for name in os.listdir(root):
+            meta_path = os.path.join(root, name, "meta.json")
+            if os.path.exists(meta_path):
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    versions.append(json.load(f))
+    return sorted(versions, key=lambda meta: meta["created_at"], reverse=True)
+
+
+class SkillCatalogue:
+    """Read-only, memory-mapped catalogue; behaves like a sequence of skill names."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.version = self.meta["version"]
+        self.content_hash = self.meta["content_hash"]
+        self.categories = self.meta["categories"]
+        self.sources = self.meta["sources"]
+        self._names = np.memmap(os.path.join(path, "names.bin"), dtype=np.uint8, mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.category_codes = np.load(os.path.join(path, "category.npy"), mmap_mode="r")
+        self.source_codes = np.load(os.path.join(path, "source.npy"), mmap_mode="r")
+        self.pages = np.load(os.path.join(path, "page.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return self.meta["count"]
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return bytes(self._names[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def record(self, i):
+        return {
+            "name": self[i],
+            "category": self.categories[self.category_codes[i]],
+            "source": self.sources[self.source_codes[i]],
+            "page": int(self.pages[i]),
+        }
+
+
+def load_catalogue(root=CATALOGUE_DIR, version=None):
+    """Open the current (or a given) version, or None if nothing has been published."""
+    if version is None:
+        try:
+            with open(os.path.join(root, CURRENT_FILE), "r", encoding="utf-8") as f:
+                version = f.read().strip()
+        except OSError:
+            return None
+    path = os.path.join(root, version)
+    return SkillCatalogue(path) if os.path.isdir(path) else None
+
+
+def catalogue_skills(catalogue):
+    """Return (skills, content hash) for a loaded catalogue, falling back to WEF_SKILLS if None."""
+    if catalogue is None:
+        return WEF_SKILLS, catalogue_hash(WEF_SKILLS)
+    return catalogue, catalogue.content_hash
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Skill catalogue extraction and versions.")
+    parser.add_argument("command", choices=["build", "list", "activate"])
+    parser.add_argument("version", nargs="?")
+    parser.add_argument("--report", default=REPORT_PATH)
+    parser.add_argument("--pdf", action="append", dest="pdfs")
+    parser.add_argument("--root", default=CATALOGUE_DIR)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        # ✅ Report: keyword-matching pages only; other PDFs: every page
+        sources = [(args.report, WEF_KEYWORDS)] + [(path, ()) for path in (args.pdfs or SKILL_SOURCES) if path]
+        rows = extract_skills(sources)
+        version = write_catalogue(rows, args.root)
+        print(f"✅ Skill catalogue {version}: {len(rows)} skills")
+    elif args.command == "list":
+        for meta in list_versions(args.root):
+            print(f"{meta['version']}  {meta['count']:>6} skills  {time.ctime(meta['created_at'])}")
+    else:
+        activate_version(args.version, args.root)
+        print(f"✅ Active skill catalogue: {args.version}")
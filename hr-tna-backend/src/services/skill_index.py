@@ -0,0 +1,170 @@
+import os
+import json
+import hashlib
+import argparse
+import threading
+import numpy as np
+
+# ✅ Where precomputed embedding matrices live (shared by every worker on the host)
+INDEX_DIR = os.environ.get(
+    "TNA_INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "index")
+)
+MANIFEST_FILE = "manifest.json"  # ✅ Legacy shared manifest (still read, no longer written)
+ENTRY_SUFFIX = ".entry.json"
+
+
+class SkillIndex:
+    """Read-only skill catalogue with its L2-normalized float32 embedding matrix."""
+
+    def __init__(self, skills, embeddings, model_name, catalogue_hash):
+        self.skills = skills  # any sequence of names (list or memory-mapped SkillCatalogue)
+        self.embeddings = embeddings  # np.memmap, shape (len(skills), dim)
+        self.model_name = model_name
+        self.catalogue_hash = catalogue_hash
+
+    def __len__(self):
+        return len(self.skills)
+
+    @property
+    def dim(self):
+        return self.embeddings.shape[1]
+
+
+def catalogue_hash(texts):
+    """Stable SHA-256 over an ordered list of catalogue entries."""
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def index_key(model_name, texts_hash):
+    """Manifest key for one (model, catalogue) pair."""
+    safe_model = model_name.replace("/", "__")
+    return f"{safe_model}-{texts_hash[:16]}"
+
+
+def _atomic_write(path, write):
+    """Write via a temp file and rename so concurrent readers never see partial data."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def read_entry(index_dir, key):
+    """The registered entry for one key, or None."""
+    entry = _read_json(os.path.join(index_dir, key + ENTRY_SUFFIX))
+    if entry is None:
+        entry = (_read_json(os.path.join(index_dir, MANIFEST_FILE)) or {}).get(key)
+    return entry
+
+
+def read_manifest(index_dir=INDEX_DIR):
+    """Return {key: entry} for every registered matrix (empty if no index has been built yet).
+
+    Each key is registered in its own <key>.entry.json, so builders in different
+    processes never read-modify-write a shared file and cannot drop each other's entries.
+    """
+    manifest = _read_json(os.path.join(index_dir, MANIFEST_FILE)) or {}
+    if os.path.isdir(index_dir):
+        for name in sorted(os.listdir(index_dir)):
+            if name.endswith(ENTRY_SUFFIX):
+                entry = _read_json(os.path.join(index_dir, name))
+                if entry is not None:
+                    manifest[name[:-len(ENTRY_SUFFIX)]] = entry
+    return manifest
+
+
+def write_embeddings(index_dir, key, embeddings, model_name, texts_hash, extra=None):
+    """Persist an embedding matrix as .npy and register it under its key."""
+    os.makedirs(index_dir, exist_ok=True)
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    matrix_file = f"{key}.npy"
+
+    def _save(tmp_path):
+        with open(tmp_path, "wb") as f:
+            np.save(f, embeddings)
+
+    _atomic_write(os.path.join(index_dir, matrix_file), _save)
+
+    entry = {
+        "model_name": model_name,
+        "catalogue_hash": texts_hash,
+        "count": int(embeddings.shape[0]),
+        "dim": int(embeddings.shape[1]) if embeddings.ndim == 2 else 0,
+        "file": matrix_file,
+    }
+    if extra:
+        entry.update(extra)
+
+    def _dump(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, indent=4)
+
+    _atomic_write(os.path.join(index_dir, key + ENTRY_SUFFIX), _dump)
+    return entry
+
+
+def open_embeddings(index_dir, entry):
+    """Memory-map a registered embedding matrix (read-only, shared via the page cache)."""
+    return np.load(os.path.join(index_dir, entry["file"]), mmap_mode="r")
+
+
+def build_skill_index(model, skills, model_name, index_dir=INDEX_DIR, texts_hash=None):
+    """Encode the full skill catalogue once and store it on disk."""
+    texts_hash = texts_hash or catalogue_hash(skills)
+    embeddings = model.encode(
+        list(skills), convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False
+    )
+    key = index_key(model_name, texts_hash)
+    entry = write_embeddings(index_dir, key, embeddings, model_name, texts_hash)
+    return SkillIndex(skills, open_embeddings(index_dir, entry), model_name, texts_hash)
+
+
+def load_skill_index(skills, model_name, index_dir=INDEX_DIR, texts_hash=None):
+    """Return the stored index for this model + catalogue, or None if it is missing or stale.
+
+    Pass the catalogue's stored content hash to skip re-hashing every name at startup.
+    """
+    texts_hash = texts_hash or catalogue_hash(skills)
+    entry = read_entry(index_dir, index_key(model_name, texts_hash))
+    if not entry or entry.get("model_name") != model_name or entry.get("catalogue_hash") != texts_hash:
+        return None
+    try:
+        embeddings = open_embeddings(index_dir, entry)
+    except (OSError, ValueError):
+        return None
+    if embeddings.shape[0] != len(skills):
+        return None
+    return SkillIndex(skills, embeddings, model_name, texts_hash)
+
+
+def get_skill_index(model, skills, model_name, index_dir=INDEX_DIR, texts_hash=None):
+    """Load the persisted index, building it first if needed."""
+    index = load_skill_index(skills, model_name, index_dir, texts_hash)
+    if index is None:
+        index = build_skill_index(model, skills, model_name, index_dir, texts_hash)
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the precomputed skill-embedding index.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    args = parser.parse_args()
+
+    from model_loader import MODEL_ID, get_model
+    from skill_catalogue import catalogue_skills, load_catalogue
+
+    skills, texts_hash = catalogue_skills(load_catalogue())
+    index = build_skill_index(get_model(), skills, MODEL_ID, args.index_dir, texts_hash)
+    print(f"✅ Built skill index: {len(index)} skills x {index.dim} dims ({index.catalogue_hash[:16]})")
@@ -0,0 +1,92 @@
+import os
+import numpy as np
+from vector_search import BLOCK_SIZE, EXACT_MAX_ITEMS, top_k
+from metrics import timed
+
+
+def _parse_weights(spec):
+    weights = {}
+    for item in spec.split(","):
+        name, _, value = item.partition("=")
+        if name.strip():
+            weights[name.strip()] = float(value)
+    return weights
+
+
+# ✅ Relative weight of each organization field in the pooled skill score
+SOURCE_WEIGHTS = _parse_weights(
+    os.environ.get("TNA_SCORE_WEIGHTS", "objectives=1.0,vision=0.5,mission=0.5,client_charter=0.25")
+)
+POOLINGS = ("max", "mean", "softmax")
+POOLING = os.environ.get("TNA_SCORE_POOLING", "max")
+SOFTMAX_TEMPERATURE = float(os.environ.get("TNA_SCORE_TEMPERATURE", "0.05"))
+TOP_N = int(os.environ.get("TNA_SCORE_TOP_N", "10"))
+CANDIDATES_PER_QUERY = int(os.environ.get("TNA_SCORE_CANDIDATES", "50"))
+
+
+def query_items(org, weights=SOURCE_WEIGHTS):
+    """[(source, text, weight)] for every non-empty objective, vision, mission and client charter."""
+    items = []
+    for source, weight in weights.items():
+        values = org.get(source) or []
+        for value in ([values] if isinstance(values, str) else values):
+            if isinstance(value, str) and value.strip() and weight > 0:
+                items.append((source, value.strip(), weight))
+    return items
+
+
+def query_texts(org, weights=SOURCE_WEIGHTS):
+    """(texts, weights) for every non-empty objective, vision, mission and client charter."""
+    items = query_items(org, weights)
+    return [text for _, text, _ in items], [weight for _, _, weight in items]
+
+
+def pool(scores, weights, pooling=POOLING, temperature=SOFTMAX_TEMPERATURE):
+    """Collapse a (queries, skills) score matrix into one relevance per skill."""
+    weights = np.asarray(weights, dtype=np.float32)[:, None]
+    if pooling == "max":
+        return (scores * (weights / weights.max())).max(axis=0)
+    if pooling == "mean":
+        return (scores * weights).sum(axis=0) / weights.sum()
+    if pooling == "softmax":
+        # ✅ Weighted soft-max: strongest queries dominate, weaker ones still contribute
+        logits = scores / temperature + np.log(weights)
+        logits -= logits.max(axis=0, keepdims=True)
+        attention = np.exp(logits)
+        attention /= attention.sum(axis=0, keepdims=True)
+        return (attention * scores).sum(axis=0)
+    raise ValueError(f"Unknown pooling: {pooling} (expected one of {', '.join(POOLINGS)})")
+
+
+def score_skills(query_vectors, weights, skill_vectors, k=TOP_N, pooling=POOLING, candidates=None,
+                 block_size=BLOCK_SIZE):
+    """Top-k pooled skills as (scores, ids), best first.
+
+    Scores every skill (or only `candidates`) in column blocks, then a partial top-k.
+    """
+    query_vectors = np.asarray(query_vectors, dtype=np.float32)
+    if candidates is None:
+        ids = np.arange(skill_vectors.shape[0])
+    else:
+        ids = np.unique(np.asarray(candidates).ravel())
+        ids = ids[ids >= 0]
+    pooled = np.empty(ids.size, dtype=np.float32)
+    with timed("similarity"):
+        for start in range(0, ids.size, block_size):
+            block = ids[start:start + block_size]
+            vectors = skill_vectors[start:start + block_size] if candidates is None else skill_vectors[block]
+            pooled[start:start + block.size] = pool(query_vectors @ np.asarray(vectors).T, weights, pooling)
+    top_scores, top_ids = top_k(pooled, k)
+    return top_scores[0], ids[top_ids[0]]
+
+
+def rank_skills(query_vectors, weights, skill_index, search_index, k=TOP_N, pooling=POOLING):
+    """Ranked [{"skill", "score"}]: exact over small catalogues, ANN candidates over large ones."""
+    candidates = None
+    if len(skill_index) > EXACT_MAX_ITEMS:
+        _, candidates = search_index.search(query_vectors, k=CANDIDATES_PER_QUERY)
+    scores, ids = score_skills(query_vectors, weights, skill_index.embeddings, k, pooling, candidates)
+    return [
+        {"skill": skill_index.skills[int(i)], "score": round(float(score), 4)}
+        for score, i in zip(scores, ids)
+    ]
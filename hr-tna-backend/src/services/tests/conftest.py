@@ -0,0 +1,55 @@
+import os
+import tempfile
+import zlib
+import numpy as np
+import pytest
+
+# ✅ Services read their TNA_* locations at import time, so isolate them before any test imports one
+_SCRATCH = tempfile.mkdtemp(prefix="tna-tests-")
+os.environ.update({
+    "TNA_DATA_DIR": _SCRATCH,
+    "TNA_INDEX_DIR": os.path.join(_SCRATCH, "index"),
+    "TNA_ORG_FILE": os.path.join(_SCRATCH, "no-legacy-organizations.json"),
+    "TNA_MODEL_LOAD": "lazy",
+    "TNA_EMBED_WORKERS": "0",
+    # ✅ Nothing under test may reach Google Trends
+    "TNA_TREND_TRANSPORT": "replay:" + os.path.join(os.path.dirname(__file__), "fixtures", "trends_replay.json"),
+})
+
+STUB_DIM = 64
+
+
+class StubEncoder:
+    """Deterministic bag-of-words hashing encoder with the SentenceTransformer encode() signature."""
+
+    def __init__(self, dim=STUB_DIM):
+        self.dim = dim
+        self.calls = []
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=False,
+               show_progress_bar=False, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        self.calls.append(texts)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.encode("utf-8")) % self.dim] += 1.0
+            vectors[row, zlib.crc32(text.encode("utf-8")) % self.dim] += 0.5
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors[0] if single else vectors
+
+
+@pytest.fixture
+def stub_encoder(monkeypatch):
+    """Swap the model backend for StubEncoder (model_loader resolves it through load_encoder)."""
+    import model_loader
+
+    encoder = StubEncoder()
+    monkeypatch.setattr(model_loader, "load_encoder", lambda model_name, backend=None: encoder)
+    monkeypatch.setattr(model_loader, "model", None)
+    monkeypatch.setattr(model_loader, "_warmed_pid", None)
+    return encoder
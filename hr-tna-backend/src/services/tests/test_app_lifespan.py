@@ -0,0 +1,15 @@
+from fastapi.testclient import TestClient
+import training_analytics_api as api
+
+
+def test_lifespan_starts_and_stops_background_services():
+    with TestClient(api.app) as client:
+        assert client.get("/jobs/stats").status_code == 200
+        assert api.job_workers._tasks
+    assert not api.job_workers._tasks
+
+
+def test_stats_endpoints_use_one_path_form():
+    paths = {route.path for route in api.app.routes}
+    stats = sorted(path for path in paths if path.endswith("stats") or path.endswith("stats/"))
+    assert stats and all(path.endswith("/stats") for path in stats), stats
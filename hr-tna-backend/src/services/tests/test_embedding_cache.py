@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import numpy as np
+from embedding_cache import EmbeddingCache, cache_key, normalize_text
+
+
+def test_normalize_text_collapses_whitespace_and_unicode_forms():
+    assert normalize_text("  Grow   regional\tsales\n") == "Grow regional sales"
+    assert normalize_text("café") == normalize_text("café")
+    assert normalize_text(None) == ""
+
+
+def test_cache_key_depends_on_model_and_normalized_text():
+    assert cache_key("m", " Cloud  Computing ") == cache_key("m", "Cloud Computing")
+    assert cache_key("m", "Cloud Computing") != cache_key("m+onnx", "Cloud Computing")
+    assert cache_key("m", "Cloud Computing") != cache_key("m", "cloud computing")
+
+
+def test_encode_only_calls_encoder_for_misses(tmp_path, stub_encoder):
+    encoder = stub_encoder
+    cache = EmbeddingCache("m", path=str(tmp_path / "cache.sqlite3"))
+
+    first = cache.encode(["a b", "c d", "a b"], encoder.encode)
+    assert encoder.calls == [["a b", "c d"]]
+    assert first.shape == (3, encoder.dim)
+    np.testing.assert_array_equal(first[0], first[2])
+
+    second = cache.encode(["c  d", "e f"], encoder.encode)
+    assert encoder.calls[-1] == ["e f"]
+    np.testing.assert_array_equal(second[0], first[1])
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path, stub_encoder):
+    path = str(tmp_path / "cache.sqlite3")
+    encoder = stub_encoder
+    expected = EmbeddingCache("m", path=path).encode(["objective one"], encoder.encode)
+
+    fresh = EmbeddingCache("m", path=path, max_items=1)
+    vectors = fresh.encode(["objective  one"], encoder.encode)
+    assert len(encoder.calls) == 1
+    np.testing.assert_array_equal(vectors, expected)
+    assert fresh.stats()["disk_hits"] == 1
+
+    # ✅ Another model ID never sees these vectors
+    EmbeddingCache("other", path=path).encode(["objective one"], encoder.encode)
+    assert len(encoder.calls) == 2
+
+
+def test_memory_tier_is_bounded(tmp_path, stub_encoder):
+    cache = EmbeddingCache("m", path=str(tmp_path / "cache.sqlite3"), max_items=2)
+    cache.encode(["a", "b", "c"], stub_encoder.encode)
+    assert cache.stats()["memory_items"] == 2
+    assert cache.stats()["disk_items"] == 3
+
+
+def test_aencode_keeps_sqlite_off_the_event_loop(tmp_path, stub_encoder, monkeypatch):
+    cache = EmbeddingCache("m", path=str(tmp_path / "cache.sqlite3"))
+    threads = []
+
+    def recording(name, function):
+        def wrapper(*args):
+            threads.append((name, threading.get_ident()))
+            return function(*args)
+        return wrapper
+
+    for name in ("_disk_get", "put_many"):
+        monkeypatch.setattr(cache, name, recording(name, getattr(cache, name)))
+
+    async def encode(texts):
+        return stub_encoder.encode(texts)
+
+    async def run():
+        loop_thread = threading.get_ident()
+        first = await cache.aencode(["a b", "c d"], encode)
+        second = await cache.aencode(["a b"], encode)  # ✅ Memory hit: no thread hop at all
+        return loop_thread, first, second
+
+    loop_thread, first, second = asyncio.run(run())
+    assert [name for name, _ in threads] == ["_disk_get", "put_many"]
+    assert all(ident != loop_thread for _, ident in threads)
+    np.testing.assert_array_equal(second[0], first[0])
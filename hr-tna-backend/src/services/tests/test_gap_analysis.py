@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from gap_analysis import analyze_gaps, best_matches, program_texts
+
+
+def integer_vectors(n, dim=8, seed=0):
+    """Small integer entries: every dot product is exact, so block order cannot change a score."""
+    return np.random.default_rng(seed).integers(-3, 4, size=(n, dim)).astype(np.float32)
+
+
+def unblocked(program_vectors, skill_vectors, membership):
+    scores = program_vectors @ skill_vectors.T
+    level_best = np.stack([
+        scores[membership[:, level]].max(axis=0) if membership[:, level].any()
+        else np.full(skill_vectors.shape[0], -np.inf, dtype=np.float32)
+        for level in range(membership.shape[1])
+    ])
+    return scores.max(axis=0), scores.argmax(axis=0), level_best
+
+
+@pytest.mark.parametrize("block_size", [1, 3, 7, 64, 1000])
+def test_blocked_scan_matches_unblocked(block_size):
+    programs, skills = integer_vectors(150), integer_vectors(20, seed=1)
+    membership = np.random.default_rng(2).random((150, 4)) < 0.3
+    membership[:, 3] = False  # ✅ A level nobody attended
+
+    best, best_program, level_best = best_matches(programs, skills, membership, block_size)
+    expected_best, expected_program, expected_levels = unblocked(programs, skills, membership)
+    np.testing.assert_array_equal(best, expected_best)
+    np.testing.assert_array_equal(best_program, expected_program)
+    np.testing.assert_array_equal(level_best, expected_levels)
+    assert np.isneginf(level_best[3]).all()
+
+
+@pytest.mark.parametrize("block_size", [1, 2, 3, 5, 100])
+def test_ties_resolve_to_the_first_program(block_size):
+    skills = integer_vectors(6, seed=3)
+    # ✅ Every program appears three times, so each skill's best score is shared by three rows
+    programs = np.tile(integer_vectors(4, seed=4), (3, 1))
+    membership = np.ones((12, 1), dtype=bool)
+
+    _, best_program, _ = best_matches(programs, skills, membership, block_size)
+    np.testing.assert_array_equal(best_program, unblocked(programs, skills, membership)[1])
+    assert (best_program < 4).all()
+
+
+def test_analyze_gaps_reports_overall_and_per_level_gaps():
+    skills = ["Python", "Safety", "Negotiation"]
+    skill_vectors = np.eye(3, dtype=np.float32)
+    titles, fields = ["Intro to Python", "Forklift safety"], ["IT", "HSE"]
+    program_vectors = np.array([[0.9, 0.1, 0.0], [0.0, 0.6, 0.2]], dtype=np.float32)
+    membership = np.array([[True, False, False], [False, True, False]])
+    levels = ["Staff", "Operators", "Managers"]
+
+    report = analyze_gaps(skills, skill_vectors, titles, fields, program_vectors, membership, levels,
+                          threshold=0.5, block_size=1)
+
+    assert report["programs"] == 2
+    assert report["gaps"] == ["Negotiation"]
+    python = report["skills"][0]
+    assert python["best_match"] == {"title": "Intro to Python", "field": "IT", "score": 0.9}
+    assert python["by_attendee"]["Staff"] == {"score": 0.9, "covered": True}
+    assert python["by_attendee"]["Operators"] == {"score": 0.0, "covered": False}
+    assert "Managers" not in python["by_attendee"]
+    # ✅ Levels with no programs are left out rather than reported as missing everything
+    assert report["gaps_by_attendee"] == {"Staff": ["Safety", "Negotiation"], "Operators": ["Python", "Negotiation"]}
+
+
+def test_analyze_gaps_without_programs():
+    report = analyze_gaps(["Python"], np.ones((1, 4), dtype=np.float32), [], [], np.zeros((0, 4)),
+                          np.zeros((0, 1), dtype=bool), ["Staff"])
+    assert report["skills"][0]["best_match"] is None
+    assert report["gaps"] == ["Python"]
+    assert report["gaps_by_attendee"] == {}
+
+
+def test_program_texts():
+    assert program_texts(["Excel", "Safety"], ["IT", ""]) == ["Excel (IT)", "Safety"]
@@ -0,0 +1,123 @@
+import asyncio
+import threading
+from group_commit import GroupCommitWriter
+
+
+class FakeRepository:
+    """Records each upsert_many batch; a write can be held open with `gate`."""
+
+    def __init__(self):
+        self.batches = []
+        self.single = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def _check(self, record):
+        if record.get("bad"):
+            raise ValueError(f"bad record {record['name']}")
+
+    def upsert_many(self, records):
+        self.gate.wait()
+        self.batches.append([record["name"] for record in records])
+        for record in records:
+            self._check(record)
+        return [dict(record, stored=True) for record in records]
+
+    def upsert(self, record):
+        self.single.append(record["name"])
+        self._check(record)
+        return dict(record, stored=True)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_writes_queued_during_a_commit_share_the_next_one():
+    repository = FakeRepository()
+    writer = GroupCommitWriter(repository, max_batch=256, max_wait_ms=0)
+
+    async def burst():
+        repository.gate.clear()
+        first = asyncio.create_task(writer.upsert({"name": "first"}))
+        while writer.queue is None or writer.queue.qsize():  # ✅ Until the first write is in flight
+            await asyncio.sleep(0.001)
+        rest = [asyncio.create_task(writer.upsert({"name": f"org {i}"})) for i in range(10)]
+        await asyncio.sleep(0.01)
+        repository.gate.set()
+        results = await asyncio.gather(first, *rest)
+        await writer.stop()
+        return results
+
+    results = run(burst())
+    assert [result["name"] for result in results] == ["first"] + [f"org {i}" for i in range(10)]
+    assert all(result["stored"] for result in results)
+    assert [len(batch) for batch in repository.batches] == [1, 10]
+    stats = writer.stats()
+    assert (stats["total_commits"], stats["total_records"], stats["failed_commits"]) == (2, 11, 0)
+
+
+def test_batches_are_capped_at_max_batch():
+    repository = FakeRepository()
+    writer = GroupCommitWriter(repository, max_batch=4, max_wait_ms=0)
+
+    async def burst():
+        await writer.start()
+        results = await asyncio.gather(*(writer.upsert({"name": f"org {i}"}) for i in range(10)))
+        await writer.stop()
+        return results
+
+    assert len(run(burst())) == 10
+    assert max(len(batch) for batch in repository.batches) <= 4
+    assert sum(len(batch) for batch in repository.batches) == 10
+
+
+def test_a_failing_record_only_fails_its_own_caller():
+    repository = FakeRepository()
+    writer = GroupCommitWriter(repository, max_batch=256, max_wait_ms=0)
+
+    async def burst():
+        await writer.start()
+        records = [{"name": "a"}, {"name": "b", "bad": True}, {"name": "c"}]
+        results = await asyncio.gather(*(writer.upsert(record) for record in records), return_exceptions=True)
+        await writer.stop()
+        return results
+
+    a, b, c = run(burst())
+    assert a["stored"] and c["stored"]
+    assert isinstance(b, ValueError) and "bad record b" in str(b)
+    assert repository.single == ["a", "b", "c"]  # ✅ Retried one by one after the batch failed
+    assert writer.stats()["failed_commits"] == 1
+
+
+def test_an_unexpected_writer_error_reaches_every_caller():
+    class Broken(FakeRepository):
+        def upsert_many(self, records):
+            raise RuntimeError("database is locked")
+
+        def upsert(self, record):
+            raise RuntimeError("database is locked")
+
+    writer = GroupCommitWriter(Broken(), max_batch=256, max_wait_ms=0)
+
+    async def burst():
+        await writer.start()
+        results = await asyncio.gather(*(writer.upsert({"name": n}) for n in "xyz"), return_exceptions=True)
+        await writer.stop()
+        return results
+
+    assert all(isinstance(result, RuntimeError) for result in run(burst()))
+
+
+def test_stop_flushes_queued_writes():
+    repository = FakeRepository()
+    writer = GroupCommitWriter(repository, max_batch=256, max_wait_ms=50)
+
+    async def enqueue_then_stop():
+        tasks = [asyncio.create_task(writer.upsert({"name": f"org {i}"})) for i in range(5)]
+        await asyncio.sleep(0)
+        await writer.stop()
+        return await asyncio.gather(*tasks)
+
+    assert len(run(enqueue_then_stop())) == 5
+    assert sorted(name for batch in repository.batches for name in batch) == [f"org {i}" for i in range(5)]
@@ -0,0 +1,34 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+import industry_matcher
+import training_analytics_api as api
+
+
+class FakeMatcher:
+    def suggest_from_vector(self, vector, k):
+        return [{"code": "62010", "score": 0.9}][:k]
+
+
+def test_no_suggestions_until_the_matcher_is_built(monkeypatch):
+    monkeypatch.setattr(industry_matcher, "industry_matcher", None)
+    monkeypatch.setattr(api, "load_industry_matcher", lambda: pytest.fail("matcher built on the request path"))
+    assert asyncio.run(api.suggest_industries_if_ready("drone surveying")) is None
+
+
+def test_suggestions_are_dropped_when_the_encoder_is_overloaded(monkeypatch):
+    async def saturated(texts):
+        raise HTTPException(status_code=429, detail="Embedding service is busy, retry shortly")
+
+    monkeypatch.setattr(industry_matcher, "industry_matcher", FakeMatcher())
+    monkeypatch.setattr(api, "encode_texts_async", saturated)
+    assert asyncio.run(api.suggest_industries_if_ready("drone surveying")) is None
+
+
+def test_suggestions_when_ready(monkeypatch):
+    async def encode(texts):
+        return [[1.0, 0.0]]
+
+    monkeypatch.setattr(industry_matcher, "industry_matcher", FakeMatcher())
+    monkeypatch.setattr(api, "encode_texts_async", encode)
+    assert asyncio.run(api.suggest_industries_if_ready("software")) == [{"code": "62010", "score": 0.9}]
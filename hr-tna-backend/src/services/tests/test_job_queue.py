@@ -0,0 +1,172 @@
+import os
+import sys
+import time
+import asyncio
+import subprocess
+import pytest
+import job_queue
+from job_queue import JobFailed, JobQueue, JobWorkerPool, backoff
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"))
+
+
+def make_stale(queue, job_id, seconds=3600):
+    queue._connection().execute("UPDATE jobs SET heartbeat = heartbeat - ? WHERE id = ?", (seconds, job_id))
+
+
+@pytest.mark.parametrize("attempt", [1, 2, 3, 8, 20])
+def test_backoff_is_jittered_exponential_and_capped(attempt):
+    ceiling = min(600, 5 * 2 ** (attempt - 1))
+    delays = [backoff(attempt, base=5, cap=600) for _ in range(50)]
+    assert all(0.5 * ceiling <= delay <= ceiling for delay in delays)
+
+
+def test_failed_attempts_retry_with_backoff_until_max_attempts(queue):
+    job = queue.enqueue("flaky", {"n": 1}, max_attempts=2)
+    claimed = queue.claim("worker")
+    assert claimed["id"] == job["id"] and claimed["attempts"] == 1
+
+    before = time.time()
+    assert queue.fail(job["id"], "boom") == "queued"
+    retried = queue.get(job["id"])
+    assert retried["status"] == "queued" and retried["error"] == "boom" and retried["worker"] is None
+    assert retried["run_after"] >= before + 0.5 * job_queue.JOB_RETRY_BASE_S
+    assert queue.claim("worker") is None  # ✅ Not runnable until the backoff has passed
+
+    queue._connection().execute("UPDATE jobs SET run_after = 0")
+    assert queue.claim("worker")["attempts"] == 2
+    assert queue.fail(job["id"], "boom again") == "failed"
+    assert queue.get(job["id"])["status"] == "failed"
+
+
+def test_permanent_failures_are_not_retried(queue):
+    job = queue.enqueue("flaky", max_attempts=5)
+    queue.claim("worker")
+    assert queue.fail(job["id"], "bad params", retry=False) == "failed"
+
+
+def test_failing_a_purged_job_is_a_no_op(queue):
+    job = queue.enqueue("flaky")
+    queue.claim("worker")
+    queue._connection().execute("DELETE FROM jobs")
+    assert queue.fail(job["id"], "boom") is None
+
+
+def test_stale_jobs_requeue_only_while_attempts_remain(queue):
+    retryable = queue.enqueue("a", max_attempts=3)
+    queue.claim("lost-worker")
+    exhausted = queue.enqueue("b", max_attempts=1)
+    queue.claim("lost-worker")
+    alive = queue.enqueue("c", max_attempts=1)
+    queue.claim("live-worker")
+    make_stale(queue, retryable["id"])
+    make_stale(queue, exhausted["id"])
+
+    assert queue.requeue_stale(stale_after=60) == 1
+    assert queue.get(retryable["id"])["status"] == "queued"
+    lost = queue.get(exhausted["id"])
+    assert (lost["status"], lost["error"]) == ("failed", "worker lost") and lost["finished_at"]
+    assert queue.get(alive["id"])["status"] == "running"
+
+
+def test_singleton_kinds_reuse_the_active_job(queue):
+    first = queue.enqueue("ingest", singleton=True)
+    assert queue.enqueue("ingest", singleton=True)["id"] == first["id"]
+    assert queue.enqueue("ingest")["id"] != first["id"]
+
+
+def test_pool_retries_a_flaky_handler_then_succeeds(queue, monkeypatch):
+    monkeypatch.setattr(job_queue, "backoff", lambda attempt: 0)
+    calls = []
+
+    async def flaky(params, report):
+        calls.append(params)
+        if len(calls) == 1:
+            raise RuntimeError("temporary")
+        report(1.0, "done")
+        return {"ok": True}
+
+    async def fatal(params, report):
+        raise JobFailed("never works")
+
+    pool = JobWorkerPool(queue, workers=0, handlers={"flaky": (flaky, False), "fatal": (fatal, False)})
+    with pytest.raises(KeyError):
+        pool.enqueue("unknown")
+    flaky_job = pool.enqueue("flaky", {"n": 1})
+    fatal_job = pool.enqueue("fatal", max_attempts=3)
+
+    async def drain():
+        while (job := queue.claim("worker", list(pool.handlers))) is not None:
+            await pool._run(job)
+
+    asyncio.run(drain())
+    done = queue.get(flaky_job["id"])
+    assert (done["status"], done["attempts"], done["result"]) == ("succeeded", 2, {"ok": True})
+    failed = queue.get(fatal_job["id"])
+    assert (failed["status"], failed["attempts"]) == ("failed", 1)
+    assert failed["error"] == "JobFailed: never works"
+
+
+def test_event_stream_ends_when_the_job_is_purged(monkeypatch):
+    from fastapi.testclient import TestClient
+    import training_analytics_api as api
+
+    job = api.job_queue.enqueue("recommendations_refresh")
+    seen = []
+
+    def get(job_id):
+        seen.append(job_id)
+        return job if len(seen) <= 2 else None  # ✅ Purged after the first event
+
+    monkeypatch.setattr(api.job_queue, "get", get)
+    body = TestClient(api.app).get(f"/jobs/{job['id']}/events").text
+    assert body.startswith("event: progress")
+    assert "event: error" in body and "Job not found" in body
+
+
+def test_only_the_owning_worker_can_finish_a_job(queue):
+    job = queue.enqueue("slow", max_attempts=3)
+    queue.claim("lost-worker")
+    make_stale(queue, job["id"])
+    queue.requeue_stale(stale_after=60)
+    queue.claim("new-worker")
+
+    # ✅ The stale worker finishing late must not overwrite the new owner's run
+    assert queue.complete(job["id"], {"late": True}, "lost-worker") is False
+    assert queue.fail(job["id"], "late failure", worker="lost-worker") is None
+    assert queue.get(job["id"])["status"] == "running"
+    assert queue.complete(job["id"], {"ok": True}, "new-worker") is True
+    assert queue.complete(job["id"], {"again": True}, "new-worker") is False
+    assert queue.get(job["id"])["result"] == {"ok": True}
+
+
+def test_cli_enqueue_validates_kinds_without_loading_the_api(tmp_path):
+    env = {**os.environ, "TNA_JOB_DB": str(tmp_path / "jobs.sqlite3")}
+    script = os.path.join(os.path.dirname(job_queue.__file__), "job_queue.py")
+    probe = (
+        "import runpy, sys; sys.argv = ['job_queue.py'] + sys.argv[1:]\n"
+        "try:\n    runpy.run_path(sys.argv[0], run_name='__main__')\n"
+        "finally:\n    print('api loaded' if 'training_analytics_api' in sys.modules else 'api not loaded')\n"
+    )
+
+    def cli(*args):
+        return subprocess.run([sys.executable, "-c", probe, *args], cwd=os.path.dirname(script), env=env,
+                              capture_output=True, text=True, timeout=60)
+
+    first, second = cli("enqueue", "wef_ingest"), cli("enqueue", "wef_ingest")
+    assert first.returncode == 0 and "api not loaded" in first.stdout
+    assert first.stdout.split()[:4] == ["✅", "Queued", "wef_ingest", "job"]
+    assert first.stdout.split()[4] == second.stdout.split()[4]  # ✅ Singleton kind: the active job is reused
+    unknown = cli("enqueue", "nope")
+    assert unknown.returncode == 2 and "unknown job kind 'nope'" in unknown.stderr
+
+
+def test_api_registers_a_handler_for_every_declared_kind():
+    import training_analytics_api  # noqa: F401
+
+    assert {kind: singleton for kind, (_, singleton) in job_queue.JOB_HANDLERS.items()} == job_queue.JOB_KINDS
+    with pytest.raises(KeyError):
+        job_queue.job_handler("undeclared")
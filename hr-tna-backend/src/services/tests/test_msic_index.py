@@ -0,0 +1,98 @@
+import os
+import pytest
+from fastapi.testclient import TestClient
+import msic_index
+from msic_index import MsicIndex, trigrams
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "msic_small.csv")
+
+
+@pytest.fixture(scope="module")
+def index():
+    return MsicIndex(FIXTURE)
+
+
+def codes(records):
+    return [record["code"] for record in records]
+
+
+def test_hierarchy_columns(index):
+    assert len(index) == 12
+    maize = index.get("01111")
+    assert (maize["level"], maize["section"], maize["parent"]) == ("item", "A", "0111")
+    assert index.get("a")["level"] == "section"
+    assert index.get("0112")["desc_en"] == "Growing of paddy"  # ✅ Excel _x000D_ stripped
+    assert index.get("9999") is None
+
+
+def test_prefix_is_shortest_first_and_limited(index):
+    assert codes(index.prefix("01")) == ["01", "011", "0111", "0112", "01111", "01112"]
+    assert codes(index.prefix("011", limit=2)) == ["011", "0111"]
+    assert index.prefix("7") == []
+
+
+def test_trigrams_are_padded_and_folded():
+    assert trigrams("Rice") == {"  r", " ri", "ric", "ice", "ce "}
+    assert trigrams("Café!") == trigrams("cafe")
+
+
+def test_fuzzy_tolerates_typos_in_both_languages(index):
+    assert codes(index.fuzzy("semiconducter devises"))[0] == "2610"
+    assert codes(index.fuzzy("padi"))[0] == "0112"
+    results = index.fuzzy("leguminous crops", limit=3)
+    assert len(results) == 3 and results[0]["code"] == "01112"
+    assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
+    assert index.fuzzy("zzzz qqqq") == []
+
+
+def test_search_dispatches_on_query_shape(index):
+    assert codes(index.search("a", limit=3)) == ["A", "01", "02"]
+    assert codes(index.search("A01", limit=2)) == ["01", "011"]
+    assert codes(index.search(" 261 ")) == ["261", "2610"]
+    assert codes(index.search("maize"))[0] == "01111"
+
+
+def test_children_of(index):
+    assert codes(index.children_of()) == ["A", "C"]
+    assert codes(index.children_of("c")) == ["26"]
+    assert codes(index.children_of("011")) == ["0111", "0112"]
+    assert index.children_of("01111") == []
+    assert index.children_of("404") is None
+
+
+@pytest.fixture
+def client(index, monkeypatch):
+    import training_analytics_api as api
+
+    monkeypatch.setattr(msic_index, "msic_index", index)
+    return TestClient(api.app)
+
+
+@pytest.mark.parametrize("path", ["/industries/search?q=paddy", "/industries/search?q=01", "/industries/A/children"])
+def test_industry_endpoints_revalidate_with_etags(client, path):
+    first = client.get(path)
+    assert first.status_code == 200 and first.headers["etag"]
+    again = client.get(path, headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304 and again.content == b""
+    assert again.headers["etag"] == first.headers["etag"]
+
+
+def test_free_text_search_cannot_flood_the_response_cache(client, monkeypatch):
+    import training_analytics_api as api
+    from response_cache import ResponseCache
+
+    monkeypatch.setattr(api, "response_cache", ResponseCache(max_entries=8))
+    monkeypatch.setattr(api, "search_response_cache", ResponseCache(max_entries=4))
+    client.get("/industries/A/children")
+    for i in range(20):
+        client.get("/industries/search", params={"q": f"paddy {i}"})
+
+    assert len(api.search_response_cache.entries) == 4
+    assert list(api.response_cache.entries) == ["msic-children:A"]
+    assert client.get("/response_cache/stats").json()["search"]["misses"] == 20
+
+
+def test_industry_endpoint_payloads(client):
+    assert codes(client.get("/industries/search", params={"q": "paddy"}).json()["results"])[0] == "0112"
+    assert codes(client.get("/industries/root/children").json()["children"]) == ["A", "C"]
+    assert client.get("/industries/404/children").status_code == 404
@@ -0,0 +1,191 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from fastapi.testclient import TestClient
+from group_commit import GroupCommitWriter
+from org_repository import SqliteOrganizationRepository
+import training_history
+from training_history import TrainingHistory
+import training_analytics_api as api
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """API client on an empty repository; no job workers or background refreshes."""
+    repository = SqliteOrganizationRepository(str(tmp_path / "organizations.sqlite3"))
+    monkeypatch.setattr(api, "org_repository", repository)
+    monkeypatch.setattr(api, "organization_writer", GroupCommitWriter(repository))
+    monkeypatch.setattr(api.job_workers, "workers", 0)
+    monkeypatch.setattr(api.recommendation_engine, "schedule", lambda coroutine: coroutine.close())
+    with TestClient(api.app) as client:
+        client.repository = repository
+        yield client
+
+
+def org(number, **fields):
+    return {"name": f"Org {number}", "companyRegistrationNumber": f"R{number}", "industry": "ICT", **fields}
+
+
+def ndjson(*rows):
+    return "\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows) + "\n"
+
+
+def import_body(client, body, content_type="application/x-ndjson", **params):
+    response = client.post("/organizations/import", content=body.encode(), headers={"Content-Type": content_type},
+                           params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_ndjson_errors_are_reported_per_row(client):
+    report = import_body(client, ndjson(
+        org(1, objectives=["Cloud"]),
+        "{not json",
+        "[1, 2]",
+        {"name": "No registration", "industry": "ICT"},
+        org(1),
+        "",
+        org(2),
+    ))
+    assert (report["rows"], report["created"], report["updated"], report["failed"]) == (6, 2, 0, 4)
+    errors = {error["row"]: error["errors"] for error in report["errors"]}
+    assert sorted(errors) == [2, 3, 4, 5]
+    assert errors[2][0]["msg"].startswith("Invalid JSON")
+    assert errors[3][0]["msg"] == "Each line must be a JSON object"
+    assert errors[4][0]["loc"][-1] == "companyRegistrationNumber"
+    assert errors[5][0]["msg"] == "Duplicate of row 1 in this import"
+    assert client.repository.count() == 2
+    assert "recommendations_job" in report
+
+
+def test_csv_aliases_multiline_objectives_and_bad_rows(client):
+    body = (
+        "companyName,registrationNo,industry,objectives\r\n"
+        'Acme,R1,ICT,"Move to cloud\r\nTrain leaders"\r\n'
+        "Beta,R2,ICT,x,extra\r\n"
+        ',R3,ICT,\r\n'
+        'Gamma,R4,ICT,"never closed\r\n'
+    )
+    report = import_body(client, body, "text/csv")
+    assert (report["created"], report["failed"]) == (1, 3)
+    errors = {error["row"]: error["errors"][0]["msg"] for error in report["errors"]}
+    assert errors[4] == "Expected 4 columns, got 5"
+    assert 5 in errors
+    assert errors[6] == "Invalid CSV: unterminated quoted field"
+    stored, = client.repository.find_by_registration("R1")
+    assert stored["name"] == "Acme" and stored["objectives"] == ["Move to cloud", "Train leaders"]
+
+
+def test_reimport_updates_by_registration_number(client):
+    import_body(client, ndjson(org(1), org(2)))
+    first_id = client.repository.registration_ids(["R1"])["R1"]
+    report = import_body(client, ndjson(org(1, vision="New"), org(3)))
+    assert (report["created"], report["updated"]) == (1, 1)
+    assert client.repository.count() == 3
+    assert client.repository.get(first_id)["vision"] == "New"
+
+
+def test_explicit_id_cannot_take_another_organizations_registration(client):
+    import_body(client, ndjson(org(1), org(2)))
+    ids = client.repository.registration_ids(["R1", "R2"])
+    report = import_body(client, ndjson(
+        org(1, organizationID="someoneelse"),
+        org(2, organizationID=ids["R2"], vision="Kept"),
+    ))
+    assert (report["created"], report["updated"], report["failed"]) == (0, 1, 1)
+    assert report["errors"][0]["row"] == 1
+    assert report["errors"][0]["errors"][0]["type"] == "value_error.conflict"
+    assert client.repository.count() == 2
+    assert client.repository.get("someoneelse") is None
+
+
+def test_explicit_id_of_a_stored_organization_counts_as_an_update(client):
+    import_body(client, ndjson(org(1)))
+    org_id = client.repository.registration_ids(["R1"])["R1"]
+    report = import_body(client, ndjson(org(9, organizationID=org_id)))  # ✅ Registration number changed
+    assert (report["created"], report["updated"]) == (0, 1)
+    assert client.repository.get(org_id)["companyRegistrationNumber"] == "R9"
+
+
+def test_dry_run_stores_nothing(client):
+    report = import_body(client, ndjson(org(1), org(2)), dry_run="true")
+    assert report["dry_run"] and report["created"] == 2
+    assert client.repository.count() == 0
+    assert "recommendations_job" not in report
+
+
+def test_rows_the_store_rejects_are_reported(client, monkeypatch):
+    repository = client.repository
+    original = repository.upsert_many
+
+    def reject_r2(records):
+        if any(record["companyRegistrationNumber"] == "R2" for record in records):
+            raise ValueError("constraint failed")
+        return original(records)
+
+    monkeypatch.setattr(repository, "upsert_many", reject_r2)
+    report = import_body(client, ndjson(org(1), org(2), org(3)))
+    assert (report["created"], report["failed"]) == (2, 1)
+    assert report["errors"] == [{
+        "row": 2, "errors": [{"loc": [], "msg": "Could not be stored: constraint failed", "type": "storage_error"}],
+    }]
+    assert sorted(repository.registration_ids(["R1", "R2", "R3"])) == ["R1", "R3"]
+
+
+def test_add_organization_allows_several_companies_but_not_the_same_registration(client):
+    first = client.post("/organization/", json=org(1)).json()
+    second = client.post("/organization/", json=org(2)).json()
+    assert first["organizationID"] != second["organizationID"] and "error" not in second
+    again = client.post("/organization/", json=org(1, name="Renamed")).json()
+    assert "error" in again and again["organizationID"] == first["organizationID"]
+    assert client.repository.count() == 2
+
+
+def test_concurrent_posts_of_one_registration_store_one_organization(client, monkeypatch):
+    repository = client.repository
+    lookup, barrier, calls = repository.registration_ids, threading.Barrier(5), []
+
+    def racing_lookup(numbers):
+        # ✅ Every request passes the pre-check before any of them writes
+        calls.append(numbers)
+        if len(calls) <= 5:
+            barrier.wait(10)
+        return lookup(numbers)
+
+    monkeypatch.setattr(repository, "registration_ids", racing_lookup)
+    with ThreadPoolExecutor(5) as pool:
+        responses = list(pool.map(lambda _: client.post("/organization/", json=org(1)).json(), range(5)))
+
+    assert repository.count() == 1
+    stored_id = lookup(["R1"])["R1"]
+    assert all(response["organizationID"] == stored_id for response in responses)
+    assert sum("error" in response for response in responses) == 4
+
+
+def test_import_reports_a_registration_claimed_after_validation(client, monkeypatch):
+    import_body(client, ndjson(org(1)))
+    # ✅ Validation misses the stored owner, as it would if a concurrent write committed in between
+    monkeypatch.setattr(client.repository, "registration_ids", lambda numbers: {})
+    report = import_body(client, ndjson(org(1, vision="Late"), org(2)))
+    assert (report["created"], report["failed"]) == (1, 1)
+    error, = report["errors"][0]["errors"]
+    assert (error["loc"], error["type"]) == (["companyRegistrationNumber"], "value_error.conflict")
+    assert client.repository.count() == 2
+
+
+def test_identical_reimport_does_not_change_the_history_rollups(client, tmp_path, monkeypatch):
+    history = TrainingHistory(str(tmp_path / "history"))
+    monkeypatch.setattr(training_history, "training_history", history)
+    programs = [{"Year": "2024", "Title": "Python", "Field": "IT", "Type": "Course", "Mode": "Online",
+                 "Attendees": "Staff"}]
+    body = ndjson(org(1, trainingPrograms=programs), org(2))
+
+    import_body(client, body)
+    org_id = client.repository.registration_ids(["R1"])["R1"]
+    before = (history.stats()["program_rows"], history.coverage(org_id), history.coverage())
+    report = import_body(client, body)
+
+    assert (report["created"], report["updated"]) == (0, 2)
+    assert before[0] == 1
+    assert (history.stats()["program_rows"], history.coverage(org_id), history.coverage()) == before
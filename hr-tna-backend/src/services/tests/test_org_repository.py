@@ -0,0 +1,106 @@
+import json
+import sqlite3
+import pytest
+from org_repository import (
+    DuplicateRegistration, JsonOrganizationRepository, OrganizationRepository, SqliteOrganizationRepository,
+    migrate_json, normalize_record,
+)
+
+
+@pytest.fixture(params=["sqlite", "json"])
+def repository(request, tmp_path):
+    if request.param == "sqlite":
+        return SqliteOrganizationRepository(str(tmp_path / "organizations.sqlite3"))
+    return JsonOrganizationRepository(str(tmp_path / "organizations.json"))
+
+
+def organization(number, **fields):
+    return {"name": f"Org {number}", "companyRegistrationNumber": f"R{number}", "industry": "ICT", **fields}
+
+
+def test_upsert_get_and_lookups(repository):
+    stored = repository.upsert_many([organization(1), organization(2, industry="Retail")])
+    assert all(len(record["organizationID"]) == 11 for record in stored)
+    assert repository.count() == 2
+    assert repository.first()["name"] == "Org 1"
+    assert repository.get(stored[1]["organizationID"])["industry"] == "Retail"
+    assert [r["name"] for r in repository.find_by_industry("ICT")] == ["Org 1"]
+    assert repository.registration_ids(["R2", "R9"]) == {"R2": stored[1]["organizationID"]}
+    assert [r["name"] for r in repository.iter_all()] == ["Org 1", "Org 2"]
+
+
+def test_upsert_replaces_by_id_and_bumps_version(repository):
+    record = repository.upsert(organization(1))
+    before = repository.version()
+    repository.upsert({**record, "name": "Renamed"})
+    assert repository.count() == 1
+    assert repository.get(record["organizationID"])["name"] == "Renamed"
+    assert repository.version() != before
+
+
+def test_stale_recommendations(repository):
+    first, second = repository.upsert_many([organization(1), organization(2)])
+    repository.put_recommendations(first["organizationID"], {
+        "fingerprint": "f", "model_id": "m", "catalogue_version": "c", "training_recommendations": [],
+    })
+    assert repository.stale_recommendations("m", "c") == [second["organizationID"]]
+    assert repository.stale_recommendations("m", "c2") == [first["organizationID"], second["organizationID"]]
+
+
+def test_normalize_record_maps_form_aliases():
+    record = normalize_record({
+        "companyName": "Acme", "registrationNo": "R1", "objectives": [{"value": "Grow"}, {"value": ""}, "Hire"],
+    })
+    assert record == {"name": "Acme", "companyRegistrationNumber": "R1", "objectives": ["Grow", "Hire"]}
+
+
+def test_backends_must_implement_the_interface():
+    class Incomplete(OrganizationRepository):
+        def get(self, org_id):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_registration_numbers_are_unique(repository):
+    first = repository.upsert(organization(1))
+    with pytest.raises(DuplicateRegistration):
+        repository.upsert(organization(1, name="Copy"))
+    with pytest.raises(DuplicateRegistration):
+        repository.upsert_many([organization(2), organization(2, name="Copy")])
+    # ✅ A rejected batch stores nothing; the owner may still update its own record
+    assert repository.count() == 1
+    repository.upsert({**first, "name": "Renamed"})
+    assert repository.registration_ids(["R1"]) == {"R1": first["organizationID"]}
+
+
+def test_legacy_duplicates_are_removed_when_the_index_becomes_unique(tmp_path):
+    path = str(tmp_path / "organizations.sqlite3")
+    SqliteOrganizationRepository(path).count()  # ✅ Creates the schema
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("DROP INDEX idx_org_registration")
+        conn.execute("CREATE INDEX idx_org_registration ON organizations (companyRegistrationNumber)")
+        conn.executemany(
+            "INSERT INTO organizations (organizationID, companyRegistrationNumber, industry, name, data, "
+            "created_at, updated_at) VALUES (?, ?, 'ICT', ?, ?, 0, 0)",
+            [(org_id, number, org_id, json.dumps({"organizationID": org_id, "companyRegistrationNumber": number}))
+             for org_id, number in [("A", "R1"), ("B", "R1"), ("C", "R2"), ("D", "R1")]],
+        )
+    conn.close()
+
+    repository = SqliteOrganizationRepository(path)
+    assert sorted(r["organizationID"] for r in repository.iter_all()) == ["A", "C"]
+    with pytest.raises(DuplicateRegistration):
+        repository.upsert(organization(2))
+
+
+def test_migrate_json_skips_duplicate_registrations(tmp_path):
+    legacy = tmp_path / "organizations.json"
+    legacy.write_text(json.dumps([
+        organization(1, organizationID="FIRST"), organization(1, organizationID="SECOND"), organization(2),
+    ]), encoding="utf-8")
+    repository = SqliteOrganizationRepository(str(tmp_path / "organizations.sqlite3"))
+    assert migrate_json(str(legacy), repository) == 2
+    assert repository.registration_ids(["R1"]) == {"R1": "FIRST"}
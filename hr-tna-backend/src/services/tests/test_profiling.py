@@ -0,0 +1,33 @@
+import asyncio
+import logging
+import profiling
+
+
+class Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_background_save_errors_are_logged():
+    handler = Records()
+    profiling.log.addHandler(handler)
+
+    def failing_save(samples, meta):
+        raise OSError("disk full")
+
+    async def save_in_background():
+        saving = asyncio.get_running_loop().run_in_executor(None, failing_save, {}, {})
+        saving.add_done_callback(profiling.log_save_failure)
+        await asyncio.gather(saving, return_exceptions=True)
+        await asyncio.sleep(0)  # ✅ Done-callbacks run on the next loop iteration
+
+    try:
+        asyncio.run(save_in_background())
+    finally:
+        profiling.log.removeHandler(handler)
+    assert [record.getMessage() for record in handler.records] == ["Saving profile failed"]
+    assert "disk full" in str(handler.records[0].exc_info[1])
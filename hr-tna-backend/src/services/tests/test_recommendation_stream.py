@@ -0,0 +1,66 @@
+import json
+import threading
+import pytest
+from fastapi.testclient import TestClient
+from org_repository import SqliteOrganizationRepository
+from skill_index import SkillIndex, catalogue_hash
+from vector_search import ExactIndex
+import training_analytics_api as api
+
+SKILLS = ["Cloud Computing", "Cybersecurity", "Leadership", "Data Analysis", "Customer Service", "Negotiation"]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch, stub_encoder):
+    """Stream endpoint over a stub-encoded catalogue; records the thread of every step."""
+    threads = {"encode": set(), "search": set(), "rank": set()}
+    index = SkillIndex(SKILLS, stub_encoder.encode(SKILLS, normalize_embeddings=True), "stub", catalogue_hash(SKILLS))
+    search_index = ExactIndex(index.embeddings)
+    search, rank = search_index.search, api.rank_skills
+
+    async def encode(texts):
+        threads["encode"].add(threading.get_ident())
+        return stub_encoder.encode(list(texts), normalize_embeddings=True)
+
+    def recording_search(queries, k):
+        threads["search"].add(threading.get_ident())
+        return search(queries, k)
+
+    def recording_rank(*args):
+        threads["rank"].add(threading.get_ident())
+        return rank(*args)
+
+    monkeypatch.setattr(search_index, "search", recording_search)
+    monkeypatch.setattr(api, "rank_skills", recording_rank)
+    monkeypatch.setattr(api, "encode_texts_async", encode)
+    monkeypatch.setattr(api, "load_wef_skill_index", lambda: index)
+    monkeypatch.setattr(api, "load_skill_search_index", lambda: search_index)
+    monkeypatch.setattr(api, "STREAM_CHUNK", 2)
+    repository = SqliteOrganizationRepository(str(tmp_path / "organizations.sqlite3"))
+    repository.upsert({
+        "organizationID": "ORG-1", "name": "Acme", "companyRegistrationNumber": "R1", "industry": "ICT",
+        "objectives": ["Move to cloud computing", "Harden cybersecurity", "Train leadership"],
+        "vision": "Best customer service",
+    })
+    monkeypatch.setattr(api, "org_repository", repository)
+    monkeypatch.setattr(api.job_workers, "workers", 0)
+    with TestClient(api.app) as client:
+        client.threads = threads
+        yield client
+
+
+def test_stream_scores_chunks_off_the_event_loop(client):
+    response = client.get("/generate_training_recommendations/stream",
+                          params={"organization_id": "ORG-1", "format": "ndjson", "per_objective": 2})
+    events = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [event["event"] for event in events] == ["objective", "objective", "ranking",
+                                                    "objective", "objective", "ranking", "done"]
+    assert [event["partial"] for event in events if event["event"] == "ranking"] == [True, False]
+    assert events[0]["skills"][0]["skill"] == "Cloud Computing"
+    assert len(events[-2]["training_recommendations"]) > 0
+
+    threads = client.threads
+    assert len(threads["encode"]) == 1
+    assert threads["search"] and threads["rank"]
+    assert not (threads["search"] | threads["rank"]) & threads["encode"]
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import pytest
+import recommendations
+from org_repository import SqliteOrganizationRepository
+from recommendations import RecommendationEngine
+from skill_index import SkillIndex, catalogue_hash
+from vector_search import ExactIndex
+
+SKILLS = [
+    "Cloud Computing", "Cybersecurity", "Leadership", "Data Analysis", "Customer Service",
+    "Project Management", "Digital Marketing", "Safety Training", "Negotiation", "Public Speaking",
+]
+
+
+@pytest.fixture
+def engine(tmp_path, stub_encoder):
+    index = SkillIndex(SKILLS, stub_encoder.encode(SKILLS, normalize_embeddings=True), "stub", catalogue_hash(SKILLS))
+    search_index = ExactIndex(index.embeddings)
+    encoded = []
+
+    async def encode(texts):
+        encoded.extend(texts)
+        await asyncio.sleep(0.01)  # ✅ Yield like the real embedding service, so calls interleave
+        return stub_encoder.encode(list(texts), normalize_embeddings=True)
+
+    repository = SqliteOrganizationRepository(str(tmp_path / "organizations.sqlite3"))
+    engine = RecommendationEngine(repository, encode, lambda: index, lambda: search_index, "stub")
+    engine.encoded = encoded
+    return engine
+
+
+def organization(engine, **fields):
+    record = {
+        "name": "Acme", "companyRegistrationNumber": "R1", "industry": "ICT",
+        "objectives": ["Move services to cloud computing", "Train leadership"], "vision": "Digital leader",
+        **fields,
+    }
+    return engine.repository.upsert(record)
+
+
+def test_context_edits_reuse_per_objective_results(engine):
+    org = organization(engine)
+    first = asyncio.run(engine.refresh(org))
+    assert first["recomputed_objectives"] == 2
+
+    changed = {**org, "vision": "Best customer service in the region", "mission": "Safety first"}
+    second = asyncio.run(engine.refresh(changed))
+    assert second["recomputed_objectives"] == 0
+    assert second["objectives"] == first["objectives"]
+    assert second["training_recommendations"] != first["training_recommendations"]
+    assert second["fingerprint"] != first["fingerprint"]
+
+
+def test_new_objectives_are_the_only_ones_scored(engine):
+    org = organization(engine)
+    asyncio.run(engine.refresh(org))
+    entry = asyncio.run(engine.refresh({**org, "objectives": org["objectives"] + ["Improve negotiation"]}))
+    assert entry["recomputed_objectives"] == 1
+
+
+def test_concurrent_gets_compute_once(engine):
+    org = organization(engine)
+
+    async def burst():
+        return await asyncio.gather(*(engine.get(org) for _ in range(5)))
+
+    entries = asyncio.run(burst())
+    assert len({entry["computed_at"] for entry in entries}) == 1
+    assert engine.encoded.count("Digital leader") == 1  # ✅ One pooled ranking for the whole burst
+
+
+def test_refreshes_of_one_organization_apply_in_call_order(engine):
+    org = organization(engine)
+    versions = [{**org, "vision": f"Vision {i}", "objectives": [f"Objective {i}"]} for i in range(4)]
+
+    async def racing_refreshes():
+        await asyncio.gather(*(engine.refresh(version) for version in versions))
+        return await engine.get(versions[-1])
+
+    entry = asyncio.run(racing_refreshes())
+    assert list(entry["objectives"]) == ["Objective 3"]
+    assert engine.hits == 1
+
+
+def test_search_and_ranking_run_off_the_event_loop(engine, monkeypatch):
+    threads = {}
+    search_index = engine.load_search_index()
+    search, rank = search_index.search, recommendations.rank_skills
+
+    def recording_search(queries, k):
+        threads["search"] = threading.get_ident()
+        return search(queries, k)
+
+    def recording_rank(*args):
+        threads["rank"] = threading.get_ident()
+        return rank(*args)
+
+    monkeypatch.setattr(search_index, "search", recording_search)
+    monkeypatch.setattr(recommendations, "rank_skills", recording_rank)
+
+    async def refresh():
+        await engine.refresh(organization(engine))
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(refresh())
+    assert set(threads) == {"search", "rank"}
+    assert loop_thread not in threads.values()
@@ -0,0 +1,116 @@
+import gzip
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+import response_cache
+from response_cache import CachedBody, ResponseCache, cached_response, serialize
+
+PAYLOAD = {"sectors": {"Services": [f"Industry {i}" for i in range(100)]}}
+
+
+def request(**headers):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def test_identity_body_with_strong_etag():
+    cached = CachedBody(PAYLOAD)
+    response = cached_response(request(), cached)
+    assert response.status_code == 200
+    assert response.body == serialize(PAYLOAD)
+    assert response.headers["etag"] == cached.etag and not cached.etag.startswith("W/")
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert "content-encoding" not in response.headers
+
+
+def test_etag_changes_with_the_content():
+    assert CachedBody(PAYLOAD).etag == CachedBody(dict(PAYLOAD)).etag
+    assert CachedBody(PAYLOAD).etag != CachedBody({"sectors": {}}).etag
+
+
+def test_matching_if_none_match_is_304_without_body():
+    cached = CachedBody(PAYLOAD)
+    response = cached_response(request(if_none_match=f'"other", {cached.etag}'), cached)
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == cached.etag
+    assert cached_response(request(if_none_match="*"), cached).status_code == 304
+    assert cached_response(request(if_none_match='"other"'), cached).status_code == 200
+
+
+def test_gzip_variant_and_its_tag_revalidate():
+    cached = CachedBody(PAYLOAD)
+    response = cached_response(request(accept_encoding="deflate, gzip;q=0.8"), cached)
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(response.body) == cached.body
+    variant_tag = response.headers["etag"]
+    assert variant_tag == cached.etag[:-1] + '-gzip"'
+
+    # ✅ Proxies may weaken the tag; either form maps back to the same content
+    for tag in (variant_tag, "W/" + variant_tag, "W/" + cached.etag):
+        assert cached_response(request(if_none_match=tag), cached).status_code == 304
+
+    # ✅ The 304 carries the tag of the variant this client would have been sent
+    revalidated = cached_response(request(accept_encoding="gzip", if_none_match=variant_tag), cached)
+    assert revalidated.status_code == 304 and revalidated.headers["etag"] == variant_tag
+    assert cached_response(request(if_none_match=variant_tag), cached).headers["etag"] == cached.etag
+
+
+def test_refused_encodings_fall_back_to_identity():
+    cached = CachedBody(PAYLOAD)
+    response = cached_response(request(accept_encoding="gzip;q=0, identity"), cached)
+    assert "content-encoding" not in response.headers
+    assert response.body == cached.body
+
+
+def test_brotli_preferred_when_available():
+    brotli = pytest.importorskip("brotli")
+    cached = CachedBody(PAYLOAD)
+    response = cached_response(request(accept_encoding="gzip, br"), cached)
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(response.body) == cached.body
+
+
+def test_br_without_brotli_serves_identity(monkeypatch):
+    monkeypatch.setattr(response_cache, "brotli", None)
+    cached = CachedBody(PAYLOAD)
+    assert "br" not in cached.encoded
+    assert "content-encoding" not in cached_response(request(accept_encoding="br"), cached).headers
+
+
+def test_small_bodies_are_not_precompressed():
+    cached = CachedBody({"ok": True})
+    assert cached.encoded == {}
+    assert "content-encoding" not in cached_response(request(accept_encoding="gzip"), cached).headers
+
+
+def test_response_cache_rebuilds_only_on_new_versions():
+    cache = ResponseCache(max_entries=2)
+    builds = []
+
+    def build(value):
+        builds.append(value)
+        return {"value": value}
+
+    first = cache.get("a", 1, lambda: build("a1"))
+    assert cache.get("a", 1, lambda: build("again")) is first
+    assert cache.get("a", 2, lambda: build("a2")).etag != first.etag
+    cache.get("b", 1, lambda: build("b1"))
+    cache.get("c", 1, lambda: build("c1"))  # ✅ evicts "a", the least recently used
+    cache.get("a", 2, lambda: build("a2 rebuilt"))
+    assert builds == ["a1", "a2", "b1", "c1", "a2 rebuilt"]
+    assert (cache.hits, cache.misses) == (1, 5)
+
+
+def test_industries_endpoint_revalidates():
+    import training_analytics_api as api
+
+    client = TestClient(api.app)
+    first = client.get("/industries/", headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200 and first.headers["content-encoding"] == "gzip"
+    again = client.get("/industries/", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
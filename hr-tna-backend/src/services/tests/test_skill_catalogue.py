@@ -0,0 +1,42 @@
+import skill_catalogue
+from skill_catalogue import catalogue_skills, extract_skills, load_catalogue, parse_skills, write_catalogue
+
+PAGES = [
+    {"page": 1, "text": "1. Technology skills\n• AI & Big Data\n• Cloud Computing\n2. Leadership"},
+    {"page": 2, "text": "• Coaching\n• ai and big data\nResilience, flexibility 45%"},
+]
+
+
+def test_parse_skills_returns_the_last_heading_even_without_skills():
+    skills, category = parse_skills(PAGES[0]["text"])
+    assert skills == [("AI & Big Data", "Technology skills"), ("Cloud Computing", "Technology skills")]
+    assert category == "Leadership"
+    assert parse_skills("no skills here", "Leadership") == ([], "Leadership")
+
+
+def test_extract_skills_carries_headings_across_pages(tmp_path, monkeypatch):
+    report = tmp_path / "report.pdf"
+    report.write_bytes(b"%PDF")
+    monkeypatch.setattr(skill_catalogue, "extract_pages", lambda path, keywords: PAGES)
+
+    rows = extract_skills([(str(report), ())])
+    assert [(row["name"], row["category"], row["page"]) for row in rows] == [
+        ("AI & Big Data", "Technology skills", 1),
+        ("Cloud Computing", "Technology skills", 1),
+        ("Coaching", "Leadership", 2),
+        ("Resilience, flexibility", "Leadership", 2),
+    ]
+
+
+def test_catalogue_round_trip(tmp_path):
+    rows = [
+        {"name": "Coaching", "category": "Leadership", "source": "report.pdf", "page": 2},
+        {"name": "Cloud Computing", "category": "Technology", "source": "report.pdf", "page": 1},
+    ]
+    version = write_catalogue(rows, str(tmp_path))
+    catalogue = load_catalogue(str(tmp_path))
+    assert catalogue.version == version
+    assert list(catalogue) == ["Coaching", "Cloud Computing"]
+    assert catalogue.record(0)["category"] == "Leadership"
+    assert catalogue_skills(catalogue)[1] == catalogue.content_hash
+    assert catalogue_skills(None)[0] == skill_catalogue.WEF_SKILLS
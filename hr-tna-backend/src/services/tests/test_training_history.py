@@ -0,0 +1,151 @@
+import json
+import multiprocessing
+import os
+import numpy as np
+import pytest
+import training_history
+from training_history import ALL_TENANTS, TrainingHistory
+
+
+def program(year, title, field, mode="Online", attendees="Staff", kind="Course"):
+    return {"Year": year, "Title": title, "Field": field, "Type": kind, "Mode": mode, "Attendees": attendees}
+
+
+ACME = [
+    program("2023", "Excel basics", "IT", attendees="Staff, Managers"),
+    program("2023", "Leadership", "Management", mode="Physical", attendees="Managers"),
+    program("2024", "Python", "IT", attendees="Staff"),
+]
+GLOBEX = [program("2024", "Safety", "HSE", mode="Physical", attendees="Operators")]
+
+
+def rollup_rows(history, tenant):
+    code = ALL_TENANTS if tenant is None else history.dictionaries["tenant"].codes[tenant]
+    return history._connection().execute(
+        "SELECT name, a, b, total FROM rollups WHERE tenant = ? ORDER BY name, a, b", (code,)
+    ).fetchall()
+
+
+def ingest_worker(path, tenant, batches):
+    history = TrainingHistory(path)
+    for i in range(batches):
+        history.ingest([program(str(2020 + i % 3), f"{tenant} course {i}", f"Field {i % 4}")], tenant)
+
+
+def test_rollup_queries(tmp_path):
+    history = TrainingHistory(str(tmp_path))
+    assert history.ingest(ACME, "acme") == 3
+    history.ingest(GLOBEX, "globex")
+
+    assert history.coverage("acme") == {"years": ["2023", "2024"], "fields": ["IT", "Management"], "counts": [[1, 1], [1, 0]]}
+    assert history.coverage()["counts"] == [[1, 1], [1, 0], [0, 1]]
+    assert history.coverage("unknown")["fields"] == []
+    assert history.mode_mix("acme") == [
+        {"year": "2023", "total": 2, "modes": {"Online": 1, "Physical": 1}, "online_share": 0.5},
+        {"year": "2024", "total": 1, "modes": {"Online": 1}, "online_share": 1.0},
+    ]
+    assert history.attendee_gaps("acme") == [
+        {"attendee": "Managers", "participations": 2, "fields_covered": ["IT", "Management"], "gaps": []},
+        {"attendee": "Staff", "participations": 2, "fields_covered": ["IT"], "gaps": ["Management"]},
+    ]
+
+    titles, fields, membership, levels = history.programs("acme")
+    assert sorted(zip(titles, fields)) == [("Excel basics", "IT"), ("Leadership", "Management"), ("Python", "IT")]
+    assert membership[titles.index("Excel basics"), levels.index("Managers")]
+    assert history.stats()["program_rows"] == 4 and history.stats()["attendee_rows"] == 5
+
+
+def test_rollups_are_sparse_per_tenant(tmp_path):
+    history = TrainingHistory(str(tmp_path))
+    history.ingest(ACME, "acme")
+    before = rollup_rows(history, "acme")
+    # ✅ Only occupied cells: 3 field x year, 3 mode x year, 2 type x year, 3 attendee x field
+    assert len(before) == 11
+
+    for i in range(20):
+        history.ingest([program("2025", f"Course {i}", f"Field {i}")], f"tenant-{i}")
+    # ✅ Other tenants' imports add their own rows and never rewrite this tenant's
+    assert rollup_rows(history, "acme") == before
+    assert sum(row[3] for row in rollup_rows(history, None) if row[0] == "field_year") == 23
+
+
+def test_ingest_appends(tmp_path):
+    history = TrainingHistory(str(tmp_path))
+    history.ingest(ACME, "acme")
+    history.ingest(ACME, "acme")
+    assert history.coverage("acme")["counts"] == [[2, 2], [2, 0]]
+
+
+def test_instances_share_the_store(tmp_path):
+    first, second = TrainingHistory(str(tmp_path)), TrainingHistory(str(tmp_path))
+    first.ingest(ACME, "acme")
+    second.ingest(GLOBEX, "globex")
+    first.ingest([program("2025", "Forklift", "HSE", attendees="Operators")], "globex")
+
+    for history in (first, second):
+        assert history.chunks == ["chunk-000001", "chunk-000002", "chunk-000003"]
+        assert history.coverage("globex") == {"years": ["2023", "2024", "2025"], "fields": ["HSE"], "counts": [[0, 1, 1]]}
+        assert history.stats()["cardinality"]["field"] == 3
+    titles, _, _, _ = second.programs("globex")
+    assert sorted(titles) == ["Forklift", "Safety"]
+
+
+def test_concurrent_processes_never_collide(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=ingest_worker, args=(str(tmp_path), f"t{n}", 5)) for n in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+
+    history = TrainingHistory(str(tmp_path))
+    assert history.program_rows == 20
+    assert len(set(history.chunks)) == 20
+    assert int(np.sum(history.coverage()["counts"])) == 20
+    assert all(int(np.sum(history.coverage(f"t{n}")["counts"])) == 5 for n in range(4))
+    assert len(history.columns()["title"]) == 20
+
+
+def test_failed_import_leaves_no_trace(tmp_path, monkeypatch):
+    history = TrainingHistory(str(tmp_path))
+    history.ingest(ACME, "acme")
+
+    def broken_save(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(training_history.np, "save", broken_save)
+    with pytest.raises(OSError):
+        history.ingest([program("2030", "Quantum", "Physics")], "acme")
+    monkeypatch.undo()
+
+    assert "Physics" not in history.dictionaries["field"].codes
+    assert history.stats()["program_rows"] == 3
+    history.ingest([program("2030", "Quantum", "Physics")], "acme")
+    assert TrainingHistory(str(tmp_path)).coverage("acme")["fields"] == ["IT", "Management", "Physics"]
+
+
+def test_legacy_store_is_migrated(tmp_path):
+    """A store written before the SQLite catalogue: meta.json, dense rollups and chunk columns."""
+    dictionaries = {"tenant": ["acme"], "year": ["2023"], "title": ["Excel"], "field": ["IT"],
+                    "type": ["Course"], "mode": ["Online"], "attendee": ["Staff", "Managers"]}
+    chunk_dir = tmp_path / "chunk-000000"
+    chunk_dir.mkdir()
+    for name in ("tenant", "year", "title", "field", "type", "mode", "attendee_program"):
+        np.save(chunk_dir / f"{name}.npy", np.zeros(1, dtype=np.int32))
+    np.save(chunk_dir / "attendee_attendee.npy", np.zeros(1, dtype=np.int32))
+    np.savez(tmp_path / "rollups-000000.npz", field_year=np.ones((1, 1, 1), dtype=np.int64),
+             mode_year=np.ones((1, 1, 1), dtype=np.int64), type_year=np.ones((1, 1, 1), dtype=np.int64),
+             attendee_field=np.ones((1, 1, 1), dtype=np.int64))
+    (tmp_path / "meta.json").write_text(json.dumps({
+        "dictionaries": dictionaries, "chunks": ["chunk-000000"], "program_rows": 1, "attendee_rows": 1,
+        "rollups_file": "rollups-000000.npz",
+    }), encoding="utf-8")
+
+    history = TrainingHistory(str(tmp_path))
+    assert history.coverage("acme") == {"years": ["2023"], "fields": ["IT"], "counts": [[1]]}
+    assert not os.path.exists(tmp_path / "meta.json")
+    history.ingest([program("2024", "Python", "IT", attendees="Managers")], "acme")
+    assert history.chunks == ["chunk-000000", "chunk-000002"]
+    assert history.coverage()["counts"] == [[1, 1]]
+    assert history.programs("acme")[0] == ["Excel", "Python"]
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+import vector_search
+from vector_search import ExactIndex, IVFIndex, VectorIndex, create_index, top_k
+
+
+def clustered_vectors(n, dim=32, clusters=40, seed=0):
+    """L2-normalized points around random centres, like sentence embeddings of a skill catalogue."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim))
+    vectors = centres[rng.integers(0, clusters, n)] + 0.35 * rng.normal(size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def brute_force(vectors, queries, k):
+    ids = np.argsort(-(queries @ vectors.T), axis=1, kind="stable")[:, :k]
+    return ids
+
+
+def recall(found, expected):
+    return np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, expected)])
+
+
+def test_top_k_is_sorted_and_clamped():
+    scores, ids = top_k(np.array([[0.1, 0.9, 0.5, 0.7]]), 3)
+    assert ids.tolist() == [[1, 3, 2]]
+    np.testing.assert_allclose(scores, [[0.9, 0.7, 0.5]])
+    assert top_k(np.array([[0.2, 0.1]]), 5)[1].tolist() == [[0, 1]]
+
+
+def test_exact_blocked_scan_matches_brute_force(monkeypatch):
+    monkeypatch.setattr(vector_search, "BLOCK_SIZE", 64)
+    vectors = clustered_vectors(1000)
+    queries = clustered_vectors(20, seed=1)
+    _, ids = ExactIndex(vectors).search(queries, 10)
+    assert ids.tolist() == brute_force(vectors, queries, 10).tolist()
+
+
+def test_ivf_recall_against_exact_search():
+    vectors = clustered_vectors(5000)
+    queries = clustered_vectors(50, seed=2)
+    expected = ExactIndex(vectors).search(queries, 10)[1]
+
+    assert recall(IVFIndex(vectors, nprobe=8).search(queries, 10)[1], expected) >= 0.9
+    # ✅ Probing every cell is exhaustive
+    index = IVFIndex(vectors, nlist=16, nprobe=16)
+    assert recall(index.search(queries, 10)[1], expected) == 1.0
+
+
+def test_hnsw_recall_against_exact_search():
+    pytest.importorskip("hnswlib")
+    vectors = clustered_vectors(5000)
+    queries = clustered_vectors(50, seed=3)
+    expected = ExactIndex(vectors).search(queries, 10)[1]
+    found = create_index(vectors, "hnsw").search(queries, 10)[1]
+    assert recall(found, expected) >= 0.95
+
+
+def test_create_index_auto_and_unknown(monkeypatch):
+    monkeypatch.setattr(vector_search, "EXACT_MAX_ITEMS", 100)
+    assert create_index(clustered_vectors(50), "auto").kind == "exact"
+    assert create_index(clustered_vectors(500), "auto").kind in ("ivf", "hnsw")
+    with pytest.raises(ValueError):
+        create_index(clustered_vectors(10), "annoy")
+
+
+@pytest.mark.parametrize("kind", ["exact", "ivf"])
+def test_empty_catalogue_builds_an_empty_index(kind):
+    index = create_index(np.zeros((0, 16), dtype=np.float32), kind)
+    scores, ids = index.search(np.ones((2, 16), dtype=np.float32), 5)
+    assert len(index) == 0
+    assert scores.shape == ids.shape == (2, 0)
+
+
+def test_backends_must_implement_the_interface():
+    class Incomplete(VectorIndex):
+        def __len__(self):
+            return 0
+
+    with pytest.raises(TypeError):
+        Incomplete()
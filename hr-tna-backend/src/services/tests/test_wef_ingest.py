@@ -0,0 +1,224 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import wef_ingest
+from wef_ingest import PageCache, download_report, extract_pages, matches_keywords
+
+PAGES = [
+    "Introduction to the report",
+    "Skills Outlook for 2030",
+    "Regional tables",
+    "Top Skills of 2025",
+]
+
+
+def write_pdf(path, pages):
+    """Minimal one-font PDF with one line of text per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    body, offsets = b"%PDF-1.4\n", []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(body))
+        body += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    body += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as f:
+        f.write(body)
+    return path
+
+
+@pytest.fixture
+def extracted(monkeypatch):
+    """Record which pages each extraction pass actually opened."""
+    calls = []
+    extract_chunk = wef_ingest._extract_chunk
+
+    def recording(path, page_numbers, keywords, need_layout):
+        calls.append((sorted(page_numbers), sorted(need_layout)))
+        return extract_chunk(path, page_numbers, keywords, need_layout)
+
+    monkeypatch.setattr(wef_ingest, "_extract_chunk", recording)
+    return calls
+
+
+def test_keywords_match_across_line_breaks_and_case():
+    assert matches_keywords("The  top\nskills of 2025", ["Top Skills"])
+    assert not matches_keywords("Regional tables", ["Top Skills", "Skills Outlook"])
+    assert matches_keywords("anything", [])
+
+
+@pytest.mark.parametrize("pdfium", [True, False])
+def test_only_keyword_pages_get_layout_text(tmp_path, monkeypatch, extracted, pdfium):
+    if pdfium:
+        pytest.importorskip("pypdfium2")
+    else:
+        monkeypatch.setattr(wef_ingest, "pypdfium2", None)
+    path = write_pdf(str(tmp_path / "report.pdf"), PAGES)
+    cache = PageCache(str(tmp_path / "pages.sqlite3"))
+
+    pages = extract_pages(path, ("Skills Outlook", "Top Skills"), workers=1, cache=cache)
+
+    assert [page["page"] for page in pages] == [2, 4]
+    assert "Top Skills of 2025" in pages[1]["text"]
+    layouts = [layout for _, layout in cache.get_many(cache.page_keys_for(wef_ingest.file_sha256(path))).values()]
+    # ✅ Without pdfium the quick pass is pdfplumber itself, so every page has layout text
+    assert sum(layout is None for layout in layouts) == (2 if pdfium else 0)
+
+
+def test_page_cache_skips_unchanged_pages(tmp_path, extracted):
+    cache = PageCache(str(tmp_path / "pages.sqlite3"))
+    first = write_pdf(str(tmp_path / "v1.pdf"), PAGES)
+    expected = extract_pages(first, ("Top Skills",), workers=1, cache=cache)
+    assert extracted == [([0, 1, 2, 3], [])]
+
+    # ✅ Same file again: nothing is extracted
+    assert extract_pages(first, ("Top Skills",), workers=1, cache=cache) == expected
+    assert len(extracted) == 1
+
+    # ✅ A new edition with one changed page only re-extracts that page
+    second = write_pdf(str(tmp_path / "v2.pdf"), PAGES[:2] + ["Regional tables, revised"] + PAGES[3:])
+    assert extract_pages(second, ("Top Skills",), workers=1, cache=cache) == expected
+    assert extracted[1] == ([2], [])
+
+
+def test_new_keyword_only_adds_layout_for_cached_matches(tmp_path, extracted):
+    pytest.importorskip("pypdfium2")
+    cache = PageCache(str(tmp_path / "pages.sqlite3"))
+    path = write_pdf(str(tmp_path / "report.pdf"), PAGES)
+    extract_pages(path, ("Top Skills",), workers=1, cache=cache)
+
+    pages = extract_pages(path, ("Regional",), workers=1, cache=cache)
+    assert [page["page"] for page in pages] == [3]
+    assert extracted[1] == ([2], [2])
+
+
+# ✅ Download resume against a local server ----------------------------------------------
+
+class ReportServer(ThreadingHTTPServer):
+    """Serves `body` with Range/If-Range; `misbehave` makes 206s start at byte 0."""
+
+    def __init__(self, body, etag='"v1"'):
+        super().__init__(("127.0.0.1", 0), ReportHandler)
+        self.body = body
+        self.etag = etag
+        self.misbehave = False
+        self.requests = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/report.pdf"
+
+
+class ReportHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server, body = self.server, self.server.body
+        requested = self.headers.get("Range")
+        server.requests.append((requested, self.headers.get("If-Range")))
+        if requested and self.headers.get("If-Range") in (None, server.etag):
+            start = int(requested.split("=")[1].rstrip("-"))
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(body)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            start = 0 if server.misbehave else start
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+            body = body[start:]
+        else:
+            self.send_response(200)
+        self.send_header("ETag", server.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def report_server():
+    server = ReportServer(bytes(range(256)) * 64)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def partial(path, data, validator='"v1"'):
+    with open(f"{path}.part", "wb") as f:
+        f.write(data)
+    with open(f"{path}.part.json", "w", encoding="utf-8") as f:
+        json.dump({"url": "http://127.0.0.1/report.pdf", "validator": validator}, f)
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_download_streams_to_part_then_renames(tmp_path, report_server):
+    path = str(tmp_path / "report.pdf")
+    assert download_report(report_server.url, path, chunk_size=1000) == path
+    assert read(path) == report_server.body
+    assert not os.path.exists(f"{path}.part") and not os.path.exists(f"{path}.part.json")
+    assert report_server.requests == [(None, None)]
+
+
+def test_download_resumes_from_the_part_offset(tmp_path, report_server):
+    path = str(tmp_path / "report.pdf")
+    partial(path, report_server.body[:5000])
+    download_report(report_server.url, path)
+    assert read(path) == report_server.body
+    assert report_server.requests == [("bytes=5000-", '"v1"')]
+
+
+def test_download_restarts_when_the_file_changed_upstream(tmp_path, report_server):
+    path = str(tmp_path / "report.pdf")
+    partial(path, b"old edition bytes")
+    report_server.etag = '"v2"'
+    download_report(report_server.url, path)
+    assert read(path) == report_server.body
+    assert len(report_server.requests) == 1
+
+
+def test_download_restarts_when_206_starts_elsewhere(tmp_path, report_server):
+    path = str(tmp_path / "report.pdf")
+    partial(path, report_server.body[:5000])
+    report_server.misbehave = True
+    download_report(report_server.url, path)
+    assert read(path) == report_server.body
+    assert report_server.requests == [("bytes=5000-", '"v1"'), (None, None)]
+
+
+def test_download_finishes_a_complete_part_on_416(tmp_path, report_server):
+    path = str(tmp_path / "report.pdf")
+    partial(path, report_server.body)
+    download_report(report_server.url, path)
+    assert read(path) == report_server.body
+    assert not os.path.exists(f"{path}.part.json")
+    assert len(report_server.requests) == 1
+
+
+def test_download_restarts_on_416_for_an_oversized_part(tmp_path, report_server):
+    path = str(tmp_path / "report.pdf")
+    partial(path, report_server.body + b"trailing garbage")
+    download_report(report_server.url, path)
+    assert read(path) == report_server.body
+    assert report_server.requests[-1] == (None, None)
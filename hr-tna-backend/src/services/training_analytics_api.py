@@ -1,35 +1,69 @@
 import os
 import json
-import pdfplumber
-import re
-import random
-import string
+import asyncio
+import time
+import numpy as np
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
 from typing import List, Optional
-from sentence_transformers import SentenceTransformer, util
-
+from skill_index import build_skill_index, load_skill_index
+from skill_catalogue import SKILL_SOURCES, catalogue_skills, extract_skills, load_catalogue, write_catalogue
+from wef_ingest import REPORT_PATH, WEF_KEYWORDS, WEF_REPORT_URL, download_report, extract_pages
+from model_loader import MODEL_ID, MODEL_LOAD, get_model, mark_ready, start_background_load
+from model_loader import status as model_status
+from embedding_cache import EmbeddingCache
+from embedding_service import EMBED_WORKERS, EmbeddingService, EmbeddingServiceSaturated
+from vector_search import create_index
+from msic_index import get_msic_index
+from industry_matcher import get_industry_matcher, loaded_industry_matcher
+from trend_signals import TrendSignals
+from recommendations import RecommendationEngine
+from training_history import get_training_history
+from gap_analysis import analyze_gaps, program_texts
+from skill_scoring import POOLINGS, TOP_N, query_items, query_texts, rank_skills
+from org_repository import DuplicateRegistration, create_repository, generate_short_id, migrate_json, normalize_record
+from metrics import http_request_duration, registry, rss_bytes, timed
+from log_config import get_logger
+from response_cache import SEARCH_CACHE_SIZE, CachedBody, ResponseCache, cached_response
+from group_commit import GroupCommitWriter
+from org_transfer import (
+    FORMATS, IMPORT_BATCH_SIZE, ImportReport, detect_format, export_csv, export_ndjson, iter_lines, iter_rows,
+)
+from job_queue import FINISHED, JOB_MAX_ATTEMPTS, JobFailed, JobQueue, JobWorkerPool, job_handler
+from profiling import (
+    PROFILE_ENABLED, PROFILE_SAMPLE_RATE, PROFILE_SLOW_MS, StackSampler, list_profiles, log_save_failure,
+    read_profile, sampled, save_profile, should_profile,
+)
 
-app = FastAPI()
 
-# Define the file path for organizations.json
-ORG_FILE = r"E:\TNA\hr-tna-frontend\src\data\organizations.json"  # Ensure this is the correct path
+# ✅ Startup/shutdown of the services defined below, in one place (replaces the on_event hooks)
+@asynccontextmanager
+async def lifespan(app):
+    await start_model_warmup()
+    migrate_legacy_organizations()
+    await job_workers.start()
+    try:
+        yield
+    finally:
+        # ✅ Reverse order: jobs may still be writing organizations or encoding texts
+        await job_workers.stop()
+        await organization_writer.stop()
+        if warmup_task is not None:
+            warmup_task.cancel()
+            await asyncio.gather(warmup_task, return_exceptions=True)
+        await embedding_service.stop()
 
-print(f"📂 Full path to JSON file: {ORG_FILE}")  # Debugging the path
+app = FastAPI(lifespan=lifespan)
+log = get_logger("api")
 
-dir_path = os.path.dirname(ORG_FILE)  # Define dir_path before using it
-if os.path.exists(dir_path):
-    print(f"✅ Directory exists: {dir_path}")
-else:
-    print(f"❌ Directory does NOT exist: {dir_path}")
+# Define the file path for the legacy organizations.json (imported into the repository on startup)
+ORG_FILE = os.environ.get("TNA_ORG_FILE", r"E:\TNA\hr-tna-frontend\src\data\organizations.json")
 
-# Check if file exists
-if os.path.exists(ORG_FILE):
-    print(f"✅ File exists: {ORG_FILE}")
-else:
-    print(f"❌ File does NOT exist: {ORG_FILE}")
-# Initialize FastAPI app
+log.debug("Legacy organization file", extra={"path": ORG_FILE, "exists": os.path.exists(ORG_FILE)})
 
 app.add_middleware(
     CORSMiddleware,
@@ -39,71 +73,189 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
-@app.post("/organization/")
-async def add_organization(data: dict):
-    print(f"📥 Received data: {data}")
+# ✅ Request latency per route template (unmatched paths share one label to bound cardinality)
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - started
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        http_request_duration.observe(elapsed, method=request.method, route=route, status=status)
+        log.debug("Request", extra={
+            "method": request.method, "route": route, "status": status, "ms": round(elapsed * 1000, 3),
+        })
+
+# ✅ Opt-in stack sampling of sampled/slow requests (see profiling.py); not installed when TNA_PROFILE is off
+if PROFILE_ENABLED:
+    stack_sampler = StackSampler()
+
+    @app.middleware("http")
+    async def profile_requests(request: Request, call_next):
+        is_sampled = sampled()
+        if not should_profile(request.url.path) or not (is_sampled or PROFILE_SLOW_MS > 0):
+            return await call_next(request)
+
+        session = stack_sampler.start_session()
+        started, started_at = time.perf_counter(), time.time()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            stack_sampler.stop_session(session)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            slow = PROFILE_SLOW_MS > 0 and elapsed_ms >= PROFILE_SLOW_MS
+            if (is_sampled or slow) and session:
+                meta = {
+                    "method": request.method,
+                    "path": request.url.path,
+                    "query": request.url.query,
+                    "route": getattr(request.scope.get("route"), "path", None),
+                    "status": status,
+                    "duration_ms": round(elapsed_ms, 3),
+                    "reason": "slow" if slow else "sampled",
+                    "started_at": started_at,
+                    "pid": os.getpid(),
+                }
+                # ✅ Written off the event loop, after the response is on its way
+                saving = asyncio.get_running_loop().run_in_executor(None, save_profile, session, meta)
+                saving.add_done_callback(log_save_failure)
+
+# ✅ SBERT Model for AI-powered Training Recommendations is loaded lazily (see model_loader.py)
+
+# ✅ Versioned skill catalogue, memory-mapped from disk (see skill_catalogue.py)
+active_catalogue = None
+
+def load_skills():
+    """Return (skills, content hash) for the active catalogue, falling back to WEF_SKILLS."""
+    global active_catalogue
+    if active_catalogue is None:
+        active_catalogue = load_catalogue()
+    return catalogue_skills(active_catalogue)
+
+# ✅ Skill embeddings are encoded once and memory-mapped from disk (see skill_index.py)
+wef_skill_index = None
+skill_search_index = None
+
+def load_wef_skill_index():
+    """Return the shared skill-embedding index, building it on first use."""
+    global wef_skill_index
+    if wef_skill_index is None:
+        skills, texts_hash = load_skills()
+        wef_skill_index = (
+            load_skill_index(skills, MODEL_ID, texts_hash=texts_hash)
+            or build_skill_index(get_model(), skills, MODEL_ID, texts_hash=texts_hash)
+        )
+    return wef_skill_index
+
+def load_skill_search_index():
+    """Return the top-k search backend (exact or ANN, see vector_search.py) over the skill index."""
+    global skill_search_index
+    if skill_search_index is None:
+        skill_search_index = create_index(load_wef_skill_index().embeddings)
+    return skill_search_index
+
+def reload_skill_catalogue():
+    """Switch to the catalogue CURRENT points at; returns the previous skill index if it changed."""
+    global active_catalogue, wef_skill_index, skill_search_index
+    old_index = load_wef_skill_index()
+    catalogue = load_catalogue()
+    if catalogue is None or catalogue.content_hash == old_index.catalogue_hash:
+        return None
+    active_catalogue, wef_skill_index, skill_search_index = catalogue, None, None
+    load_skill_search_index()
+    return old_index
 
+# ✅ Objective/free-text embeddings are cached by content hash (memory + SQLite)
+embedding_cache = EmbeddingCache(MODEL_ID)
+
+# ✅ Larger encode batches on bigger machines (one forward pass per batch)
+ENCODE_BATCH_SIZE = int(os.environ.get("TNA_ENCODE_BATCH_SIZE", str(max(32, 16 * (os.cpu_count() or 1)))))
+
+def encode_texts(texts):
+    """Encode texts with the SBERT model, skipping any that are already cached."""
+    return embedding_cache.encode(
+        texts,
+        lambda missing: get_model().encode(
+            missing,
+            batch_size=ENCODE_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        ),
+    )
+
+# ✅ Inference runs in a worker pool behind a micro-batching queue (see embedding_service.py)
+embedding_service = EmbeddingService()
+
+async def encode_texts_async(texts):
+    """Non-blocking encode: cache first, then the embedding service for the misses."""
+    try:
+        return await embedding_cache.aencode(texts, embedding_service.encode)
+    except EmbeddingServiceSaturated:
+        raise HTTPException(status_code=429, detail="Embedding service is busy, retry shortly", headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Embedding service timed out")
+
+def encode_uncached(texts):
+    """Bulk in-process encode for offline-style builds (bypasses the per-text cache)."""
+    model = get_model()
+    with timed("encode"):
+        return model.encode(
+            texts,
+            batch_size=ENCODE_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+
+def load_industry_matcher():
+    """MSIC description embeddings, memory-mapped; only changed CSV rows are re-encoded."""
+    return get_industry_matcher(encode_uncached, MODEL_ID)
+
+async def suggest_industries(text, k=5):
+    """Top-k MSIC codes for a free-text industry description."""
+    matcher = await run_in_threadpool(load_industry_matcher)
+    vector = (await encode_texts_async([text]))[0]
+    return matcher.suggest_from_vector(vector, k)
+
+async def suggest_industries_if_ready(text, k=5):
+    """Best-effort suggestions for write endpoints: None unless the matcher is already built
+    (startup builds it in the background) and the embedding service answers in time."""
+    if loaded_industry_matcher() is None:
+        return None
     try:
-        existing_data = []
-
-        # **Check if the file exists BEFORE opening**
-        if os.path.exists(ORG_FILE):
-            print(f"✅ File exists before writing: {ORG_FILE}")
-            try:
-                with open(ORG_FILE, "r", encoding="utf-8") as f:
-                    file_content = f.read().strip()
-                    print(f"📂 Raw File Content Before Processing: {file_content}")
-                    existing_data = json.loads(file_content) if file_content else []
-            except json.JSONDecodeError as e:
-                print(f"❌ JSON Decode Error: {e}")
-                existing_data = []
-
-        # **Ensure the existing data is a list before appending**
-        if not isinstance(existing_data, list):
-            print("⚠️ Existing data is not a list. Resetting.")
-            existing_data = []
-
-        # **Append new data**
-        existing_data.append(data)
-        print(f"📂 New Data to be Written: {existing_data}")
-
-        # **Confirm exact file path before writing**
-        abs_path = os.path.abspath(ORG_FILE)
-        print(f"🔄 Writing to: {abs_path}")
-
-        # **Open the file in read+write (`r+`) mode**
-        with open(ORG_FILE, "r+", encoding="utf-8") as f:
-            try:
-                existing_data = json.load(f)  # Read existing data
-                if not isinstance(existing_data, list):
-                    existing_data = []
-            except json.JSONDecodeError:
-                existing_data = []
-
-            existing_data.append(data)  # Append new entry
-            f.seek(0)  # Move cursor to start of file
-            json.dump(existing_data, f, indent=4)  # Write updated list
-            f.truncate()  # Remove any leftover data from previous writes
-            f.flush()
-            os.fsync(f.fileno())  # Force save
-
-        print(f"✅ Data successfully written to {abs_path}")
-
-        # **Verify file content after writing**
-        print(f"🔍 Verifying file content from: {abs_path}")
-        with open(ORG_FILE, "r", encoding="utf-8") as f:
-            file_contents = f.read()
-            print(f"📖 File Contents After Write: {file_contents}")
-
-        return {"message": "Organization data saved successfully!", "data": data}
-
-    except Exception as e:
-        print(f"❌ Unexpected error: {e}")
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
-
-
-# ✅ Load SBERT Model for AI-powered Training Recommendations
-model = SentenceTransformer('all-MiniLM-L6-v2')
+        return await suggest_industries(text, k)
+    except HTTPException as e:
+        log.warning("Industry suggestions skipped", extra={"status": e.status_code, "detail": e.detail})
+        return None
+
+# ✅ Held so the task is not garbage-collected mid-run and can be cancelled on shutdown
+warmup_task = None
+
+def log_warmup_failure(task):
+    if not task.cancelled() and task.exception() is not None:
+        log.error("Embedding service warmup failed", exc_info=task.exception())
+
+async def start_model_warmup():
+    """Load the model and skill index off the critical path; /ready flips once done."""
+    global warmup_task
+    await embedding_service.start()
+    if MODEL_LOAD == "lazy":
+        mark_ready()
+    else:
+        # ✅ With out-of-process workers this process only needs the model to (re)build the index
+        start_background_load(
+            after=[load_skill_search_index, load_industry_matcher], load_model=EMBED_WORKERS == 0
+        )
+        warmup_task = asyncio.create_task(embedding_service.warmup())
+        warmup_task.add_done_callback(log_warmup_failure)
 
 # ✅ Organization Model
 class Organization(BaseModel):
@@ -116,43 +268,62 @@ class Organization(BaseModel):
     objectives: Optional[List[str]] = None
     client_charter: Optional[str] = None
 
-# ✅ Persistent Storage (Only One Company)
+# ✅ Persistent Storage (one organization per registration number)
+org_repository = create_repository()
+
+# ✅ Pre-serialized, precompressed GET bodies with strong ETags (see response_cache.py)
+response_cache = ResponseCache()
+# ✅ Free-text search keys are unbounded; a small LRU of their own keeps them from evicting the rest
+search_response_cache = ResponseCache(max_entries=SEARCH_CACHE_SIZE)
 
-def generate_short_id():
-    """Generate a random 11-character alphanumeric ID."""
-    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=11))
+def migrate_legacy_organizations():
+    """Import the legacy organizations.json once, when the repository is still empty."""
+    if org_repository.count() == 0 and os.path.exists(ORG_FILE):
+        imported = migrate_json(ORG_FILE, org_repository)
+        log.info("Imported legacy organizations", extra={"count": imported, "path": ORG_FILE})
 
 def load_organization():
-    """Load the organization data from JSON file."""
-    if os.path.exists(ORG_FILE):
-        try:
-            with open(ORG_FILE, "r", encoding="utf-8") as file:
-                data = json.load(file)
-                if isinstance(data, dict):  # Ensure valid structure
-                    return data
-                return None  # Invalid data format
-        except (json.JSONDecodeError, FileNotFoundError):
-            return None
-    return None
-
-def save_organization(org_data):
-    """Save the organization data to JSON file."""
-    with open(ORG_FILE, "w", encoding="utf-8") as file:
-        json.dump(org_data, file, indent=4)
+    """Load the stored organization (the first one registered)."""
+    return org_repository.first()
+
+# ✅ Writes from request handlers are group-committed off the event loop (see group_commit.py)
+organization_writer = GroupCommitWriter(org_repository)
+
+async def save_organization(org_data):
+    """Insert or update the organization; resolves once the batch it joined is committed."""
+    return await organization_writer.upsert(org_data)
+
+# ✅ Recommendations are materialized per organization (see recommendations.py)
+recommendation_engine = RecommendationEngine(
+    org_repository, encode_texts_async, load_wef_skill_index, load_skill_search_index, MODEL_ID
+)
+
+def registration_exists(org_id):
+    return {
+        "error": "An organization with this registration number already exists. Contact support to modify details.",
+        "organizationID": org_id,
+    }
 
 # ✅ API to Add Organization
 @app.post("/organization/")
-def add_organization(org: Organization):
-    existing_org = load_organization()
+async def add_organization(data: dict):
+    record = normalize_record(data)
+    try:
+        org = Organization(**record)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=json.loads(e.json()))
 
-    if existing_org:
-        return {"error": "Organization already exists. Contact support to modify details."}
+    # ✅ One organization per registration number (updates go through PUT /organization/{id})
+    existing = await run_in_threadpool(org_repository.registration_ids, [org.companyRegistrationNumber])
+    if existing:
+        return registration_exists(existing[org.companyRegistrationNumber])
 
     # ✅ Generate Unique ID
     org_id = generate_short_id()
 
-    # ✅ Store organization
+    # ✅ Store organization (extra form fields such as trainingPrograms are kept)
     org_dict = {
+        **record,
         "organizationID": org_id,
         "name": org.name,
         "companyRegistrationNumber": org.companyRegistrationNumber,
@@ -164,103 +335,719 @@ def add_organization(org: Organization):
         "client_charter": org.client_charter,
     }
 
-    save_organization(org_dict)
+    try:
+        await save_organization(org_dict)
+    except DuplicateRegistration:
+        # ✅ A concurrent POST for the same number committed first; the UNIQUE index rejected this one
+        existing = await run_in_threadpool(org_repository.registration_ids, [org.companyRegistrationNumber])
+        return registration_exists(existing.get(org.companyRegistrationNumber))
+    recommendation_engine.schedule(recommendation_engine.refresh(org_dict))
+
+    # ✅ Past programs from the form feed the training-history analytics
+    if record.get("trainingPrograms"):
+        await run_in_threadpool(get_training_history().ingest, record["trainingPrograms"], org_id)
+
+    response = {"message": "Organization added successfully", "organizationID": org_id}
 
-    return {"message": "Organization added successfully", "organizationID": org_id}
+    # ✅ "Other" industry: suggest the closest MSIC codes for the free text (omitted if not available
+    # right now; the organization is already stored, so this must not turn the POST into an error)
+    if org.customIndustry:
+        suggestions = await suggest_industries_if_ready(org.customIndustry)
+        if suggestions is not None:
+            response["industrySuggestions"] = suggestions
 
-# ✅ API to Get Organization Details
+    return response
+
+# ✅ API to Get Organization Details (cached bodies, revalidated against the store revision)
 @app.get("/organization/")
-def get_organization():
-    org_data = load_organization()
-    if not org_data:
-        return {"error": "No organization found. Please add one first."}
-    return org_data
+def get_organization(request: Request):
+    return response_cache.respond(
+        request, "organization:first", org_repository.version(),
+        lambda: load_organization() or {"error": "No organization found. Please add one first."},
+    )
 
-# ✅ AI-Powered Training Recommendations
-def generate_training_recommendations(org):
-    wef_skills = ["AI & Big Data", "Cybersecurity", "Cloud Computing", "Analytical Thinking"]  # Placeholder
+@app.get("/organization/{organization_id}")
+def get_organization_by_id(request: Request, organization_id: str):
+    def build():
+        org_data = org_repository.get(organization_id)
+        if not org_data:
+            raise HTTPException(status_code=404, detail="Organization not found")
+        return org_data
 
-    objectives = org.get("objectives", [])
-    if not objectives:
-        return {"error": "No objectives provided"}
+    return response_cache.respond(request, f"organization:{organization_id}", org_repository.version(), build)
 
-    # ✅ Encode objectives & skills
-    objective_embeddings = model.encode(objectives, convert_to_tensor=True)
-    skill_embeddings = model.encode(wef_skills, convert_to_tensor=True)
+# ✅ API to Update Organization (only changed objectives are re-scored)
+@app.put("/organization/{organization_id}")
+async def update_organization(organization_id: str, data: dict):
+    existing_org = await run_in_threadpool(org_repository.get, organization_id)
+    if not existing_org:
+        raise HTTPException(status_code=404, detail="Organization not found")
+
+    record = {**existing_org, **normalize_record(data), "organizationID": organization_id}
+    try:
+        Organization(**record)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=json.loads(e.json()))
 
-    # ✅ Compute cosine similarity
-    similarity_scores = util.pytorch_cos_sim(objective_embeddings, skill_embeddings)
+    try:
+        await save_organization(record)
+    except DuplicateRegistration as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    recommendation_engine.schedule(recommendation_engine.refresh(record))
+    return {"message": "Organization updated successfully", "organizationID": organization_id}
+
+# ✅ Bulk onboarding: streamed NDJSON/CSV, validated one batch at a time and written via the group-commit writer
+def prepare_import_batch(rows, report, seen):
+    """Validate [(row, data)] with the Organization model; returns [(row, record, is_update)].
+
+    Rows without an organizationID update the organization already stored under their
+    registration number, so re-running an import does not duplicate organizations. A row
+    whose organizationID differs from the one owning its registration number is an error.
+    """
+    valid = []
+    for row, data in rows:
+        record = normalize_record(data)
+        try:
+            org = Organization(**record)
+        except ValidationError as e:
+            report.error(row, json.loads(e.json()))
+            continue
+        first_row = seen.get(org.companyRegistrationNumber)
+        if first_row is not None:
+            report.error(row, [{
+                "loc": ["companyRegistrationNumber"],
+                "msg": f"Duplicate of row {first_row} in this import",
+                "type": "value_error.duplicate",
+            }])
+            continue
+        seen[org.companyRegistrationNumber] = row
+        valid.append((row, {**record, "objectives": org.objectives or []}))
 
-    # ✅ Get top 5 matching skills for each objective
-    recommended_skills = set()
-    for i in range(len(objectives)):
-        if i >= similarity_scores.shape[0]:  
-            continue  # Skip if index out of bounds
+    existing = org_repository.registration_ids([record["companyRegistrationNumber"] for _, record in valid])
+    prepared = []
+    for row, record in valid:
+        org_id = existing.get(record["companyRegistrationNumber"])
+        given_id = record.get("organizationID")
+        if given_id and org_id and given_id != org_id:
+            report.error(row, [{
+                "loc": ["companyRegistrationNumber"],
+                "msg": f"Registration number already belongs to organization {org_id}",
+                "type": "value_error.conflict",
+            }])
+            continue
+        if given_id:
+            is_update = given_id == org_id or org_repository.get(given_id) is not None
+        else:
+            is_update = org_id is not None
+        record["organizationID"] = given_id or org_id or generate_short_id()
+        prepared.append((row, record, is_update))
+    return prepared
 
-        top_matches = similarity_scores[i].argsort(descending=True)[:5].tolist()
-        for idx in top_matches:
-            recommended_skills.add(wef_skills[idx])
+def ingest_training_programs(records):
+    for record in records:
+        if record.get("trainingPrograms"):
+            get_training_history().ingest(record["trainingPrograms"], record["organizationID"])
 
-    return list(recommended_skills) if recommended_skills else ["No relevant skills found"]
+async def import_batch(rows, report, seen, dry_run=False):
+    """Validate one batch and store its valid rows; write failures are reported per row."""
+    prepared = await run_in_threadpool(prepare_import_batch, rows, report, seen)
+    if dry_run or not prepared:
+        results = [record for _, record, _ in prepared]
+    else:
+        # ✅ Shares commits (and the per-record fallback on a failed batch) with the API's other writes
+        results = await organization_writer.upsert_many([record for _, record, _ in prepared])
+
+    created = []
+    for (row, _, is_update), result in zip(prepared, results):
+        if isinstance(result, DuplicateRegistration):
+            # ✅ Claimed by a concurrent write after this batch was validated
+            report.error(row, [{"loc": ["companyRegistrationNumber"], "msg": str(result), "type": "value_error.conflict"}])
+            continue
+        if isinstance(result, Exception):
+            report.error(row, [{"loc": [], "msg": f"Could not be stored: {result}", "type": "storage_error"}])
+            continue
+        if is_update:
+            report.updated += 1
+        else:
+            report.created += 1
+            created.append(result)
+
+    # ✅ History is appended, so only new organizations' trainingPrograms are ingested; re-running an
+    # import must not count the same programs twice (POST /training_history/{id} adds more explicitly)
+    if created and not dry_run:
+        await run_in_threadpool(ingest_training_programs, created)
+
+@app.post("/organizations/import")
+async def import_organizations(request: Request, format: Optional[str] = None, dry_run: bool = False):
+    """Import an NDJSON or CSV body (format from ?format= or Content-Type) with a per-row error report.
+
+    Rows are validated TNA_IMPORT_BATCH_SIZE at a time and stored through the group-commit
+    writer; rows that fail validation or cannot be stored are reported and skipped.
+    Recommendations for the imported organizations are materialized afterwards by a
+    recommendations_refresh job.
+    """
+    format = format or detect_format(request.headers.get("content-type"))
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+
+    report = ImportReport()
+    seen = {}  # registration number -> first row that used it
+    batch = []
+    async for row, data in iter_rows(iter_lines(request.stream()), format):
+        report.rows += 1
+        if isinstance(data, str):
+            report.error(row, [{"loc": [], "msg": data, "type": "value_error.parse"}])
+            continue
+        batch.append((row, data))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await import_batch(batch, report, seen, dry_run)
+            batch = []
+    if batch:
+        await import_batch(batch, report, seen, dry_run)
+
+    response = {"dry_run": dry_run, **report.as_dict()}
+    if not dry_run and report.created + report.updated:
+        job = await run_in_threadpool(job_workers.enqueue, "recommendations_refresh", {})
+        response["recommendations_job"] = job["id"]
+    return response
+
+@app.get("/organizations/export")
+def export_organizations(format: str = "ndjson"):
+    """Stream every stored organization as NDJSON (full records) or CSV, batch by batch."""
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+    if format == "csv":
+        body, media_type = export_csv(org_repository.iter_all()), "text/csv"
+    else:
+        body, media_type = export_ndjson(org_repository.iter_all()), "application/x-ndjson"
+    return StreamingResponse(
+        body, media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="organizations.{format}"'},
+    )
+
+# ✅ AI-Powered Training Recommendations
+async def generate_training_recommendations(org, pooling=None, limit=TOP_N):
+    """Ranked [{"skill", "score"}] pooled over objectives, vision, mission and client charter ([] if none)."""
+    if not query_texts(org)[0]:
+        return []
+
+    # ✅ Default ranking is materialized; other pooling modes/limits are scored on the fly
+    if (pooling is None or pooling == recommendation_engine.pooling) and limit == TOP_N:
+        return (await recommendation_engine.get(org))["training_recommendations"]
+    return await recommendation_engine.rank(org, pooling, limit)
 
 @app.get("/generate_training_recommendations/")
-def generate_training_recommendations_for_org():
-    org = load_organization()
+async def generate_training_recommendations_for_org(pooling: Optional[str] = None, limit: int = TOP_N):
+    if pooling is not None and pooling not in POOLINGS:
+        raise HTTPException(status_code=400, detail=f"pooling must be one of {', '.join(POOLINGS)}")
+    org = await run_in_threadpool(load_organization)
     if not org:
         return {"error": "No organization found. Please add one first."}
 
-    recommendations = generate_training_recommendations(org)
+    recommendations = await generate_training_recommendations(org, pooling, max(1, limit))
     return {"training_recommendations": recommendations}
 
-@app.get("/industries/")
-def get_industries():
-    sectors = {
-        "Primary Sector (Raw Materials)": [
-            "Agriculture",
-            "Fisheries & Aquaculture",
-            "Forestry & Logging",
-            "Mining & Quarrying",
-            "Oil & Gas",
-        ],
-        "Secondary Sector (Manufacturing & Construction)": [
-            "Automotive & Transportation Equipment",
-            "Chemical Manufacturing",
-            "Construction",
-            "Electronics & Electrical Manufacturing",
-            "Food & Beverage Processing",
-            "Metal & Machinery",
-            "Pharmaceuticals & Biotech Manufacturing",
-            "Textile & Apparel Manufacturing",
-        ],
-        "Tertiary Sector (Services & Retail)": [
-            "Banking & Finance",
-            "E-commerce & Retail",
-            "Education",
-            "Entertainment & Media",
-            "Healthcare & Pharmaceuticals",
-            "Hospitality & Tourism",
-            "Insurance",
-            "Logistics & Supply Chain",
-            "Professional & Business Services",
-            "Real Estate & Property Management",
-            "Telecommunications",
-            "Wholesale & Distribution",
-        ],
-        "Quaternary Sector (Knowledge & Information)": [
-            "Artificial Intelligence & Big Data",
-            "Biotechnology & Life Sciences",
-            "Cybersecurity",
-            "Information Technology & Software Development",
-            "Research & Development",
-            "Space & Aerospace Technology",
-        ],
-        "Quinary Sector (Government & Non-Profit)": [
-            "Defense & Public Safety",
-            "Environmental & Waste Management",
-            "Government & Public Administration",
-            "Non-Profit Organizations",
-            "Social Services",
-        ]
+# ✅ Streaming variant: per-objective results after every encode chunk, then the pooled ranking
+STREAM_CHUNK = int(os.environ.get("TNA_STREAM_CHUNK", "8"))
+STREAM_FORMATS = ("sse", "ndjson")
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def ndjson_event(event, data):
+    return json.dumps({"event": event, **data}) + "\n"
+
+@app.get("/generate_training_recommendations/stream")
+async def stream_training_recommendations(
+    organization_id: Optional[str] = None,
+    format: str = "sse",
+    pooling: Optional[str] = None,
+    limit: int = TOP_N,
+    per_objective: int = 5,
+):
+    """Events: "objective" (top skills for one objective/vision/mission/charter text) as each
+    chunk of STREAM_CHUNK texts is encoded, "ranking" (pooled ranking so far, partial until the
+    last chunk), then "done"; "error" if scoring fails mid-stream."""
+    if format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(STREAM_FORMATS)}")
+    if pooling is not None and pooling not in POOLINGS:
+        raise HTTPException(status_code=400, detail=f"pooling must be one of {', '.join(POOLINGS)}")
+    if organization_id:
+        org = await run_in_threadpool(org_repository.get, organization_id)
+    else:
+        org = await run_in_threadpool(load_organization)
+    if not org:
+        raise HTTPException(status_code=404, detail="Organization not found")
+
+    items = query_items(org)
+    index = await run_in_threadpool(load_wef_skill_index)
+    search_index = await run_in_threadpool(load_skill_search_index)
+    emit = sse_event if format == "sse" else ndjson_event
+    pooling, limit, per_objective = pooling or recommendation_engine.pooling, max(1, limit), max(1, per_objective)
+
+    async def events():
+        started = time.perf_counter()
+        vectors, weights = [], []
+        try:
+            for start in range(0, len(items), STREAM_CHUNK):
+                chunk = items[start:start + STREAM_CHUNK]
+                chunk_vectors = await encode_texts_async([text for _, text, _ in chunk])
+                scores, ids = await run_in_threadpool(search_index.search, chunk_vectors, per_objective)
+                for (source, text, _), row_scores, row_ids in zip(chunk, scores, ids):
+                    yield emit("objective", {
+                        "source": source,
+                        "text": text,
+                        "skills": [
+                            {"skill": index.skills[int(i)], "score": round(float(score), 4)}
+                            for score, i in zip(row_scores, row_ids) if i >= 0
+                        ],
+                    })
+                vectors.append(chunk_vectors)
+                weights += [weight for _, _, weight in chunk]
+                scored = start + len(chunk)
+                ranking = await run_in_threadpool(
+                    rank_skills, np.vstack(vectors), list(weights), index, search_index, limit, pooling
+                )
+                yield emit("ranking", {
+                    "partial": scored < len(items),
+                    "scored": scored,
+                    "total": len(items),
+                    "training_recommendations": ranking,
+                })
+            yield emit("done", {"total": len(items), "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)})
+        except HTTPException as e:
+            yield emit("error", {"status": e.status_code, "detail": e.detail})
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    # ✅ X-Accel-Buffering: proxies must pass events through as they are produced
+    return StreamingResponse(events(), media_type=media_type, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# ✅ Batch Recommendations (many organizations, one encode + one pooled pass per organization)
+class BatchRecommendationRequest(BaseModel):
+    organizations: List[Organization]
+
+async def rank_organizations(orgs):
+    """Encode once for all organizations, then return a generator of per-organization results."""
+    index = await run_in_threadpool(load_wef_skill_index)
+    search_index = await run_in_threadpool(load_skill_search_index)
+
+    # ✅ Deduplicate objective/vision/mission/charter texts across all organizations
+    queries = [query_texts(org.model_dump()) for org in orgs]
+    unique_texts = list(dict.fromkeys(text for texts, _ in queries for text in texts))
+    position = {text: i for i, text in enumerate(unique_texts)}
+    vectors = await encode_texts_async(unique_texts) if unique_texts else None
+
+    def results():
+        for org, (texts, weights) in zip(orgs, queries):
+            result = {"name": org.name, "companyRegistrationNumber": org.companyRegistrationNumber}
+            result["training_recommendations"] = rank_skills(
+                vectors[[position[text] for text in texts]], weights, index, search_index,
+                k=TOP_N, pooling=recommendation_engine.pooling,
+            ) if texts else []
+            yield result
+
+    return results()
+
+@app.post("/generate_training_recommendations/batch")
+async def generate_training_recommendations_batch(request: BatchRecommendationRequest):
+    results = await rank_organizations(request.organizations)
+    return StreamingResponse((json.dumps(result) + "\n" for result in results), media_type="application/x-ndjson")
+
+# ✅ Liveness vs readiness probes
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+@app.get("/ready")
+def ready():
+    details = model_status()
+    details["embedding_service_warmed"] = embedding_service.warmed
+    details["ready"] = details["ready"] and (embedding_service.warmed or MODEL_LOAD == "lazy")
+    if not details["ready"]:
+        return JSONResponse(status_code=503, content=details)
+    return details
+
+# ✅ Stats endpoints share one form: /<component>/stats, no trailing slash
+@app.get("/embedding_cache/stats")
+def get_embedding_cache_stats():
+    return embedding_cache.stats()
+
+@app.get("/embedding_service/stats")
+def get_embedding_service_stats():
+    return embedding_service.stats()
+
+@app.get("/organization_writer/stats")
+def get_organization_writer_stats():
+    return organization_writer.stats()
+
+@app.get("/response_cache/stats")
+def get_response_cache_stats():
+    return {**response_cache.stats(), "search": search_response_cache.stats()}
+
+@app.get("/recommendations/stats")
+def get_recommendation_stats():
+    return recommendation_engine.stats()
+
+# ✅ Prometheus scrape endpoint: stage/route histograms plus the gauges below (see metrics.py)
+def _ratio(hits, total):
+    return hits / total if total else 0.0
+
+registry.collector("model_ready", "1 once the model and skill index are loaded.", lambda: int(model_status()["ready"]))
+registry.collector(
+    "embedding_cache_hit_ratio", "Embedding cache hits (memory + disk) over lookups.",
+    lambda: _ratio(
+        embedding_cache.memory_hits + embedding_cache.disk_hits,
+        embedding_cache.memory_hits + embedding_cache.disk_hits + embedding_cache.misses,
+    ),
+)
+registry.collector(
+    "recommendation_cache_hit_ratio", "Materialized recommendations served without recomputing.",
+    lambda: _ratio(recommendation_engine.hits, recommendation_engine.hits + recommendation_engine.misses),
+)
+registry.collector(
+    "response_cache_hit_ratio", "GET bodies served from the response cache.",
+    lambda: _ratio(response_cache.hits, response_cache.hits + response_cache.misses),
+)
+registry.collector("trend_cache_hits", "Trend keywords answered from the cache.", lambda: trend_fetcher.cache_hits)
+registry.collector("trend_upstream_payloads", "Trend payloads fetched upstream.", lambda: trend_fetcher.payloads)
+registry.collector(
+    "embedding_queue_depth", "Encode requests waiting for a micro-batch.",
+    lambda: embedding_service.queue.qsize() if embedding_service.queue is not None else 0,
+)
+registry.collector("embedding_queue_capacity", "Encode queue size limit.", lambda: embedding_service.queue_size)
+registry.collector("embedding_rejected", "Encode requests rejected with 429.", lambda: embedding_service.rejected)
+registry.collector(
+    "storage_write_queue_depth", "Organization writes waiting for the next group commit.",
+    lambda: organization_writer.queue.qsize() if organization_writer.queue is not None else 0,
+)
+registry.collector(
+    "jobs", "Background jobs by status.", lambda: job_queue.counts(), labels=["status"],
+)
+registry.collector("recommendation_jobs_running", "Background refresh jobs in flight.", lambda: len(recommendation_engine.jobs))
+registry.collector(
+    "embedding_worker_resident_memory_bytes", "Resident memory per inference worker process.",
+    lambda: {str(pid): rss_bytes(pid) for pid in embedding_service.worker_pids()}, labels=["pid"],
+)
+
+@app.get("/metrics")
+def get_metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+# ✅ Recorded request profiles (folded stacks: flamegraph.pl, inferno, speedscope)
+@app.get("/admin/profiles")
+def get_profiles(limit: int = 20):
+    return {
+        "enabled": PROFILE_ENABLED,
+        "sample_rate": PROFILE_SAMPLE_RATE,
+        "slow_ms": PROFILE_SLOW_MS,
+        "profiles": list_profiles(limit=max(1, limit)),
     }
-    
-    return {"sectors": sectors}
+
+@app.get("/admin/profiles/{profile_id}")
+def get_profile(profile_id: str):
+    folded = read_profile(profile_id)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(folded, headers={"Content-Disposition": f'attachment; filename="{profile_id}.folded"'})
+
+# ✅ Google Trends interest (cached with a TTL, rate-limited upstream; see trend_signals.py)
+trend_fetcher = TrendSignals()
+
+@app.get("/trends/")
+async def get_trends(keywords: str):
+    """Interest scores (0..1) for a comma-separated keyword list."""
+    keyword_list = [keyword.strip() for keyword in keywords.split(",") if keyword.strip()]
+    if not keyword_list:
+        raise HTTPException(status_code=400, detail="keywords is required")
+    return {"scores": await trend_fetcher.scores(keyword_list), "stats": trend_fetcher.stats()}
+
+@app.get("/skills/catalogue/")
+def get_skill_catalogue(offset: int = 0, limit: int = 50):
+    """Active catalogue version plus one page of its skills."""
+    skills, texts_hash = load_skills()
+    if active_catalogue is None:
+        return {"version": None, "count": len(skills), "skills": [{"name": skill} for skill in skills]}
+    end = min(len(active_catalogue), max(offset, 0) + max(limit, 0))
+    return {
+        "version": active_catalogue.version,
+        "count": len(active_catalogue),
+        "categories": active_catalogue.categories,
+        "skills": [active_catalogue.record(i) for i in range(max(offset, 0), end)],
+    }
+
+@app.post("/skills/catalogue/reload")
+async def reload_catalogue():
+    """Pick up a newly published catalogue as a background job (re-embedding + re-scoring)."""
+    return await submit_job(JobRequest(kind="catalogue_reload"))
+
+# ✅ Background jobs (persistent SQLite queue + worker pool, see job_queue.py)
+job_queue = JobQueue()
+job_workers = JobWorkerPool(job_queue)
+
+@job_handler("wef_ingest")
+def run_wef_ingest(params, report):
+    """Download (if needed) and extract the keyword-matching pages of the WEF report."""
+    path = params.get("path") or REPORT_PATH
+    if params.get("download") or not os.path.exists(path):
+        report(0.05, "Downloading report")
+        download_report(params.get("url") or WEF_REPORT_URL, path)
+    report(0.3, "Extracting pages")
+    pages = extract_pages(path, tuple(params.get("keywords") or WEF_KEYWORDS))
+    return {"report": path, "pages": [page["page"] for page in pages], "chars": sum(len(page["text"]) for page in pages)}
+
+@job_handler("catalogue_reload")
+async def run_catalogue_reload(params, report):
+    """Switch to the CURRENT catalogue, re-embed it and re-score affected organizations."""
+    report(0.1, "Loading catalogue and skill embeddings")
+    old_index = await run_in_threadpool(reload_skill_catalogue)
+    refreshed = 0
+    if old_index is not None:
+        refreshed = await recommendation_engine.refresh_stale(
+            old_index, lambda done, message: report(0.5 + 0.5 * done, message)
+        )
+    _, texts_hash = load_skills()
+    return {"catalogue_version": texts_hash, "changed": old_index is not None, "refreshed_organizations": refreshed}
+
+@job_handler("catalogue_build")
+async def run_catalogue_build(params, report):
+    """Extract skills from the report + local PDFs, publish a catalogue version, then reload it."""
+    report(0.05, "Extracting skills")
+    sources = [(params.get("report") or REPORT_PATH, WEF_KEYWORDS)]
+    sources += [(path, ()) for path in (params.get("pdfs") or SKILL_SOURCES) if path]
+    rows = await run_in_threadpool(extract_skills, sources)
+    if not rows:
+        raise JobFailed("No skills found in the sources")
+    version = await run_in_threadpool(write_catalogue, rows)
+    result = await run_catalogue_reload({}, lambda done, message=None: report(0.3 + 0.7 * done, message))
+    return {"version": version, "skills": len(rows), **result}
+
+@job_handler("recommendations_refresh")
+async def run_recommendations_refresh(params, report):
+    """Re-materialize recommendations: stale organizations only (default) or all of them."""
+    if params.get("all"):
+        org_ids = await run_in_threadpool(lambda: [org["organizationID"] for org in org_repository.iter_all()])
+        refreshed = await recommendation_engine.refresh_many(org_ids, report=report)
+    else:
+        refreshed = await recommendation_engine.refresh_stale(report=report)
+    return {"refreshed_organizations": refreshed}
+
+@job_handler("recommendations_batch")
+async def run_recommendations_batch(params, report):
+    """Batch recommendations as a job; the ranked list per organization is stored as the result."""
+    try:
+        orgs = [Organization(**normalize_record(org)) for org in params.get("organizations", [])]
+    except ValidationError as e:
+        raise JobFailed(str(e))
+    results = await rank_organizations(orgs)
+
+    def collect():
+        ranked = []
+        for result in results:
+            ranked.append(result)
+            report(len(ranked) / len(orgs), f"{len(ranked)}/{len(orgs)} organizations")
+        return ranked
+
+    return {"results": await run_in_threadpool(collect)}
+
+class JobRequest(BaseModel):
+    kind: str
+    params: dict = {}
+    max_attempts: int = JOB_MAX_ATTEMPTS
+
+def job_summary(job):
+    """Job fields for API responses (result included once finished)."""
+    return {
+        key: job[key] for key in (
+            "id", "kind", "status", "progress", "message", "attempts", "max_attempts", "error",
+            "created_at", "started_at", "finished_at", "result",
+        )
+    }
+
+@app.post("/jobs/")
+async def submit_job(request: JobRequest):
+    try:
+        job = await run_in_threadpool(job_workers.enqueue, request.kind, request.params, request.max_attempts)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind: {request.kind}")
+    return JSONResponse(status_code=202, content=job_summary(job), headers={"Location": f"/jobs/{job['id']}"})
+
+@app.get("/jobs/")
+def list_jobs(status: Optional[str] = None, kind: Optional[str] = None, limit: int = 50):
+    return {"jobs": [job_summary(job) for job in job_queue.list(status, kind, max(1, min(limit, 500)))]}
+
+@app.get("/jobs/stats")
+def get_job_stats():
+    return job_workers.stats()
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    # ✅ Pollers are told when to come back while the job is still active
+    headers = {} if job["status"] in FINISHED else {"Retry-After": "2"}
+    return JSONResponse(content=job_summary(job), headers=headers)
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    if job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not job_queue.cancel(job_id):
+        raise HTTPException(status_code=409, detail="Only queued jobs can be cancelled")
+    return job_summary(job_queue.get(job_id))
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Server-sent progress events until the job finishes (works across API workers)."""
+    if await run_in_threadpool(job_queue.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        last_update, last_sent = None, time.monotonic()
+        while True:
+            job = await run_in_threadpool(job_queue.get, job_id)
+            if job is None:  # ✅ Purged (or the database was reset) while streaming
+                yield sse_event("error", {"id": job_id, "detail": "Job not found"})
+                return
+            if job["updated_at"] != last_update:
+                last_update, last_sent = job["updated_at"], time.monotonic()
+                finished = job["status"] in FINISHED
+                yield sse_event("done" if finished else "progress", job_summary(job))
+                if finished:
+                    return
+            elif time.monotonic() - last_sent > 15:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# ✅ Training-history analytics (answered from precomputed rollups, see training_history.py)
+class TrainingHistoryImport(BaseModel):
+    programs: List[dict]
+
+@app.post("/training_history/{organization_id}")
+async def import_training_history(organization_id: str, request: TrainingHistoryImport):
+    if not await run_in_threadpool(org_repository.get, organization_id):
+        raise HTTPException(status_code=404, detail="Organization not found")
+    added = await run_in_threadpool(get_training_history().ingest, request.programs, organization_id)
+    return {"message": f"Imported {added} training programs", "imported": added}
+
+@app.get("/training_history/coverage")
+def get_training_coverage(organization_id: Optional[str] = None):
+    return get_training_history().coverage(organization_id)
+
+@app.get("/training_history/mode_mix")
+def get_training_mode_mix(organization_id: Optional[str] = None):
+    return get_training_history().mode_mix(organization_id)
+
+@app.get("/training_history/attendee_gaps")
+def get_training_attendee_gaps(organization_id: Optional[str] = None):
+    return get_training_history().attendee_gaps(organization_id)
+
+# ✅ Gap analysis: recommended skills vs. past programs, per attendee level (see gap_analysis.py)
+@app.get("/gap_analysis/")
+async def get_gap_analysis(organization_id: Optional[str] = None):
+    if organization_id:
+        org = await run_in_threadpool(org_repository.get, organization_id)
+    else:
+        org = await run_in_threadpool(load_organization)
+    if not org:
+        raise HTTPException(status_code=404, detail="Organization not found")
+    skills = [item["skill"] for item in (await recommendation_engine.get(org))["training_recommendations"]]
+    titles, fields, membership, levels = await run_in_threadpool(
+        get_training_history().programs, org["organizationID"]
+    )
+    if not skills:
+        return {"threshold": None, "programs": len(titles), "skills": [], "gaps": [], "gaps_by_attendee": {}}
+
+    # ✅ Program and skill texts go through the embedding cache, so each is encoded once
+    skill_vectors = await encode_texts_async(skills)
+    program_vectors = await encode_texts_async(program_texts(titles, fields)) if titles else []
+    return await run_in_threadpool(
+        analyze_gaps, skills, skill_vectors, titles, fields, program_vectors, membership, levels
+    )
+
+@app.get("/training_history/stats")
+def get_training_history_stats():
+    return get_training_history().stats()
+
+# ✅ Static sector list, serialized (and precompressed) once at import
+INDUSTRY_SECTORS = {
+    "Primary Sector (Raw Materials)": [
+        "Agriculture",
+        "Fisheries & Aquaculture",
+        "Forestry & Logging",
+        "Mining & Quarrying",
+        "Oil & Gas",
+    ],
+    "Secondary Sector (Manufacturing & Construction)": [
+        "Automotive & Transportation Equipment",
+        "Chemical Manufacturing",
+        "Construction",
+        "Electronics & Electrical Manufacturing",
+        "Food & Beverage Processing",
+        "Metal & Machinery",
+        "Pharmaceuticals & Biotech Manufacturing",
+        "Textile & Apparel Manufacturing",
+    ],
+    "Tertiary Sector (Services & Retail)": [
+        "Banking & Finance",
+        "E-commerce & Retail",
+        "Education",
+        "Entertainment & Media",
+        "Healthcare & Pharmaceuticals",
+        "Hospitality & Tourism",
+        "Insurance",
+        "Logistics & Supply Chain",
+        "Professional & Business Services",
+        "Real Estate & Property Management",
+        "Telecommunications",
+        "Wholesale & Distribution",
+    ],
+    "Quaternary Sector (Knowledge & Information)": [
+        "Artificial Intelligence & Big Data",
+        "Biotechnology & Life Sciences",
+        "Cybersecurity",
+        "Information Technology & Software Development",
+        "Research & Development",
+        "Space & Aerospace Technology",
+    ],
+    "Quinary Sector (Government & Non-Profit)": [
+        "Defense & Public Safety",
+        "Environmental & Waste Management",
+        "Government & Public Administration",
+        "Non-Profit Organizations",
+        "Social Services",
+    ]
+}
+INDUSTRIES_BODY = CachedBody({"sectors": INDUSTRY_SECTORS})
+
+@app.get("/industries/")
+def get_industries(request: Request):
+    return cached_response(request, INDUSTRIES_BODY)
+
+# ✅ MSIC industry classification (parsed once from msic (1).csv, see msic_index.py)
+@app.get("/industries/search")
+def search_industries(request: Request, q: str, limit: int = 20):
+    index = get_msic_index()
+    limit = max(1, min(limit, 100))
+    return search_response_cache.respond(
+        request, f"msic-search:{limit}:{q}", index.version, lambda: {"query": q, "results": index.search(q, limit)}
+    )
+
+@app.get("/industries/classify")
+async def classify_industry(text: str, k: int = 5):
+    return {"text": text, "suggestions": await suggest_industries(text, max(1, min(k, 20)))}
+
+@app.get("/industries/{code}/children")
+def get_industry_children(request: Request, code: str):
+    index = get_msic_index()
+    lookup = None if code.lower() == "root" else code
+    children = index.children_of(lookup)
+    if children is None:
+        raise HTTPException(status_code=404, detail=f"Unknown MSIC code: {code}")
+    return response_cache.respond(
+        request, f"msic-children:{code.upper()}", index.version, lambda: {"code": lookup, "children": children}
+    )
+
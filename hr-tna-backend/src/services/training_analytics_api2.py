@@ -9,7 +9,7 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
-from sentence_transformers import SentenceTransformer, util
+from model_loader import get_model
 
 # ✅ Initialize FastAPI app
 app = FastAPI()
@@ -49,8 +49,7 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
-# ✅ Load SBERT Model for AI-powered Training Recommendations
-model = SentenceTransformer('all-MiniLM-L6-v2')
+# ✅ SBERT Model for AI-powered Training Recommendations is loaded on first use (see model_loader.py)
 
 # ✅ Organization Model
 class Organization(BaseModel):
@@ -132,7 +131,10 @@ def generate_training_recommendations(org):
     if not objectives:
         return {"error": "No objectives provided"}
 
+    from sentence_transformers import util
+
     # ✅ Encode objectives & skills
+    model = get_model()
     objective_embeddings = model.encode(objectives, convert_to_tensor=True)
     skill_embeddings = model.encode(wef_skills, convert_to_tensor=True)
 
@@ -0,0 +1,455 @@
+"""Training-history analytics: columnar, dictionary-encoded programs with precomputed rollups.
+
+    python training_history.py import CSV [--tenant ID]
+    python training_history.py coverage [--tenant ID]
+
+Rows are appended as immutable chunks of int32 code columns (attendees exploded into a
+second table). Dictionaries, the chunk list and sparse per-tenant rollups live in SQLite
+next to the chunks; every import adds its counts to the rollups, so dashboard queries
+never rescan raw rows, and SQLite's write lock serializes imports across processes.
+"""
+import os
+import csv
+import json
+import sqlite3
+import argparse
+import threading
+from contextlib import contextmanager
+import numpy as np
+from org_repository import DATA_DIR
+
+HISTORY_DIR = os.environ.get("TNA_HISTORY_DIR", os.path.join(DATA_DIR, "training_history"))
+CHUNK_ROWS = int(os.environ.get("TNA_HISTORY_CHUNK_ROWS", "200000"))
+DEFAULT_TENANT = "default"
+ALL_TENANTS = -1  # ✅ Rollup rows summed over every tenant, kept alongside the per-tenant rows
+
+PROGRAM_COLUMNS = ("tenant", "year", "title", "field", "type", "mode")
+DIMENSIONS = PROGRAM_COLUMNS + ("attendee",)
+
+# ✅ Rollups: name -> (tenant, a, b) dimensions (attendee rollups count exploded attendee rows)
+ROLLUPS = {
+    "field_year": ("tenant", "field", "year"),
+    "mode_year": ("tenant", "mode", "year"),
+    "type_year": ("tenant", "type", "year"),
+    "attendee_field": ("tenant", "attendee", "field"),
+}
+
+# ✅ CSV headers and form keys (trainingPrograms) -> column names
+KEY_ALIASES = {"attendees": "attendee"}
+
+
+class Dictionary:
+    """Append-only value <-> int32 code mapping for one categorical column."""
+
+    def __init__(self, values=()):
+        self.values = list(values)
+        self.codes = {value: i for i, value in enumerate(self.values)}
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        if value not in self.codes:
+            self.codes[value] = len(self.values)
+            self.values.append(value)
+        return self.codes[value]
+
+    def truncate(self, size):
+        """Forget values added after the first `size` (codes handed out by an import that rolled back)."""
+        for value in self.values[size:]:
+            del self.codes[value]
+        del self.values[size:]
+
+    def encode(self, values):
+        """Codes for raw values; only the distinct values are cleaned and looked up."""
+        uniques, inverse = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+        mapping = np.fromiter(
+            (self.code(value.strip()) for value in uniques.tolist()), dtype=np.int32, count=len(uniques)
+        )
+        return mapping[inverse.reshape(-1)]
+
+    def encode_lists(self, values):
+        """Explode comma-separated cells into (row index, code) pairs, splitting distinct cells only."""
+        uniques, inverse = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+        inverse = inverse.reshape(-1)
+        parts = [[self.code(item.strip()) for item in value.split(",") if item.strip()] for value in uniques.tolist()]
+        lengths = np.asarray([len(items) for items in parts], dtype=np.int64)
+        starts = np.cumsum(lengths) - lengths
+        flat = np.asarray([code for items in parts for code in items], dtype=np.int32)
+
+        counts = lengths[inverse]
+        rows = np.repeat(np.arange(len(inverse), dtype=np.int64), counts)
+        within = np.arange(int(counts.sum()), dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+        return rows, flat[np.repeat(starts[inverse], counts) + within]
+
+
+def _column_keys(record):
+    """Map a record's keys (CSV headers or form keys) onto column names."""
+    keys = {}
+    for key in record:
+        name = key.strip().lower()
+        keys[KEY_ALIASES.get(name, name)] = key
+    return keys
+
+
+class TrainingHistory:
+    """Multi-tenant training history; queries answer from rollups, imports append chunks."""
+
+    def __init__(self, path=HISTORY_DIR):
+        self.path = path
+        self.db_path = os.path.join(path, "history.sqlite3")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.dictionaries = {dim: Dictionary() for dim in DIMENSIONS}
+        self._dictionary_rowid = 0
+        self._migrate_legacy()
+
+    # ✅ Persistence ----------------------------------------------------------------------
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(self.path, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS dictionary ("
+                "dim TEXT NOT NULL, code INTEGER NOT NULL, value TEXT NOT NULL, PRIMARY KEY (dim, code))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, "
+                "first_program INTEGER NOT NULL, program_rows INTEGER NOT NULL, attendee_rows INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rollups ("
+                "name TEXT NOT NULL, tenant INTEGER NOT NULL, a INTEGER NOT NULL, b INTEGER NOT NULL, "
+                "total INTEGER NOT NULL, PRIMARY KEY (name, tenant, a, b)) WITHOUT ROWID"
+            )
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self, write=False):
+        """BEGIN IMMEDIATE for imports (one writer across processes); a plain BEGIN is a read snapshot."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _refresh(self, conn):
+        """Pick up dictionary values added by other processes since the last refresh (caller holds _lock)."""
+        for rowid, dim, code, value in conn.execute(
+            "SELECT rowid, dim, code, value FROM dictionary WHERE rowid > ? ORDER BY rowid", (self._dictionary_rowid,)
+        ):
+            if code == len(self.dictionaries[dim]):
+                self.dictionaries[dim].code(value)
+            self._dictionary_rowid = rowid
+
+    def _migrate_legacy(self):
+        """Import a store written before the SQLite catalogue (meta.json + dense rollups-*.npz) once."""
+        meta_path = os.path.join(self.path, "meta.json")
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with self._transaction(write=True) as conn:
+            if conn.execute("SELECT 1 FROM chunks LIMIT 1").fetchone() is not None:
+                return
+            conn.executemany(
+                "INSERT OR IGNORE INTO dictionary VALUES (?, ?, ?)",
+                [(dim, code, value) for dim in DIMENSIONS
+                 for code, value in enumerate(meta["dictionaries"].get(dim, []))],
+            )
+            first_program = 0
+            for chunk in meta["chunks"]:
+                chunk_dir = os.path.join(self.path, chunk)
+                programs = np.load(os.path.join(chunk_dir, "tenant.npy"), mmap_mode="r").shape[0]
+                attendees = np.load(os.path.join(chunk_dir, "attendee_attendee.npy"), mmap_mode="r").shape[0]
+                conn.execute(
+                    "INSERT INTO chunks (name, first_program, program_rows, attendee_rows) VALUES (?, ?, ?, ?)",
+                    (chunk, first_program, programs, attendees),
+                )
+                first_program += programs
+            with np.load(os.path.join(self.path, meta["rollups_file"])) as stored:
+                for name in ROLLUPS:
+                    cube = stored[name]
+                    rows = [(name, *map(int, index), int(cube[index])) for index in zip(*np.nonzero(cube))]
+                    totals = cube.sum(axis=0)
+                    rows += [(name, ALL_TENANTS, *map(int, index), int(totals[index])) for index in zip(*np.nonzero(totals))]
+                    conn.executemany("INSERT INTO rollups VALUES (?, ?, ?, ?, ?)", rows)
+        os.replace(meta_path, f"{meta_path}.migrated")
+
+    def _chunks(self, conn):
+        return conn.execute("SELECT name, first_program FROM chunks ORDER BY id").fetchall()
+
+    @property
+    def chunks(self):
+        with self._transaction() as conn:
+            return [name for name, _ in self._chunks(conn)]
+
+    @property
+    def program_rows(self):
+        return self.stats()["program_rows"]
+
+    @property
+    def attendee_rows(self):
+        return self.stats()["attendee_rows"]
+
+    def columns(self, table="programs"):
+        """Concatenate the memory-mapped chunk columns of one table (for drill-down/rebuilds)."""
+        names = PROGRAM_COLUMNS if table == "programs" else ("program", "attendee")
+        parts = {name: [] for name in names}
+        for chunk in self.chunks:
+            for name in names:
+                file_name = f"{name}.npy" if table == "programs" else f"attendee_{name}.npy"
+                parts[name].append(np.load(os.path.join(self.path, chunk, file_name), mmap_mode="r"))
+        return {name: np.concatenate(values) if values else np.zeros(0, dtype=np.int32) for name, values in parts.items()}
+
+    # ✅ Ingestion ------------------------------------------------------------------------
+
+    def ingest(self, records, tenant=DEFAULT_TENANT):
+        """Append program records (CSV rows or form trainingPrograms); returns rows added.
+
+        Work is proportional to the batch: one chunk is written and only the rollup cells
+        the batch touches are incremented, for its tenant and for the all-tenant totals.
+        """
+        if not records:
+            return 0
+        keys = {}
+        for key_set in {tuple(record) for record in records}:
+            keys.update(_column_keys(key_set))
+        records = [record for record in records if record.get(keys.get("title")) or record.get(keys.get("field"))]
+        if not records:
+            return 0
+
+        def _raw(column):
+            key = keys.get(column)
+            return [record.get(key) or "" for record in records]
+
+        with self._lock:
+            known = None
+            try:
+                with self._transaction(write=True) as conn:
+                    self._refresh(conn)
+                    known = {dim: len(dictionary) for dim, dictionary in self.dictionaries.items()}
+                    codes = {
+                        column: self.dictionaries[column].encode(
+                            [tenant] * len(records) if column == "tenant" else _raw(column)
+                        )
+                        for column in PROGRAM_COLUMNS
+                    }
+                    local_program, attendee_codes = self.dictionaries["attendee"].encode_lists(
+                        [", ".join(value) if isinstance(value, list) else value for value in _raw("attendee")]
+                    )
+                    conn.executemany(
+                        "INSERT INTO dictionary VALUES (?, ?, ?)",
+                        [(dim, code, dictionary.values[code]) for dim, dictionary in self.dictionaries.items()
+                         for code in range(known[dim], len(dictionary))],
+                    )
+
+                    first_program = conn.execute(
+                        "SELECT COALESCE(MAX(first_program + program_rows), 0) FROM chunks"
+                    ).fetchone()[0]
+                    chunk_id = conn.execute(
+                        "INSERT INTO chunks (name, first_program, program_rows, attendee_rows) VALUES ('', ?, ?, ?)",
+                        (first_program, len(records), int(attendee_codes.size)),
+                    ).lastrowid
+                    chunk_name = f"chunk-{chunk_id:06d}"
+                    conn.execute("UPDATE chunks SET name = ? WHERE id = ?", (chunk_name, chunk_id))
+
+                    tenant_code = int(codes["tenant"][0])
+                    for name, dims in ROLLUPS.items():
+                        if "attendee" in dims:
+                            coords = [attendee_codes if dim == "attendee" else codes[dim][local_program] for dim in dims[1:]]
+                        else:
+                            coords = [codes[dim] for dim in dims[1:]]
+                        width = len(self.dictionaries[dims[2]])
+                        cells, totals = np.unique(coords[0].astype(np.int64) * width + coords[1], return_counts=True)
+                        conn.executemany(
+                            "INSERT INTO rollups VALUES (?, ?, ?, ?, ?) ON CONFLICT(name, tenant, a, b) "
+                            "DO UPDATE SET total = total + excluded.total",
+                            [(name, code, cell // width, cell % width, total)
+                             for code in (tenant_code, ALL_TENANTS)
+                             for cell, total in zip(cells.tolist(), totals.tolist())],
+                        )
+
+                    # ✅ Chunk files are complete before the commit makes the chunk visible
+                    chunk_dir = os.path.join(self.path, chunk_name)
+                    os.makedirs(chunk_dir, exist_ok=True)
+                    columns = dict(codes)
+                    columns["attendee_program"] = local_program + first_program
+                    columns["attendee_attendee"] = attendee_codes
+                    for name, values in columns.items():
+                        np.save(os.path.join(chunk_dir, f"{name}.npy"), values)
+            except BaseException:
+                # ✅ Codes handed out inside the rolled-back transaction were never stored
+                for dim, size in (known or {}).items():
+                    self.dictionaries[dim].truncate(size)
+                raise
+        return len(records)
+
+    def ingest_csv(self, path, tenant=DEFAULT_TENANT, chunk_rows=CHUNK_ROWS):
+        """Stream a CSV export in chunks of chunk_rows."""
+        added = 0
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            batch = []
+            for row in csv.DictReader(f):
+                batch.append(row)
+                if len(batch) >= chunk_rows:
+                    added += self.ingest(batch, tenant)
+                    batch = []
+            added += self.ingest(batch, tenant)
+        return added
+
+    # ✅ Queries (rollups only) -----------------------------------------------------------
+
+    def _rollup(self, name, tenant):
+        """Dense (a x b) counts of one rollup for a tenant (all tenants if None), plus the a and b labels.
+
+        Labels are copied in the same snapshot, so the counts never refer past them.
+        """
+        with self._lock, self._transaction() as conn:
+            self._refresh(conn)
+            labels = [list(self.dictionaries[dim].values) for dim in ROLLUPS[name][1:]]
+            code = ALL_TENANTS if tenant is None else self.dictionaries["tenant"].codes.get(tenant)
+            rows = np.asarray(conn.execute(
+                "SELECT a, b, total FROM rollups WHERE name = ? AND tenant = ?", (name, code)
+            ).fetchall() if code is not None else [], dtype=np.int64).reshape(-1, 3)
+        counts = np.zeros(tuple(len(values) for values in labels), dtype=np.int64)
+        counts[rows[:, 0], rows[:, 1]] = rows[:, 2]
+        return counts, labels
+
+    @staticmethod
+    def _years(years):
+        return sorted(range(len(years)), key=lambda i: years[i])
+
+    def coverage(self, tenant=None):
+        """Program counts by field x year."""
+        counts, (fields, years) = self._rollup("field_year", tenant)
+        order = self._years(years)
+        rows = [i for i in range(counts.shape[0]) if counts[i].any()]
+        return {
+            "years": [years[i] for i in order],
+            "fields": [fields[i] for i in rows],
+            "counts": counts[np.ix_(rows, order)].tolist() if rows else [],
+        }
+
+    def mode_mix(self, tenant=None):
+        """Online vs non-online (and every other mode) per year, with the online share."""
+        counts, (modes, years) = self._rollup("mode_year", tenant)
+        order = self._years(years)
+        online = [i for i, mode in enumerate(modes) if mode.casefold() == "online"]
+        mix = []
+        for y in order:
+            total = int(counts[:, y].sum()) if counts.size else 0
+            if not total:
+                continue
+            online_count = int(counts[online, y].sum()) if online else 0
+            mix.append({
+                "year": years[y],
+                "total": total,
+                "modes": {modes[m]: int(counts[m, y]) for m in range(counts.shape[0]) if counts[m, y]},
+                "online_share": round(online_count / total, 4),
+            })
+        return mix
+
+    def attendee_gaps(self, tenant=None):
+        """Per attendee level: fields it was trained in, and fields trained for others but not for it."""
+        reached, (attendees, fields) = self._rollup("attendee_field", tenant)
+        offered = reached.sum(axis=0) > 0 if reached.size else np.zeros(0, dtype=bool)
+        gaps = []
+        for a in range(reached.shape[0]):
+            if not reached[a].any():
+                continue
+            gaps.append({
+                "attendee": attendees[a],
+                "participations": int(reached[a].sum()),
+                "fields_covered": [fields[f] for f in np.flatnonzero(reached[a])],
+                "gaps": [fields[f] for f in np.flatnonzero(offered & (reached[a] == 0))],
+            })
+        return gaps
+
+    def programs(self, tenant):
+        """Distinct (title, field) programs of one tenant plus a programs x attendee-levels membership matrix."""
+        with self._lock, self._transaction() as conn:
+            self._refresh(conn)
+            chunks = self._chunks(conn)
+            code = self.dictionaries["tenant"].codes.get(tenant)
+            n_fields = max(len(self.dictionaries["field"]), 1)
+            levels = list(self.dictionaries["attendee"].values)
+        keys, attendee_keys, attendee_codes = [], [], []
+        for chunk, offset in chunks:
+            chunk_dir = os.path.join(self.path, chunk)
+            tenants = np.load(os.path.join(chunk_dir, "tenant.npy"), mmap_mode="r")
+            rows = np.flatnonzero(tenants == code) if code is not None else np.zeros(0, dtype=np.int64)
+            if rows.size:
+                titles = np.load(os.path.join(chunk_dir, "title.npy"), mmap_mode="r")
+                fields = np.load(os.path.join(chunk_dir, "field.npy"), mmap_mode="r")
+                chunk_keys = np.zeros(tenants.shape[0], dtype=np.int64)
+                chunk_keys[rows] = titles[rows].astype(np.int64) * n_fields + fields[rows]
+                keys.append(chunk_keys[rows])
+
+                program = np.load(os.path.join(chunk_dir, "attendee_program.npy"), mmap_mode="r") - offset
+                attendee = np.load(os.path.join(chunk_dir, "attendee_attendee.npy"), mmap_mode="r")
+                selected = np.isin(program, rows)
+                attendee_keys.append(chunk_keys[program[selected]])
+                attendee_codes.append(np.asarray(attendee[selected]))
+
+        if not keys:
+            return [], [], np.zeros((0, 0), dtype=bool), []
+        unique_keys = np.unique(np.concatenate(keys))
+        membership = np.zeros((unique_keys.size, len(levels)), dtype=bool)
+        if attendee_keys:
+            membership[np.searchsorted(unique_keys, np.concatenate(attendee_keys)), np.concatenate(attendee_codes)] = True
+        titles = [self.dictionaries["title"].values[k // n_fields] for k in unique_keys.tolist()]
+        fields = [self.dictionaries["field"].values[k % n_fields] for k in unique_keys.tolist()]
+        return titles, fields, membership, levels
+
+    def stats(self):
+        with self._lock, self._transaction() as conn:
+            self._refresh(conn)
+            chunks, program_rows, attendee_rows = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(program_rows), 0), COALESCE(SUM(attendee_rows), 0) FROM chunks"
+            ).fetchone()
+            cardinality = {dim: len(dictionary) for dim, dictionary in self.dictionaries.items()}
+        return {
+            "program_rows": program_rows,
+            "attendee_rows": attendee_rows,
+            "chunks": chunks,
+            "cardinality": cardinality,
+        }
+
+
+training_history = None
+_lock = threading.Lock()
+
+
+def get_training_history():
+    """One store per process; dictionaries are cached and refreshed from SQLite on use."""
+    global training_history
+    if training_history is None:
+        with _lock:
+            if training_history is None:
+                training_history = TrainingHistory()
+    return training_history
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Training-history analytics.")
+    parser.add_argument("command", choices=["import", "coverage"])
+    parser.add_argument("csv_path", nargs="?")
+    parser.add_argument("--tenant", default=None)
+    args = parser.parse_args()
+
+    history = get_training_history()
+    if args.command == "import":
+        added = history.ingest_csv(args.csv_path, args.tenant or DEFAULT_TENANT)
+        print(f"✅ Imported {added} training programs ({history.stats()['program_rows']} total)")
+    else:
+        print(json.dumps(history.coverage(args.tenant), indent=4))
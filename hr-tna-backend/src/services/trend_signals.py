@@ -0,0 +1,374 @@
+"""Google Trends interest signals: batched, rate-limited, cached and replayable offline.
+
+    python trend_signals.py fetch KEYWORD [KEYWORD ...]
+    python trend_signals.py record FIXTURE KEYWORD [KEYWORD ...]
+    python trend_signals.py record-raw DIR KEYWORD [KEYWORD ...]
+
+`record-raw` saves the upstream response bodies (explore.txt, multiline.txt) as used by
+the parser tests in tests/fixtures/google_trends; re-record them when Google changes format.
+
+TNA_TREND_TRANSPORT=replay:<fixture.json> serves recorded responses with no network.
+"""
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import argparse
+import threading
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from wef_ingest import DATA_DIR
+from log_config import get_logger
+
+TRENDS_URL = "https://trends.google.com/trends"
+TREND_CACHE = os.environ.get("TNA_TREND_CACHE", os.path.join(DATA_DIR, "trends.sqlite3"))
+TREND_TRANSPORT = os.environ.get("TNA_TREND_TRANSPORT", "http")
+TREND_TTL = float(os.environ.get("TNA_TREND_TTL", str(6 * 3600)))
+TREND_TIMEFRAME = os.environ.get("TNA_TREND_TIMEFRAME", "now 7-d")
+TREND_GEO = os.environ.get("TNA_TREND_GEO", "")
+TREND_RATE = float(os.environ.get("TNA_TREND_RATE", "0.2"))  # payloads per second
+TREND_BURST = int(os.environ.get("TNA_TREND_BURST", "2"))
+TREND_CONCURRENCY = int(os.environ.get("TNA_TREND_CONCURRENCY", "2"))
+MAX_KEYWORDS = 5  # ✅ Upstream limit per comparison payload
+
+log = get_logger(__name__)
+
+
+class TrendRateLimited(Exception):
+    """Upstream answered 429; the caller keeps serving cached values."""
+
+
+class TrendFixtureMissing(KeyError):
+    """Replay transport has no recording for the requested payload."""
+
+
+class TrendFormatChanged(Exception):
+    """An undocumented Google Trends response no longer has the shape this parser expects."""
+
+
+def payload_key(keywords, timeframe, geo):
+    return f"{geo}|{timeframe}|{json.dumps(list(keywords))}"
+
+
+# ✅ Google Trends has no public API: these parsers follow what the web app's /api/explore and
+# /api/widgetdata/multiline return today. tests/fixtures/google_trends holds recorded bodies.
+
+def strip_xssi(text):
+    """Drop the anti-JSON-hijacking prefix (")]}'" or ")]}',") in front of every response body."""
+    start = min((i for i in (text.find("{"), text.find("[")) if i >= 0), default=-1)
+    if start < 0:
+        raise TrendFormatChanged("response body holds no JSON")
+    try:
+        return json.loads(text[start:])
+    except json.JSONDecodeError as e:
+        raise TrendFormatChanged(f"response body is not JSON: {e.msg}") from e
+
+
+def parse_explore(text):
+    """The TIMESERIES widget ({"request", "token", ...}) of an /api/explore response."""
+    try:
+        return next(widget for widget in strip_xssi(text)["widgets"] if widget.get("id") == "TIMESERIES")
+    except (KeyError, TypeError, StopIteration) as e:
+        raise TrendFormatChanged(f"unexpected /api/explore response: {e!r}") from e
+
+
+def parse_multiline(text, keywords):
+    """{keyword: [[unix_ts, value], ...]} from an /api/widgetdata/multiline response."""
+    try:
+        timeline = strip_xssi(text)["default"]["timelineData"]
+        # ✅ Values arrive in keyword order for each time point
+        series = {keyword: [] for keyword in keywords}
+        for point in timeline:
+            for keyword, value in zip(keywords, point["value"]):
+                series[keyword].append([int(point["time"]), int(value)])
+    except (KeyError, TypeError, ValueError) as e:
+        raise TrendFormatChanged(f"unexpected /api/widgetdata/multiline response: {e!r}") from e
+    return series
+
+
+# ✅ Transports: fetch(keywords, timeframe, geo) -> {keyword: [[unix_ts, value], ...]} --------
+
+class HttpTransport:
+    """One pooled requests.Session for every payload (cookies and connections are reused)."""
+
+    def __init__(self, session=None, hl="en-US", tz=360, timeout=(10, 25)):
+        self.hl = hl
+        self.tz = tz
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        retry = Retry(total=3, backoff_factor=2, status_forcelist=(500, 502, 504), allowed_methods=None)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(TREND_CONCURRENCY, 1), max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"accept-language": hl})
+        self._cookie_lock = threading.Lock()
+        self._has_cookie = False
+
+    def _ensure_cookie(self):
+        with self._cookie_lock:
+            if not self._has_cookie:
+                self.session.get(f"{TRENDS_URL}/explore/?geo={self.hl[-2:]}", timeout=self.timeout)
+                self._has_cookie = True
+
+    def _text(self, response):
+        if response.status_code == 429:
+            raise TrendRateLimited("Google Trends rate limit reached")
+        response.raise_for_status()
+        return response.text
+
+    def fetch(self, keywords, timeframe, geo):
+        self._ensure_cookie()
+        request = {
+            "comparisonItem": [{"keyword": keyword, "time": timeframe, "geo": geo} for keyword in keywords],
+            "category": 0,
+            "property": "",
+        }
+        widget = parse_explore(self._text(self.session.post(
+            f"{TRENDS_URL}/api/explore",
+            params={"hl": self.hl, "tz": self.tz, "req": json.dumps(request)},
+            timeout=self.timeout,
+        )))
+        return parse_multiline(self._text(self.session.get(
+            f"{TRENDS_URL}/api/widgetdata/multiline",
+            params={"req": json.dumps(widget["request"]), "token": widget["token"], "tz": self.tz},
+            timeout=self.timeout,
+        )), keywords)
+
+
+class RecordingTransport:
+    """Pass-through that saves every response into a fixture file for later replay."""
+
+    def __init__(self, inner, path):
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+
+    def fetch(self, keywords, timeframe, geo):
+        series = self.inner.fetch(keywords, timeframe, geo)
+        with self._lock:
+            recordings = {}
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    recordings = json.load(f)
+            recordings[payload_key(keywords, timeframe, geo)] = series
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(recordings, f, indent=4)
+        return series
+
+
+class ReplayTransport:
+    """Serve recorded payloads from a fixture file; never touches the network."""
+
+    def __init__(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            self.recordings = json.load(f)
+        self.calls = []
+
+    def fetch(self, keywords, timeframe, geo):
+        key = payload_key(keywords, timeframe, geo)
+        self.calls.append(key)
+        if key not in self.recordings:
+            raise TrendFixtureMissing(key)
+        return self.recordings[key]
+
+
+def record_raw(directory, keywords, timeframe=TREND_TIMEFRAME, geo=TREND_GEO):
+    """Fetch one payload over HTTP, saving each raw /api/* body as <endpoint>.txt (parser fixtures)."""
+    os.makedirs(directory, exist_ok=True)
+    transport = HttpTransport()
+
+    def save_body(response, *args, **kwargs):
+        path = urlparse(response.url).path
+        if "/api/" in path:
+            with open(os.path.join(directory, path.rsplit("/", 1)[-1] + ".txt"), "w", encoding="utf-8") as f:
+                f.write(response.text)
+
+    transport.session.hooks["response"].append(save_body)
+    return transport.fetch(list(keywords)[:MAX_KEYWORDS], timeframe, geo)
+
+
+def create_transport(spec=TREND_TRANSPORT):
+    """'http' (default) or 'replay:<fixture.json>'."""
+    if spec.startswith("replay:"):
+        return ReplayTransport(spec[len("replay:"):])
+    if spec == "http":
+        return HttpTransport()
+    raise ValueError(f"Unknown trend transport: {spec}")
+
+
+# ✅ Rate limiting ------------------------------------------------------------------------
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, at most `capacity` banked."""
+
+    def __init__(self, rate=TREND_RATE, capacity=TREND_BURST):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = None
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:  # ✅ FIFO: waiters are served in arrival order
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# ✅ Time-series cache --------------------------------------------------------------------
+
+class TrendCache:
+    """SQLite time series of interest points plus the time each series was last fetched."""
+
+    def __init__(self, path=TREND_CACHE):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS trend_points ("
+                "keyword TEXT, geo TEXT, timeframe TEXT, ts INTEGER, value INTEGER, "
+                "PRIMARY KEY (keyword, geo, timeframe, ts))"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS trend_fetches ("
+                "keyword TEXT, geo TEXT, timeframe TEXT, fetched_at REAL, first_ts INTEGER, "
+                "PRIMARY KEY (keyword, geo, timeframe))"
+            )
+
+    def get(self, keywords, timeframe, geo, max_age=None):
+        """{keyword: points} for series fetched within max_age seconds (any age if None)."""
+        found = {}
+        with self._lock:
+            for keyword in keywords:
+                row = self.conn.execute(
+                    "SELECT fetched_at, first_ts FROM trend_fetches WHERE keyword = ? AND geo = ? AND timeframe = ?",
+                    (keyword, geo, timeframe),
+                ).fetchone()
+                if row is None or (max_age is not None and time.time() - row[0] > max_age):
+                    continue
+                found[keyword] = [list(point) for point in self.conn.execute(
+                    "SELECT ts, value FROM trend_points WHERE keyword = ? AND geo = ? AND timeframe = ? "
+                    "AND ts >= ? ORDER BY ts",
+                    (keyword, geo, timeframe, row[1]),
+                )]
+        return found
+
+    def put(self, series, timeframe, geo):
+        now = time.time()
+        with self._lock, self.conn:
+            for keyword, points in series.items():
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO trend_points VALUES (?, ?, ?, ?, ?)",
+                    [(keyword, geo, timeframe, ts, value) for ts, value in points],
+                )
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO trend_fetches VALUES (?, ?, ?, ?, ?)",
+                    (keyword, geo, timeframe, now, points[0][0] if points else 0),
+                )
+
+
+# ✅ Fetcher ------------------------------------------------------------------------------
+
+class TrendSignals:
+    """Serve interest series from the cache; fetch the misses in rate-limited batches of five."""
+
+    def __init__(self, transport=None, cache=None, ttl=TREND_TTL, bucket=None, concurrency=TREND_CONCURRENCY):
+        self._transport = transport
+        self._cache = cache
+        self.ttl = ttl
+        self.bucket = bucket or TokenBucket()
+        self.concurrency = max(1, concurrency)
+        self.payloads = 0
+        self.cache_hits = 0
+        self.errors = 0
+
+    @property
+    def transport(self):
+        if self._transport is None:
+            self._transport = create_transport()
+        return self._transport
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            self._cache = TrendCache()
+        return self._cache
+
+    async def interest(self, keywords, timeframe=TREND_TIMEFRAME, geo=TREND_GEO):
+        """{keyword: [[unix_ts, value], ...]}; stale values are served if upstream fails.
+
+        Cache reads and writes are SQLite calls, so like the upstream fetch they run on a thread.
+        """
+        keywords = list(dict.fromkeys(keyword.strip() for keyword in keywords if keyword.strip()))
+        series = await asyncio.to_thread(self.cache.get, keywords, timeframe, geo, max_age=self.ttl)
+        self.cache_hits += len(series)
+        missing = [keyword for keyword in keywords if keyword not in series]
+        if not missing:
+            return series
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch_batch(batch):
+            async with semaphore:
+                await self.bucket.acquire()
+                self.payloads += 1
+                fetched = await asyncio.to_thread(self.transport.fetch, batch, timeframe, geo)
+                await asyncio.to_thread(self.cache.put, fetched, timeframe, geo)
+                return fetched
+
+        batches = [missing[i:i + MAX_KEYWORDS] for i in range(0, len(missing), MAX_KEYWORDS)]
+        for batch, result in zip(batches, await asyncio.gather(*map(fetch_batch, batches), return_exceptions=True)):
+            if isinstance(result, Exception):
+                self.errors += 1
+                log.warning("Trend fetch failed, serving cached values", extra={"keywords": batch, "error": str(result)})
+                result = await asyncio.to_thread(self.cache.get, batch, timeframe, geo)
+            series.update(result)
+        return series
+
+    async def scores(self, keywords, timeframe=TREND_TIMEFRAME, geo=TREND_GEO):
+        """Mean interest per keyword scaled to 0..1 (None when no data is available)."""
+        series = await self.interest(keywords, timeframe, geo)
+        return {
+            keyword: (
+                round(sum(value for _, value in series[keyword]) / (100.0 * len(series[keyword])), 4)
+                if series.get(keyword) else None
+            )
+            for keyword in keywords
+        }
+
+    def stats(self):
+        return {"payloads": self.payloads, "cache_hits": self.cache_hits, "errors": self.errors, "ttl": self.ttl}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Google Trends interest signals.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    fetch_parser = subparsers.add_parser("fetch")
+    fetch_parser.add_argument("keywords", nargs="+")
+    record_parser = subparsers.add_parser("record")
+    record_parser.add_argument("fixture")
+    record_parser.add_argument("keywords", nargs="+")
+    raw_parser = subparsers.add_parser("record-raw")
+    raw_parser.add_argument("directory")
+    raw_parser.add_argument("keywords", nargs="+", help=f"at most {MAX_KEYWORDS} (one payload)")
+    args = parser.parse_args()
+
+    if args.command == "record-raw":
+        print(json.dumps(record_raw(args.directory, args.keywords), indent=4))
+    else:
+        if args.command == "record":
+            signals = TrendSignals(transport=RecordingTransport(HttpTransport(), args.fixture), ttl=0)
+        else:
+            signals = TrendSignals()
+        print(json.dumps(asyncio.run(signals.scores(args.keywords)), indent=4))
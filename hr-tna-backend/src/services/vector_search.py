@@ -0,0 +1,191 @@
+import os
+from abc import ABC, abstractmethod
+import numpy as np
+from metrics import timed_function
+
+try:
+    import hnswlib
+except ImportError:  # ✅ Optional: HNSW backend is only used when hnswlib is installed
+    hnswlib = None
+
+# ✅ Backend selection and recall/latency knobs
+VECTOR_INDEX = os.environ.get("TNA_VECTOR_INDEX", "auto")  # auto | exact | ivf | hnsw
+EXACT_MAX_ITEMS = int(os.environ.get("TNA_EXACT_MAX_ITEMS", "20000"))
+IVF_NPROBE = int(os.environ.get("TNA_IVF_NPROBE", "8"))
+HNSW_M = int(os.environ.get("TNA_HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.environ.get("TNA_HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.environ.get("TNA_HNSW_EF_SEARCH", "64"))
+BLOCK_SIZE = 4096
+
+
+@timed_function("top_k")
+def top_k(scores, k):
+    """Row-wise top-k of a 2-D score matrix via argpartition (only the k winners are sorted)."""
+    scores = np.atleast_2d(scores)
+    n = scores.shape[1]
+    k = min(k, n)
+    if k <= 0:
+        return np.zeros((scores.shape[0], 0), dtype=np.float32), np.zeros((scores.shape[0], 0), dtype=np.int64)
+    if k < n:
+        ids = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        ids = np.broadcast_to(np.arange(n), scores.shape).copy()
+    top_scores = np.take_along_axis(scores, ids, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind="stable")
+    return np.take_along_axis(top_scores, order, axis=1), np.take_along_axis(ids, order, axis=1).astype(np.int64)
+
+
+class VectorIndex(ABC):
+    """Common interface: inner-product top-k search over L2-normalized vectors."""
+
+    kind = "base"
+
+    @abstractmethod
+    def __len__(self):
+        ...
+
+    @abstractmethod
+    def search(self, queries, k):
+        """Return (scores, ids), each shaped (len(queries), k), best match first."""
+
+
+class ExactIndex(VectorIndex):
+    """Brute-force scan; exact results and the fallback for small catalogues."""
+
+    kind = "exact"
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    @timed_function("vector_search")
+    def search(self, queries, k):
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, len(self))
+        if len(self) <= BLOCK_SIZE:
+            return top_k(queries @ self.vectors.T, k)
+
+        # ✅ Scan in blocks so the score matrix stays bounded for huge catalogues
+        best_scores = np.full((queries.shape[0], 0), -np.inf, dtype=np.float32)
+        best_ids = np.zeros((queries.shape[0], 0), dtype=np.int64)
+        for start in range(0, len(self), BLOCK_SIZE):
+            block_scores, block_ids = top_k(queries @ self.vectors[start:start + BLOCK_SIZE].T, k)
+            merged_scores = np.hstack([best_scores, block_scores])
+            merged_ids = np.hstack([best_ids, block_ids + start])
+            best_scores, order = top_k(merged_scores, k)
+            best_ids = np.take_along_axis(merged_ids, order, axis=1)
+        return best_scores, best_ids
+
+
+class IVFIndex(VectorIndex):
+    """Inverted-file index: spherical k-means cells, search probes the nprobe closest cells."""
+
+    kind = "ivf"
+
+    def __init__(self, vectors, nlist=None, nprobe=IVF_NPROBE, iterations=10, seed=0):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.size = vectors.shape[0]
+        self.nlist = max(1, min(nlist or int(np.sqrt(self.size)), self.size)) if self.size else 0
+        self.nprobe = nprobe
+        if self.size:
+            self.centroids = self._train(vectors, iterations, np.random.default_rng(seed))
+        else:  # ✅ Empty catalogue (fresh install): no cells, every search returns nothing
+            self.centroids = np.zeros((0, vectors.shape[-1]), dtype=np.float32)
+
+        assignments = self._assign(vectors)
+        order = np.argsort(assignments, kind="stable")
+        self.ids = order.astype(np.int64)
+        self.vectors = vectors[order]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=self.nlist))])
+
+    def __len__(self):
+        return self.size
+
+    def _assign(self, vectors):
+        assignments = np.empty(vectors.shape[0], dtype=np.int64)
+        for start in range(0, vectors.shape[0], BLOCK_SIZE):
+            block = vectors[start:start + BLOCK_SIZE]
+            assignments[start:start + BLOCK_SIZE] = np.argmax(block @ self.centroids.T, axis=1)
+        return assignments
+
+    def _train(self, vectors, iterations, rng):
+        sample_size = min(self.size, self.nlist * 256)
+        sample = vectors[rng.choice(self.size, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, self.nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            centroids[~empty] = sums[~empty] / norms[~empty]
+        return centroids
+
+    @timed_function("vector_search")
+    def search(self, queries, k):
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, self.size)
+        if k <= 0:
+            return top_k(np.zeros((queries.shape[0], 0), dtype=np.float32), k)
+        nprobe = min(self.nprobe, self.nlist)
+        _, cells = top_k(queries @ self.centroids.T, nprobe)
+
+        all_scores = np.full((queries.shape[0], k), -np.inf, dtype=np.float32)
+        all_ids = np.full((queries.shape[0], k), -1, dtype=np.int64)
+        for row, query in enumerate(queries):
+            candidates = np.concatenate(
+                [np.arange(self.offsets[c], self.offsets[c + 1]) for c in cells[row]]
+            )
+            if candidates.size == 0:
+                continue
+            scores, local = top_k(self.vectors[candidates] @ query, k)
+            found = scores.shape[1]
+            all_scores[row, :found] = scores[0]
+            all_ids[row, :found] = self.ids[candidates[local[0]]]
+        return all_scores, all_ids
+
+
+class HNSWIndex(VectorIndex):
+    """Graph-based ANN index backed by hnswlib (ef_search trades recall for latency)."""
+
+    kind = "hnsw"
+
+    def __init__(self, vectors, m=HNSW_M, ef_construction=HNSW_EF_CONSTRUCTION, ef_search=HNSW_EF_SEARCH):
+        if hnswlib is None:
+            raise ImportError("hnswlib is not installed; use the 'ivf' or 'exact' index instead")
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.size = vectors.shape[0]
+        self.index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        self.index.init_index(max_elements=self.size, ef_construction=ef_construction, M=m)
+        self.index.add_items(vectors, np.arange(self.size))
+        self.index.set_ef(max(ef_search, 1))
+
+    def __len__(self):
+        return self.size
+
+    @timed_function("vector_search")
+    def search(self, queries, k):
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, self.size)
+        self.index.set_ef(max(self.index.ef, k))
+        labels, distances = self.index.knn_query(queries, k=k)
+        return (1.0 - distances).astype(np.float32), labels.astype(np.int64)
+
+
+def create_index(vectors, kind=VECTOR_INDEX, **params):
+    """Build a search index; 'auto' stays exact for small catalogues and goes ANN beyond that."""
+    if kind == "auto":
+        if vectors.shape[0] <= EXACT_MAX_ITEMS:
+            kind = "exact"
+        else:
+            kind = "hnsw" if hnswlib is not None else "ivf"
+
+    if kind == "exact":
+        return ExactIndex(vectors)
+    if kind == "ivf":
+        return IVFIndex(vectors, **params)
+    if kind == "hnsw":
+        return HNSWIndex(vectors, **params)
+    raise ValueError(f"Unknown vector index type: {kind}")
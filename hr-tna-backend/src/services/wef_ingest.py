@@ -0,0 +1,282 @@
+"""Streaming, parallel ingestion of report PDFs with a page-level text cache.
+
+    python wef_ingest.py download [--url URL] [--out PATH]
+    python wef_ingest.py extract PATH [--keyword K ...] [--workers N]
+"""
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import requests
+import pdfplumber
+
+try:
+    import pypdfium2
+except ImportError:  # ✅ Optional: without it every page goes straight to pdfplumber
+    pypdfium2 = None
+
+WEF_REPORT_URL = "https://www3.weforum.org/docs/WEF_Future_of_Jobs_Report_2025.pdf"
+DATA_DIR = os.environ.get(
+    "TNA_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+)
+REPORT_PATH = os.environ.get("TNA_WEF_REPORT", os.path.join(DATA_DIR, "wef_report.pdf"))
+PAGE_CACHE = os.environ.get("TNA_PAGE_CACHE", os.path.join(DATA_DIR, "page_cache.sqlite3"))
+WEF_KEYWORDS = ("Skills Outlook", "Top Skills")
+CHUNK_SIZE = 1024 * 1024
+INGEST_WORKERS = int(os.environ.get("TNA_INGEST_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+
+
+def _squash(text):
+    """Lowercase + collapse whitespace so keywords split across lines still match."""
+    return re.sub(r"\s+", " ", text or "").lower()
+
+
+def matches_keywords(text, keywords):
+    """True if any keyword occurs in the text; an empty keyword list matches every page."""
+    if not keywords:
+        return True
+    text = _squash(text)
+    return any(_squash(keyword) in text for keyword in keywords)
+
+
+# ✅ Download --------------------------------------------------------------------------
+
+def _content_range(response):
+    """(start, total) from a Content-Range header; either is None when absent or unknown."""
+    match = re.match(r"bytes\s+(?:(\d+)-\d+|\*)/(\d+|\*)", response.headers.get("Content-Range", ""))
+    if not match:
+        return None, None
+    start, total = match.groups()
+    return (int(start) if start else None), (int(total) if total != "*" else None)
+
+
+def _discard_partial(part_path, meta_path):
+    for stale in (part_path, meta_path):
+        if os.path.exists(stale):
+            os.remove(stale)
+
+
+def _finish_download(part_path, meta_path, path):
+    os.replace(part_path, path)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    return path
+
+
+def download_report(url=WEF_REPORT_URL, path=REPORT_PATH, session=None, chunk_size=CHUNK_SIZE, timeout=60):
+    """Stream a file to disk in chunks, resuming a previous partial download if possible.
+
+    Bytes go to `<path>.part`; a Range request continues from its current size and
+    If-Range (ETag/Last-Modified) makes the server restart if the file changed upstream.
+    A 206 that does not start at that offset restarts from scratch; a 416 whose total
+    equals the partial size means the previous run already had every byte.
+    """
+    session = session or requests.Session()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    part_path = f"{path}.part"
+    meta_path = f"{path}.part.json"
+
+    headers = {}
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if offset and os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            validator = json.load(f).get("validator")
+        if validator:
+            headers = {"Range": f"bytes={offset}-", "If-Range": validator}
+
+    with session.get(url, stream=True, headers=headers, timeout=timeout) as response:
+        if headers and response.status_code == 416:
+            if _content_range(response)[1] == offset:
+                return _finish_download(part_path, meta_path, path)
+            restart = True
+        else:
+            restart = bool(headers) and response.status_code == 206 and _content_range(response)[0] != offset
+        if restart:
+            # ✅ The server cannot continue this .part; drop it and fetch the whole file once
+            _discard_partial(part_path, meta_path)
+        else:
+            if response.status_code not in (200, 206):
+                raise RuntimeError(f"Download failed with HTTP {response.status_code}")
+            resumed = response.status_code == 206
+            validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"url": url, "validator": validator}, f)
+
+            with open(part_path, "ab" if resumed else "wb") as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        f.write(chunk)
+
+    if restart:
+        return download_report(url, path, session, chunk_size, timeout)
+    return _finish_download(part_path, meta_path, path)
+
+
+# ✅ Page cache ------------------------------------------------------------------------
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PageCache:
+    """SQLite cache of per-page text, keyed by a hash of each page's content streams."""
+
+    def __init__(self, path=PAGE_CACHE):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "page_key TEXT PRIMARY KEY, quick_text TEXT, layout_text TEXT)"
+            )
+            self.conn.execute("CREATE TABLE IF NOT EXISTS files (file_hash TEXT PRIMARY KEY, page_keys TEXT)")
+
+    def page_keys_for(self, file_hash):
+        row = self.conn.execute("SELECT page_keys FROM files WHERE file_hash = ?", (file_hash,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def remember_file(self, file_hash, page_keys):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?)", (file_hash, json.dumps(page_keys)))
+
+    def get_many(self, page_keys):
+        found = {}
+        for start in range(0, len(page_keys), 500):
+            chunk = page_keys[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT page_key, quick_text, layout_text FROM pages WHERE page_key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            found.update({key: (quick, layout) for key, quick, layout in rows})
+        return found
+
+    def put_many(self, rows):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO pages VALUES (?, ?, ?) ON CONFLICT(page_key) DO UPDATE SET "
+                "quick_text = COALESCE(excluded.quick_text, pages.quick_text), "
+                "layout_text = COALESCE(excluded.layout_text, pages.layout_text)",
+                rows,
+            )
+
+
+def page_content_keys(path):
+    """Hash each page's decoded content streams (no text/layout extraction)."""
+    from pdfminer.pdftypes import resolve1
+
+    keys = []
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages:
+            digest = hashlib.sha256(repr(page.bbox).encode("utf-8"))
+            contents = resolve1(page.page_obj.attrs.get("Contents"))
+            streams = contents if isinstance(contents, list) else [contents]
+            for stream in streams:
+                stream = resolve1(stream)
+                if stream is not None:
+                    digest.update(stream.get_data())
+            keys.append(digest.hexdigest())
+    return keys
+
+
+# ✅ Parallel extraction ---------------------------------------------------------------
+
+def _extract_chunk(path, page_numbers, keywords, need_layout):
+    """Worker: cheap text for every page, full pdfplumber layout text only where keywords hit.
+
+    need_layout lists pages whose quick text is already cached and known to match.
+    """
+    results = []
+    pdfium_doc = pypdfium2.PdfDocument(path) if pypdfium2 is not None else None
+    try:
+        with pdfplumber.open(path) as pdf:
+            for number in page_numbers:
+                quick, layout = None, None
+                if number not in need_layout:
+                    if pdfium_doc is not None:
+                        text_page = pdfium_doc[number].get_textpage()
+                        quick = text_page.get_text_range()
+                        text_page.close()
+                    else:
+                        quick = layout = pdf.pages[number].extract_text() or ""
+                if layout is None and (number in need_layout or matches_keywords(quick, keywords)):
+                    layout = pdf.pages[number].extract_text() or ""
+                results.append((number, quick, layout))
+    finally:
+        if pdfium_doc is not None:
+            pdfium_doc.close()
+    return results
+
+
+def extract_pages(path=REPORT_PATH, keywords=WEF_KEYWORDS, workers=INGEST_WORKERS, cache=None):
+    """Return [{"page": n, "text": ...}] for pages mentioning any keyword.
+
+    Unchanged pages (same content hash) are served from the cache; the rest are
+    extracted across a process pool.
+    """
+    cache = cache or PageCache()
+    file_hash = file_sha256(path)
+    page_keys = cache.page_keys_for(file_hash)
+    if page_keys is None:
+        page_keys = page_content_keys(path)
+        cache.remember_file(file_hash, page_keys)
+
+    cached = cache.get_many(page_keys)
+    todo, need_layout = [], set()
+    for number, key in enumerate(page_keys):
+        quick, layout = cached.get(key, (None, None))
+        if quick is None:
+            todo.append(number)
+        elif layout is None and matches_keywords(quick, keywords):
+            todo.append(number)
+            need_layout.add(number)
+
+    if todo:
+        chunk_count = max(1, min(workers, len(todo)))
+        chunks = [todo[i::chunk_count] for i in range(chunk_count)]
+        if chunk_count == 1:
+            batches = [_extract_chunk(path, chunks[0], keywords, need_layout)]
+        else:
+            with ProcessPoolExecutor(max_workers=chunk_count) as pool:
+                batches = list(pool.map(
+                    _extract_chunk, [path] * chunk_count, chunks, [keywords] * chunk_count,
+                    [need_layout] * chunk_count,
+                ))
+        rows = [(page_keys[number], quick, layout) for batch in batches for number, quick, layout in batch]
+        cache.put_many(rows)
+        cached = cache.get_many(page_keys)
+
+    pages = []
+    for number, key in enumerate(page_keys):
+        quick, layout = cached.get(key, (None, None))
+        if layout is not None and (matches_keywords(quick, keywords) or matches_keywords(layout, keywords)):
+            pages.append({"page": number + 1, "text": layout})
+    return pages
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WEF report ingestion.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    download_parser = subparsers.add_parser("download")
+    download_parser.add_argument("--url", default=WEF_REPORT_URL)
+    download_parser.add_argument("--out", default=REPORT_PATH)
+    extract_parser = subparsers.add_parser("extract")
+    extract_parser.add_argument("path", nargs="?", default=REPORT_PATH)
+    extract_parser.add_argument("--keyword", action="append", dest="keywords")
+    extract_parser.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    args = parser.parse_args()
+
+    if args.command == "download":
+        print(f"✅ Downloaded {download_report(args.url, args.out)}")
+    else:
+        found = extract_pages(args.path, tuple(args.keywords or WEF_KEYWORDS), args.workers)
+        print(f"✅ {len(found)} matching pages")
+        for page in found[:3]:
+            print(f"\n📄 Page {page['page']}\n{page['text'][:500]}")
@@ -0,0 +1,25 @@
+import os
+from wef_ingest import REPORT_PATH, WEF_KEYWORDS, WEF_REPORT_URL, download_report, extract_pages
+
+def download_wef_report():
+    """Downloads the WEF Future of Jobs Report (streamed to disk, resumable)."""
+    try:
+        download_report(WEF_REPORT_URL, REPORT_PATH)
+        print("✅ WEF Report Downloaded Successfully")
+    except Exception as e:
+        print(f"❌ Failed to Download WEF Report: {e}")
+
+def extract_wef_data():
+    """Extracts key skills and training needs from the WEF report."""
+    if not os.path.exists(REPORT_PATH):
+        print("❌ Report not found, downloading now...")
+        download_wef_report()
+
+    # ✅ Parallel, keyword pre-filtered, cached per page
+    return [page["text"] for page in extract_pages(REPORT_PATH, WEF_KEYWORDS)]
+
+if __name__ == "__main__":
+    download_wef_report()
+    extracted_data = extract_wef_data()
+    print("\n📌 Extracted Data:")
+    print("\n".join(extracted_data[:3]))  # Print first 3 matches